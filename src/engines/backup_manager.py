@@ -12,6 +12,7 @@ import concurrent.futures
 from models.device import Device
 from models.backup_record import BackupRecord
 from engines.connection_manager import ConnectionManager
+from utils.progress import ProgressChannel
 
 
 class BackupManager:
@@ -86,7 +87,8 @@ class BackupManager:
         self,
         devices: List[Device],
         config_types: List[str] = None,
-        progress_callback=None
+        progress_callback=None,
+        progress: Optional[ProgressChannel] = None
     ) -> List[BackupRecord]:
         """
         Backup configurations from multiple devices in parallel.
@@ -95,6 +97,7 @@ class BackupManager:
             devices: List of devices to backup
             config_types: Config types to backup
             progress_callback: Optional callback for progress updates
+            progress: Optional progress channel, advanced once per device
             
         Returns:
             List of all BackupRecord objects
@@ -103,12 +106,19 @@ class BackupManager:
         
         all_records = []
         completed = 0
+        if progress:
+            progress.set_total(len(devices))
         
         for device in devices:
+            if progress:
+                progress.set_message(f"Backing up {device.ip_address}...")
+            
             records = self.backup_device(device, config_types)
             all_records.extend(records)
             
             completed += 1
+            if progress:
+                progress.advance()
             if progress_callback:
                 progress_callback(completed, len(devices))
         
@@ -0,0 +1,179 @@
+"""
+Command Cache
+Short-lived cache of read-only command output per device
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+
+# Read-only command prefixes that may be cached, with their TTL in seconds.
+# Only slowly changing inventory and neighbor data: running configuration
+# (backups must be current) and live state such as counters, CPU, memory,
+# routes and ARP/MAC tables are deliberately absent.
+DEFAULT_COMMAND_TTLS = {
+    'show version': 300,
+    'show inventory': 300,
+    'show module': 300,
+    'show cdp neighbors': 60,
+    'show lldp neighbors': 60,
+    'show ip interface brief': 30,
+    'show ipv6 interface brief': 30,
+}
+
+
+# Commands that never change device state; anything else (configuration,
+# clear, terminal settings, reload...) invalidates the device's cached output
+READ_ONLY_VERBS = ('show', 'display', 'ping', 'traceroute', 'tracert', 'dir', 'more')
+
+
+def is_read_only(command: str) -> bool:
+    """True if a command cannot change device state"""
+    words = command.split()
+    return bool(words) and words[0].lower() in READ_ONLY_VERBS
+
+
+def normalize_command(command: str) -> str:
+    """Command with runs of whitespace collapsed, as used for cache keys"""
+    return ' '.join(command.split())
+
+
+class CommandCache:
+    """
+    LRU cache of command output keyed by device and normalized command.
+
+    Only commands starting with a whitelisted read-only prefix are cached,
+    each for its prefix's TTL (the longest matching prefix wins). The
+    cache is bounded by the total size of the cached output; the least
+    recently used entries are evicted first. Thread-safe.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, ttls: Optional[Dict[str, float]] = None):
+        self.max_bytes = max_bytes
+        self.ttls = {
+            normalize_command(prefix).lower(): ttl
+            for prefix, ttl in (DEFAULT_COMMAND_TTLS if ttls is None else ttls).items()
+        }
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, str, int]]' = OrderedDict()
+        self._by_device: Dict[str, Set[Tuple[str, str]]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def ttl(self, command: str) -> float:
+        """
+        Seconds a command's output may be cached.
+
+        Returns:
+            TTL of the longest matching whitelisted prefix, or 0 if the
+            command is not cacheable
+        """
+        command = normalize_command(command).lower()
+        best, best_ttl = -1, 0
+        for prefix, ttl in self.ttls.items():
+            if len(prefix) > best and (command == prefix or command.startswith(prefix + ' ')):
+                best, best_ttl = len(prefix), ttl
+        return best_ttl
+
+    def get(self, ip: str, command: str, now: Optional[float] = None) -> Optional[str]:
+        """
+        Cached output of a command.
+
+        Lookups of commands that are never cached are not counted, so the
+        hit rate reflects only commands the cache could have served.
+
+        Returns:
+            Output, or None on a miss
+        """
+        if self.ttl(command) <= 0:
+            return None
+
+        key = (ip, normalize_command(command))
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._remove(key)
+                self._stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def put(self, ip: str, command: str, output: str, now: Optional[float] = None) -> bool:
+        """
+        Cache a command's output if the command is cacheable.
+
+        Returns:
+            bool: True if cached
+        """
+        ttl = self.ttl(command)
+        size = len(output.encode('utf-8', errors='replace'))
+        if ttl <= 0 or size > self.max_bytes:
+            return False
+
+        key = (ip, normalize_command(command))
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+            self._entries[key] = (now + ttl, output, size)
+            self._by_device.setdefault(ip, set()).add(key)
+            self._bytes += size
+        return True
+
+    def invalidate(self, ip: Optional[str] = None) -> None:
+        """
+        Drop cached output of one device, or of all devices.
+
+        Args:
+            ip: Device IP (None drops everything)
+        """
+        with self._lock:
+            if ip is None:
+                self._entries.clear()
+                self._by_device.clear()
+                self._bytes = 0
+            else:
+                for key in list(self._by_device.get(ip, ())):
+                    self._remove(key)
+            self._stats['invalidations'] += 1
+
+    def stats(self) -> Dict:
+        """
+        Cache statistics.
+
+        Returns:
+            Dict with 'entries', 'bytes', 'max_bytes', 'hits', 'misses',
+            'hit_rate', 'evictions' and 'invalidations'
+        """
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                **self._stats,
+            }
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        """Remove one entry (lock held)"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        keys = self._by_device.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_device[key[0]]
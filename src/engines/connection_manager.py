@@ -3,15 +3,36 @@ Connection Manager
 Manages SSH connections to network devices
 """
 
+import concurrent.futures
+import heapq
 import logging
-from typing import Dict, Optional, List
+import random
+import threading
+import warnings
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, List, Tuple
 from netmiko import ConnectHandler, NetmikoTimeoutException, NetmikoAuthenticationException
+from paramiko.ssh_exception import SSHException
 import time
 
+from engines.command_cache import CommandCache, DEFAULT_COMMAND_TTLS, is_read_only
+from engines.connection_pool import ConnectionPool
+from engines.ssh_banner import host_key_fingerprint
+from engines.timer_wheel import TimerWheel
 from models.device import Device, DeviceStatus
 from utils.credential_manager import CredentialManager
 
 
+# Outcomes of a single connection attempt
+_CONNECTED = 'connected'
+_RETRY = 'retry'
+_FAILED = 'failed'
+
+# connect_many re-checks for a free slot at least this often (seconds) while
+# devices are due but the pool is full, as slots can be freed elsewhere
+SLOT_POLL_INTERVAL = 1.0
+
+
 class ConnectionManager:
     """Manages connections to network devices"""
     
@@ -22,44 +43,248 @@ class ConnectionManager:
         'HP': 'hp_procurve',
         'Huawei': 'huawei',
         'MikroTik': 'mikrotik_routeros',
-        'Aruba': 'aruba_os'
+        'Aruba': 'aruba_os',
+        'Arista': 'arista_eos',
+        'Fortinet': 'fortinet'
     }
     
     def __init__(self, config: dict):
         self.logger = logging.getLogger(__name__)
         self.config = config
-        self.credential_manager = CredentialManager()
-        self.connections: Dict[str, ConnectHandler] = {}
+        self.credential_manager = CredentialManager(
+            cache_ttl=config.get('security', {}).get('credential_cache_ttl', 300)
+        )
+        self.host_keys: Dict[str, str] = {}  # IP -> SSH host key fingerprint
         self.default_timeout = config.get('network', {}).get('default_timeout', 10)
         self.retry_attempts = config.get('network', {}).get('retry_attempts', 3)
         self.retry_delay = config.get('network', {}).get('retry_delay', 2)
+        self.retry_max_delay = config.get('network', {}).get('retry_max_delay', 30)
+        # SSH keepalive interval, and idle time after which a session is
+        # probed before use; busier sessions are trusted on transport state
+        self.keepalive_interval = config.get('network', {}).get('keepalive_interval', 30)
+        self.health_probe_idle = config.get('network', {}).get('health_probe_idle', 60)
+        # Seconds to wait for a free slot when every pooled session is busy
+        self.pool_timeout = config.get('network', {}).get('pool_timeout', 60)
+        self.pool = ConnectionPool(
+            max_connections=config.get('network', {}).get('max_concurrent_connections', 50),
+            on_evict=self._close_evicted,
+            evict_idle=config.get('network', {}).get('pool_evict_idle', False)
+        )
+        # Idle sessions are closed after session_timeout; sessions kept open
+        # get an in-band keepalive so the device does not drop the vty line
+        self.session_idle_ttl = config.get('security', {}).get('session_timeout', 3600)
+        self.session_keepalive = config.get('network', {}).get('session_keepalive', 240)
+        self._timers = TimerWheel(tick=1.0, slots=512, now=time.monotonic())
+        self._maintenance_lock = threading.Lock()
+        self._maintenance_stop = threading.Event()
+        self._maintenance_thread: Optional[threading.Thread] = None
+        # Output of read-only commands, shared by all workflows
+        self.command_cache = CommandCache(
+            max_bytes=config.get('network', {}).get('command_cache_max_bytes', 8 * 1024 * 1024),
+            ttls={**DEFAULT_COMMAND_TTLS, **config.get('network', {}).get('command_cache_ttls', {})}
+        )
+    
+    @property
+    def connections(self) -> Dict[str, ConnectHandler]:
+        """Snapshot of open connections by device IP"""
+        return self.pool.snapshot()
     
     def connect(self, device: Device) -> bool:
         """
         Establish SSH connection to a device.
         
+        The session takes one of the pool's max_concurrent_connections
+        slots. When all are taken, the call queues (first come, first
+        served) for up to pool_timeout seconds until a session is closed.
+        With network.pool_evict_idle, the least recently used idle session
+        is closed to make room instead.
+        
         Args:
             device: Device object to connect to
             
         Returns:
             bool: True if connection successful
         """
-        if device.ip_address in self.connections:
-            self.logger.info(f"Connection to {device.ip_address} already exists")
-            return True
+        for attempt in range(1, self.retry_attempts + 1):
+            outcome = self._attempt_connect(device, attempt)
+            if outcome != _RETRY:
+                return outcome == _CONNECTED
+            
+            # Wait before retry
+            if attempt < self.retry_attempts:
+                time.sleep(self.retry_delay)
         
-        if not device.credential_name:
-            self.logger.error(f"No credentials specified for {device.ip_address}")
-            return False
+        self.logger.error(f"Failed to connect to {device.ip_address} after {self.retry_attempts} attempts")
+        return False
+    
+    def connect_many(
+        self,
+        devices: Iterable[Device],
+        max_workers: Optional[int] = None
+    ) -> Iterator[Tuple[Device, bool]]:
+        """
+        Connect to many devices concurrently, yielding each outcome as it is known.
         
-        # Get credentials
-        credentials = self.credential_manager.get_credential(device.credential_name)
-        if not credentials:
-            self.logger.error(f"Credentials '{device.credential_name}' not found")
-            return False
+        Attempts run on a thread pool no larger than the connection pool.
+        A pool slot is reserved before an attempt is handed to a worker,
+        so workers never queue for slots: while the pool is full, due
+        devices stay on the schedule, and only fail once no slot has
+        freed up for pool_timeout seconds. A failed attempt is not
+        retried by a sleeping thread: it goes back on the schedule,
+        ordered by due time, with exponential backoff from retry_delay
+        (doubling per attempt up to retry_max_delay) and random jitter so
+        retries to a flapping site do not arrive in lockstep.
+        Authentication failures and missing credentials are not retried.
+        Closing the generator early abandons attempts not yet started.
+        
+        Args:
+            devices: Devices to connect to
+            max_workers: Concurrent attempts (defaults to the pool size)
+            
+        Yields:
+            Tuples of (device, connected), in completion order
+        """
+        devices = list(devices)
+        if not devices:
+            return
         
-        # Determine device type for Netmiko
-        device_type = self._get_netmiko_device_type(device.vendor)
+        # One keyring read per credential set instead of one per device
+        self.credential_manager.prefetch(device.credential_name for device in devices)
+        
+        workers = min(max_workers or self.pool.max_connections, len(devices))
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='connect')
+        # (due time, sequence, device, attempt), ordered by due time
+        schedule: List[Tuple[float, int, Device, int]] = [(0.0, i, d, 1) for i, d in enumerate(devices)]
+        heapq.heapify(schedule)
+        sequence = len(devices)
+        running: Dict[concurrent.futures.Future, Tuple[Device, int]] = {}
+        starved_since = None  # When due devices started waiting for a pool slot
+        
+        try:
+            while schedule or running:
+                now = time.monotonic()
+                while schedule and schedule[0][0] <= now and self.pool.reserve(timeout=0):
+                    _, _, device, attempt = heapq.heappop(schedule)
+                    future = executor.submit(self._attempt_connect, device, attempt, True)
+                    running[future] = (device, attempt)
+                    starved_since = None
+                
+                if schedule and schedule[0][0] <= now:
+                    starved_since = now if starved_since is None else starved_since
+                    remaining = starved_since + self.pool_timeout - now
+                    if remaining <= 0:
+                        starved_since = None
+                        while schedule and schedule[0][0] <= now:
+                            _, _, device, _ = heapq.heappop(schedule)
+                            self.logger.error(
+                                f"No free connection slot for {device.ip_address} "
+                                f"({self.pool.max_connections} sessions busy for {self.pool_timeout}s)"
+                            )
+                            yield device, False
+                        continue
+                    timeout = min(remaining, SLOT_POLL_INTERVAL)
+                else:
+                    starved_since = None
+                    timeout = max(0.0, schedule[0][0] - now) if schedule else None
+                
+                if running:
+                    done, _ = concurrent.futures.wait(
+                        running, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                else:
+                    # Nothing in flight: wake early if another thread frees a slot
+                    self.pool.wait_for_change(timeout)
+                    done = set()
+                
+                for future in done:
+                    device, attempt = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Error connecting to {device.ip_address}: {e}")
+                        outcome = _FAILED
+                    
+                    if outcome == _RETRY and attempt < self.retry_attempts:
+                        delay = self._backoff_delay(attempt)
+                        self.logger.info(f"Retrying {device.ip_address} in {delay:.1f}s")
+                        heapq.heappush(schedule, (time.monotonic() + delay, sequence, device, attempt + 1))
+                        sequence += 1
+                        continue
+                    
+                    if outcome == _RETRY:
+                        self.logger.error(
+                            f"Failed to connect to {device.ip_address} after {self.retry_attempts} attempts"
+                        )
+                    yield device, outcome == _CONNECTED
+        
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """
+        Seconds before retry number `attempt` (equal jitter).
+        
+        Half of the exponential delay is fixed and half random, so retries
+        keep a minimum spacing but spread out.
+        """
+        delay = min(self.retry_max_delay, self.retry_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    def _attempt_connect(self, device: Device, attempt: int = 1, reserved: bool = False) -> str:
+        """
+        Make one connection attempt.
+        
+        Concurrent attempts for one device are serialized on its lock, so
+        only one opens a session.
+        
+        Args:
+            device: Device to connect to
+            attempt: Attempt number, for logging
+            reserved: The caller already reserved a pool slot for this
+                      attempt; it is released unless a session is opened
+        
+        Returns:
+            _CONNECTED, _RETRY (timeout or transient error) or _FAILED
+        """
+        with self.pool.device_lock(device.ip_address):
+            try:
+                if device.ip_address in self.pool:
+                    self.logger.info(f"Connection to {device.ip_address} already exists")
+                    return _CONNECTED
+                
+                if not device.credential_name:
+                    self.logger.error(f"No credentials specified for {device.ip_address}")
+                    return _FAILED
+                
+                # Get credentials
+                credentials = self.credential_manager.get_credential(device.credential_name)
+                if not credentials:
+                    self.logger.error(f"Credentials '{device.credential_name}' not found")
+                    return _FAILED
+                
+                if not reserved:
+                    if not self.pool.reserve(timeout=self.pool_timeout):
+                        self.logger.error(
+                            f"No free connection slot for {device.ip_address} "
+                            f"({self.pool.max_connections} sessions busy for {self.pool_timeout}s)"
+                        )
+                        return _FAILED
+                    reserved = True
+                
+                outcome = self._open_session(device, credentials, attempt)
+                if outcome == _CONNECTED:
+                    reserved = False  # The slot now holds the session
+                return outcome
+            
+            finally:
+                # The slot is only consumed by a session added to the pool
+                if reserved:
+                    self.pool.release_reservation()
+    
+    def _open_session(self, device: Device, credentials: Dict, attempt: int) -> str:
+        """Open a session within a reserved pool slot (device lock held)"""
+        # Determine device type for Netmiko (banner fingerprint wins over vendor default)
+        device_type = device.netmiko_device_type or self._get_netmiko_device_type(device.vendor)
         
         # Connection parameters
         connection_params = {
@@ -71,48 +296,47 @@ class ConnectionManager:
             'timeout': device.connection_timeout or self.default_timeout,
             'session_log': None,  # Can be enabled for debugging
             'global_delay_factor': 1,
+            'keepalive': self.keepalive_interval,
         }
         
         # Add enable password if available
         if credentials.get('enable_password'):
             connection_params['secret'] = credentials['enable_password']
         
-        # Attempt connection with retries
-        for attempt in range(1, self.retry_attempts + 1):
-            try:
-                self.logger.info(f"Connecting to {device.ip_address} (attempt {attempt}/{self.retry_attempts})...")
-                
-                connection = ConnectHandler(**connection_params)
-                
-                # Enter enable mode if Cisco device
-                if device.vendor == 'Cisco' and credentials.get('enable_password'):
-                    connection.enable()
-                
-                self.connections[device.ip_address] = connection
-                device.update_status(DeviceStatus.CONNECTED)
-                
-                self.logger.info(f"Successfully connected to {device.ip_address}")
-                return True
+        try:
+            self.logger.info(f"Connecting to {device.ip_address} (attempt {attempt}/{self.retry_attempts})...")
             
-            except NetmikoTimeoutException as e:
-                self.logger.warning(f"Timeout connecting to {device.ip_address}: {e}")
-                device.update_status(DeviceStatus.UNREACHABLE)
-                
-            except NetmikoAuthenticationException as e:
-                self.logger.error(f"Authentication failed for {device.ip_address}: {e}")
-                device.update_status(DeviceStatus.ERROR)
-                return False  # Don't retry on auth errors
+            connection = ConnectHandler(**connection_params)
             
-            except Exception as e:
-                self.logger.error(f"Error connecting to {device.ip_address}: {e}")
-                device.update_status(DeviceStatus.ERROR)
+            # Enter enable mode if Cisco device
+            if device.vendor == 'Cisco' and credentials.get('enable_password'):
+                connection.enable()
             
-            # Wait before retry
-            if attempt < self.retry_attempts:
-                time.sleep(self.retry_delay)
+            host_key = self._host_key_fingerprint(connection)
+            if host_key:
+                device.ssh_host_key = host_key
+                self.host_keys[device.ip_address] = host_key
+            device.update_status(DeviceStatus.CONNECTED)
+            self.pool.add(device.ip_address, connection, device)
+            self._track_session(device.ip_address)
+            
+            self.logger.info(f"Successfully connected to {device.ip_address}")
+            return _CONNECTED
         
-        self.logger.error(f"Failed to connect to {device.ip_address} after {self.retry_attempts} attempts")
-        return False
+        except NetmikoTimeoutException as e:
+            self.logger.warning(f"Timeout connecting to {device.ip_address}: {e}")
+            device.update_status(DeviceStatus.UNREACHABLE)
+            return _RETRY
+        
+        except NetmikoAuthenticationException as e:
+            self.logger.error(f"Authentication failed for {device.ip_address}: {e}")
+            device.update_status(DeviceStatus.ERROR)
+            return _FAILED  # Don't retry on auth errors
+        
+        except Exception as e:
+            self.logger.error(f"Error connecting to {device.ip_address}: {e}")
+            device.update_status(DeviceStatus.ERROR)
+            return _RETRY
     
     def disconnect(self, device: Device) -> bool:
         """
@@ -124,14 +348,19 @@ class ConnectionManager:
         Returns:
             bool: True if successful
         """
-        if device.ip_address not in self.connections:
+        # Waits for any workflow still using the session to finish
+        with self.pool.device_lock(device.ip_address):
+            connection = self.pool.remove(device.ip_address)
+        self._untrack_session(device.ip_address)
+        
+        if connection is None:
             self.logger.warning(f"No active connection to {device.ip_address}")
             return False
         
+        self.host_keys.pop(device.ip_address, None)
+        
         try:
-            connection = self.connections[device.ip_address]
             connection.disconnect()
-            del self.connections[device.ip_address]
             
             device.update_status(DeviceStatus.DISCONNECTED)
             self.logger.info(f"Disconnected from {device.ip_address}")
@@ -145,35 +374,63 @@ class ConnectionManager:
         """Disconnect from all devices"""
         self.logger.info("Disconnecting from all devices...")
         
-        for ip in list(self.connections.keys()):
+        for ip, connection in self.pool.clear():
+            self._untrack_session(ip)
             try:
-                self.connections[ip].disconnect()
+                connection.disconnect()
                 self.logger.info(f"Disconnected from {ip}")
             except Exception as e:
                 self.logger.error(f"Error disconnecting from {ip}: {e}")
         
-        self.connections.clear()
+        self.host_keys.clear()
+    
+    @contextmanager
+    def checkout(self, device: Device, timeout: Optional[float] = None) -> Iterator[Optional[ConnectHandler]]:
+        """
+        Hold a device's session for exclusive use; it is checked back in
+        when the block exits.
+        
+        Dead sessions are detected from their transport state, without a
+        round trip to the device (see _is_healthy), and dropped. Re-entrant
+        within one thread, so execute_command can be called inside.
+        
+        Args:
+            device: Device object
+            timeout: Seconds to wait for another workflow to finish with
+                     the device (None waits indefinitely)
+            
+        Yields:
+            ConnectHandler instance, or None if the device has no live
+            session or the wait timed out
+        """
+        with self.pool.checkout(device.ip_address, timeout) as connection:
+            if connection is not None and not self._is_healthy(device.ip_address, connection):
+                # Connection dead, remove it
+                self._discard_session(device.ip_address, device)
+                connection = None
+            yield connection
     
     def get_connection(self, device: Device) -> Optional[ConnectHandler]:
         """
         Get active connection for a device.
         
+        Deprecated: the connection is returned after the device lock is
+        released, so using it can interleave with other workflows. Use
+        checkout() or execute_command() instead.
+        
         Args:
             device: Device object
             
         Returns:
             ConnectHandler instance or None
         """
-        connection = self.connections.get(device.ip_address)
-        
-        if connection and self._is_connection_alive(connection):
+        warnings.warn(
+            "ConnectionManager.get_connection() is deprecated, use checkout()",
+            DeprecationWarning,
+            stacklevel=2
+        )
+        with self.checkout(device) as connection:
             return connection
-        
-        # Connection dead, remove it
-        if device.ip_address in self.connections:
-            del self.connections[device.ip_address]
-        
-        return None
     
     def is_connected(self, device: Device) -> bool:
         """
@@ -185,67 +442,95 @@ class ConnectionManager:
         Returns:
             bool: True if connected
         """
-        return device.ip_address in self.connections
+        return device.ip_address in self.pool
     
     def execute_command(
         self,
         device: Device,
         command: str,
-        timeout: Optional[int] = None
+        timeout: Optional[int] = None,
+        use_cache: bool = True
     ) -> tuple[bool, str]:
         """
         Execute a command on a device.
         
+        The device's session is checked out for the duration of the
+        command, so commands from different workflows never interleave on
+        one channel.
+        
+        Output of whitelisted read-only commands (see CommandCache) is
+        reused for a short per-command TTL, so workflows asking for the
+        same 'show' output within seconds share one round trip. Any
+        command that may change device state clears the device's cache.
+        
         Args:
             device: Device to execute command on
             command: Command to execute
             timeout: Command timeout (uses default if None)
+            use_cache: Set False to always run the command on the device
             
         Returns:
             Tuple of (success, output)
         """
-        connection = self.get_connection(device)
-        
-        if not connection:
-            self.logger.error(f"No active connection to {device.ip_address}")
-            return False, "No active connection"
+        if use_cache and device.ip_address in self.pool:
+            output = self.command_cache.get(device.ip_address, command)
+            if output is not None:
+                self.logger.debug(f"Using cached output of '{command}' on {device.ip_address}")
+                return True, output
         
-        try:
-            self.logger.debug(f"Executing command on {device.ip_address}: {command}")
+        with self.checkout(device) as connection:
+            if not connection:
+                self.logger.error(f"No active connection to {device.ip_address}")
+                return False, "No active connection"
             
-            output = connection.send_command(
-                command,
-                read_timeout=timeout or self.default_timeout
-            )
+            try:
+                self.logger.debug(f"Executing command on {device.ip_address}: {command}")
+                
+                output = connection.send_command(
+                    command,
+                    read_timeout=timeout or self.default_timeout
+                )
+                self.pool.mark_io(device.ip_address)
+                
+                if not is_read_only(command):
+                    self.command_cache.invalidate(device.ip_address)
+                elif use_cache:
+                    self.command_cache.put(device.ip_address, command, output)
+                
+                return True, output
             
-            return True, output
-        
-        except Exception as e:
-            self.logger.error(f"Error executing command on {device.ip_address}: {e}")
-            return False, str(e)
+            except Exception as e:
+                self.logger.error(f"Error executing command on {device.ip_address}: {e}")
+                # A slow command is not a dead session; a closed transport is
+                if not self._transport_active(connection):
+                    self._discard_session(device.ip_address, device)
+                return False, str(e)
     
     def execute_commands(
         self,
         device: Device,
         commands: List[str],
-        timeout: Optional[int] = None
+        timeout: Optional[int] = None,
+        use_cache: bool = True
     ) -> List[tuple[str, bool, str]]:
         """
-        Execute multiple commands on a device.
+        Execute multiple commands on a device, holding it for the whole batch.
         
         Args:
             device: Device to execute commands on
             commands: List of commands
             timeout: Command timeout
+            use_cache: Set False to bypass the command output cache
             
         Returns:
             List of tuples (command, success, output)
         """
         results = []
         
-        for command in commands:
-            success, output = self.execute_command(device, command, timeout)
-            results.append((command, success, output))
+        with self.pool.checkout(device.ip_address):
+            for command in commands:
+                success, output = self.execute_command(device, command, timeout, use_cache)
+                results.append((command, success, output))
         
         return results
     
@@ -264,27 +549,293 @@ class ConnectionManager:
         
         return self.DEVICE_TYPE_MAP.get(vendor, 'cisco_ios')
     
-    def _is_connection_alive(self, connection: ConnectHandler) -> bool:
+    def _host_key_fingerprint(self, connection: ConnectHandler) -> Optional[str]:
         """
-        Check if a connection is still alive.
+        SHA256 fingerprint of the device's SSH host key, as shown by ssh-keygen.
         
         Args:
+            connection: Established connection
+            
+        Returns:
+            'SHA256:...' string, or None if the key is not available
+        """
+        try:
+            return host_key_fingerprint(connection.remote_conn.get_transport().get_remote_server_key())
+        except Exception as e:
+            self.logger.debug(f"Could not read SSH host key: {e}")
+            return None
+    
+    def _transport_active(self, connection: ConnectHandler) -> bool:
+        """
+        Check the SSH transport without touching the network.
+        
+        Paramiko marks the transport inactive as soon as its reader thread
+        sees the connection close or an SSH keepalive go unanswered, so
+        this is a few attribute reads.
+        
+        Returns:
+            bool: False if the session is known to be closed
+        """
+        channel = getattr(connection, 'remote_conn', None)
+        if channel is None:
+            return False
+        if not hasattr(channel, 'get_transport'):
+            return True  # Telnet/serial sessions have no transport state to read
+        if getattr(channel, 'closed', False):
+            return False
+        transport = channel.get_transport()
+        return transport is not None and transport.is_active()
+    
+    def _is_healthy(self, ip: str, connection: ConnectHandler) -> bool:
+        """
+        Check if a connection is still usable.
+        
+        The transport state is always checked. Only sessions with no
+        successful exchange for health_probe_idle seconds are also probed,
+        by writing a null byte, which does not wait for a prompt and so
+        does not mistake a slow device for a dead one.
+        
+        Args:
+            ip: Device IP
             connection: Connection to check
             
         Returns:
             bool: True if alive
         """
-        try:
-            # Send a simple command to check connectivity
-            connection.send_command("", read_timeout=2, expect_string=r"#|>")
+        if not self._transport_active(connection):
+            return False
+        
+        session = self.pool.session(ip)
+        if session is None or time.monotonic() - session.last_io < self.health_probe_idle:
             return True
-        except:
+        
+        self.pool.count('probes')
+        try:
+            alive = connection.is_alive()
+        except (OSError, EOFError, SSHException) as e:
+            self.logger.debug(f"Health probe of {ip} failed: {e}")
+            alive = False
+        
+        if alive:
+            self.pool.mark_io(ip)
+        else:
+            self.pool.count('probe_failures')
+        return alive
+    
+    def _discard_session(self, ip: str, device: Optional[Device] = None) -> None:
+        """Drop a dead session from the pool and close what is left of it"""
+        connection = self.pool.remove(ip)
+        self.host_keys.pop(ip, None)
+        self._untrack_session(ip)
+        # The device may have reloaded
+        self.command_cache.invalidate(ip)
+        if connection is None:
+            return
+        
+        self.logger.warning(f"Connection to {ip} was lost")
+        self.pool.count('dead_sessions')
+        if device is not None:
+            device.update_status(DeviceStatus.DISCONNECTED)
+        try:
+            connection.disconnect()
+        except Exception as e:
+            self.logger.debug(f"Error closing lost connection to {ip}: {e}")
+    
+    def _close_evicted(self, ip: str, connection: ConnectHandler, device: Optional[Device]) -> None:
+        """Close an idle session the pool dropped to make room for another"""
+        self.logger.info(f"Closing idle connection to {ip} to stay within the connection limit")
+        self.host_keys.pop(ip, None)
+        self._untrack_session(ip)
+        if device is not None:
+            device.update_status(DeviceStatus.DISCONNECTED)
+        try:
+            connection.disconnect()
+        except Exception as e:
+            self.logger.debug(f"Error closing idle connection to {ip}: {e}")
+    
+    def _track_session(self, ip: str) -> None:
+        """Start idle and keepalive timers for a new session"""
+        now = time.monotonic()
+        if self.session_idle_ttl:
+            self._timers.schedule(('reap', ip), now + self.session_idle_ttl)
+        if self.session_keepalive:
+            self._timers.schedule(('keepalive', ip), now + self.session_keepalive)
+        self._ensure_maintenance()
+    
+    def _untrack_session(self, ip: str) -> None:
+        """Cancel a closed session's timers"""
+        self._timers.cancel(('reap', ip))
+        self._timers.cancel(('keepalive', ip))
+    
+    def _ensure_maintenance(self) -> None:
+        """Start the maintenance thread if it is not running"""
+        with self._maintenance_lock:
+            if self._maintenance_thread is None and not self._maintenance_stop.is_set():
+                self._maintenance_thread = threading.Thread(
+                    target=self._maintenance_loop, name='session-maintenance', daemon=True
+                )
+                self._maintenance_thread.start()
+    
+    def _maintenance_loop(self) -> None:
+        """Run session maintenance every tick while any session has timers"""
+        while not self._maintenance_stop.wait(self._timers.tick):
+            try:
+                self.run_maintenance()
+            except Exception as e:
+                self.logger.error(f"Error during session maintenance: {e}")
+            
+            with self._maintenance_lock:
+                if not len(self._timers):
+                    self._maintenance_thread = None
+                    return
+    
+    def stop_maintenance(self) -> None:
+        """Stop the maintenance thread (e.g. on shutdown)"""
+        self._maintenance_stop.set()
+        with self._maintenance_lock:
+            thread, self._maintenance_thread = self._maintenance_thread, None
+        if thread is not None:
+            thread.join()
+    
+    def run_maintenance(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Reap idle sessions and send due keepalives.
+        
+        Timers live on one timing wheel. Using a session does not touch
+        the wheel: when a timer fires, the session's real last-use and
+        last-IO times are checked and the timer is pushed back if the
+        session was active since, so the command path stays lock-free.
+        
+        A session idle for session_timeout seconds is closed unless it is
+        checked out. Any other session that has been silent for
+        session_keepalive seconds gets an in-band keepalive (a null byte
+        on the channel), which also resets the device's exec timeout. A
+        session due to be reaped before its next keepalive gets none.
+        
+        Args:
+            now: Current monotonic time (defaults to time.monotonic())
+            
+        Returns:
+            Dict with the number of sessions 'reaped' and 'keepalives' sent
+        """
+        now = time.monotonic() if now is None else now
+        done = {'reaped': 0, 'keepalives': 0}
+        
+        for kind, ip in self._timers.advance(now):
+            session = self.pool.session(ip)
+            if session is None:
+                continue
+            
+            if kind == 'reap':
+                due = session.last_used + self.session_idle_ttl
+                if due > now or session.in_use:
+                    self._timers.schedule(('reap', ip), max(due, now + self._timers.tick))
+                elif self._reap_session(ip, now):
+                    done['reaped'] += 1
+                else:
+                    self._timers.schedule(('reap', ip), now + self._timers.tick)
+                continue
+            
+            due = session.last_io + self.session_keepalive
+            reap_due = session.last_used + self.session_idle_ttl if self.session_idle_ttl else None
+            if due > now:
+                self._timers.schedule(('keepalive', ip), due)
+            elif reap_due is not None and reap_due <= now + self.session_keepalive:
+                # Not worth keeping up; look again if it is used before then
+                self._timers.schedule(('keepalive', ip), reap_due)
+            elif self._send_keepalive(ip):
+                done['keepalives'] += 1
+                self._timers.schedule(('keepalive', ip), now + self.session_keepalive)
+        
+        return done
+    
+    def _reap_session(self, ip: str, now: float) -> bool:
+        """Close an idle session unless a workflow has just picked it up"""
+        lock = self.pool.device_lock(ip)
+        if not lock.acquire(blocking=False):
             return False
+        
+        try:
+            session = self.pool.session(ip)
+            if session is None or session.in_use or session.last_used + self.session_idle_ttl > now:
+                return False
+            connection = self.pool.remove(ip)
+        finally:
+            lock.release()
+        
+        self.host_keys.pop(ip, None)
+        self._untrack_session(ip)
+        self.pool.count('reaped')
+        self.logger.info(f"Closing connection to {ip} after {self.session_idle_ttl}s idle")
+        if session.device is not None:
+            session.device.update_status(DeviceStatus.DISCONNECTED)
+        try:
+            connection.disconnect()
+        except Exception as e:
+            self.logger.debug(f"Error closing idle connection to {ip}: {e}")
+        return True
+    
+    def _send_keepalive(self, ip: str) -> bool:
+        """
+        Keep an idle session open.
+        
+        Returns:
+            bool: True if sent; False if the device was busy (it needs no
+            keepalive then) or the session turned out to be dead
+        """
+        lock = self.pool.device_lock(ip)
+        if not lock.acquire(blocking=False):
+            self._timers.schedule(('keepalive', ip), time.monotonic() + self.session_keepalive)
+            return False
+        
+        try:
+            session = self.pool.session(ip)
+            if session is None:
+                return False
+            try:
+                alive = session.connection.is_alive()
+            except (OSError, EOFError, SSHException) as e:
+                self.logger.debug(f"Keepalive to {ip} failed: {e}")
+                alive = False
+            
+            if alive:
+                self.pool.mark_io(ip)
+                self.pool.count('keepalives')
+                return True
+            
+            self.pool.count('keepalive_failures')
+            self._discard_session(ip, session.device)
+            return False
+        finally:
+            lock.release()
     
     def get_active_connections_count(self) -> int:
         """Get number of active connections"""
-        return len(self.connections)
+        return len(self.pool)
+    
+    def get_pool_stats(self) -> Dict:
+        """Connection pool statistics (see ConnectionPool.stats)"""
+        return self.pool.stats()
+    
+    def get_command_cache_stats(self) -> Dict:
+        """Command output cache statistics (see CommandCache.stats)"""
+        return self.command_cache.stats()
     
     def get_connected_devices(self) -> List[str]:
-        """Get list of connected device IPs"""
-        return list(self.connections.keys())
+        """
+        Get list of connected device IPs, one per physical device.
+        
+        Connections to several addresses of the same device (same SSH host
+        key) are listed once, under the first address connected, so
+        backups and diagnostics run once per device.
+        """
+        seen_keys = set()
+        ips = []
+        for ip in self.pool.ips():
+            host_key = self.host_keys.get(ip)
+            if host_key:
+                if host_key in seen_keys:
+                    continue
+                seen_keys.add(host_key)
+            ips.append(ip)
+        return ips
@@ -0,0 +1,301 @@
+"""
+Connection Pool
+Bounded, thread-safe bookkeeping of open device sessions
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+
+@dataclass
+class PooledSession:
+    """An open session and its usage"""
+    connection: Any
+    device: Any = None
+    opened: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    last_io: float = field(default_factory=time.monotonic)  # Last successful exchange with the device
+    in_use: int = 0  # Threads currently holding it checked out
+
+
+class ConnectionPool:
+    """
+    Open sessions keyed by device address, capped at max_connections.
+
+    Each device has its own re-entrant lock: a session is only used while
+    checked out, so two workflows never interleave commands on one
+    channel, while different devices are worked on in parallel. Opening a
+    session first reserves a slot. When the pool is full, reservations
+    wait in arrival order for a session to be removed. With evict_idle,
+    the least recently used session that nobody has checked out is
+    closed to make room instead, and only busy pools make callers wait.
+
+    The pool never talks to devices itself: sessions it evicts are handed
+    to the on_evict callback to be closed outside the pool lock.
+    """
+
+    def __init__(self, max_connections: int = 50, on_evict=None, evict_idle: bool = False):
+        self.max_connections = max(1, max_connections)
+        self.on_evict = on_evict
+        self.evict_idle = evict_idle
+
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._waiters: deque = deque()
+        self._sessions: Dict[str, PooledSession] = {}
+        self._device_locks: Dict[str, threading.RLock] = {}
+        self._reserved = 0
+
+        self._stats = {
+            'opened': 0,
+            'closed': 0,
+            'evicted': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_timeouts': 0,
+            'wait_time': 0.0,
+            'peak_open': 0,
+            'probes': 0,
+            'probe_failures': 0,
+            'dead_sessions': 0,
+            'reopened': 0,
+            'reaped': 0,
+            'keepalives': 0,
+            'keepalive_failures': 0,
+        }
+        self._seen: Set[str] = set()  # Devices that have had a session
+
+    def __contains__(self, ip: str) -> bool:
+        return ip in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def ips(self) -> List[str]:
+        """Addresses with an open session, in the order they were opened"""
+        with self._lock:
+            return list(self._sessions)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Dict of address -> connection for every open session"""
+        with self._lock:
+            return {ip: session.connection for ip, session in self._sessions.items()}
+
+    def get(self, ip: str) -> Optional[Any]:
+        """Connection of a device without checking it out, or None"""
+        session = self._sessions.get(ip)
+        return session.connection if session else None
+
+    def session(self, ip: str) -> Optional[PooledSession]:
+        """Bookkeeping of a device's open session, or None"""
+        return self._sessions.get(ip)
+
+    def mark_io(self, ip: str) -> None:
+        """Record a successful exchange with a device"""
+        session = self._sessions.get(ip)
+        if session is not None:
+            session.last_io = time.monotonic()
+
+    def count(self, stat: str, amount: int = 1) -> None:
+        """Add to a running total reported by stats()"""
+        with self._lock:
+            self._stats[stat] = self._stats.get(stat, 0) + amount
+
+    def device_lock(self, ip: str) -> threading.RLock:
+        """Lock serializing all work on one device"""
+        with self._lock:
+            lock = self._device_locks.get(ip)
+            if lock is None:
+                lock = self._device_locks[ip] = threading.RLock()
+            return lock
+
+    def reserve(self, timeout: Optional[float] = None) -> bool:
+        """
+        Reserve a slot for a session about to be opened.
+
+        Follow with add() once the session is open, or with
+        release_reservation() if opening fails.
+
+        Args:
+            timeout: Seconds to wait for a slot (None waits indefinitely)
+
+        Returns:
+            bool: True if a slot was reserved
+        """
+        victim = None
+        started = time.monotonic()
+        ticket = object()
+
+        with self._lock:
+            self._waiters.append(ticket)
+            waited = False
+            try:
+                while True:
+                    if self._waiters[0] is ticket:
+                        if len(self._sessions) + self._reserved < self.max_connections:
+                            break
+                        victim = self._pop_idle() if self.evict_idle else None
+                        if victim is not None:
+                            break
+
+                    remaining = None if timeout is None else timeout - (time.monotonic() - started)
+                    if remaining is not None and remaining <= 0:
+                        self._stats['wait_timeouts'] += 1
+                        return False
+
+                    if not waited:
+                        waited = True
+                        self._stats['waits'] += 1
+                    self._slot_freed.wait(remaining)
+
+                self._reserved += 1
+            finally:
+                self._waiters.remove(ticket)
+                if waited:
+                    self._stats['wait_time'] += time.monotonic() - started
+                # The next waiter may now be at the head of the queue
+                self._slot_freed.notify_all()
+
+        if victim is not None and self.on_evict:
+            self.on_evict(*victim)
+        return True
+
+    def wait_for_change(self, timeout: Optional[float]) -> None:
+        """
+        Block until a slot is freed or released, or the timeout passes.
+
+        Args:
+            timeout: Seconds to wait at most (None waits indefinitely)
+        """
+        with self._lock:
+            self._slot_freed.wait(timeout)
+
+    def release_reservation(self) -> None:
+        """Give back a reserved slot whose session could not be opened"""
+        with self._lock:
+            self._reserved -= 1
+            self._slot_freed.notify_all()
+
+    def add(self, ip: str, connection: Any, device: Any = None) -> None:
+        """Turn a reserved slot into an open session"""
+        with self._lock:
+            self._reserved -= 1
+            self._sessions[ip] = PooledSession(connection, device)
+            self._stats['opened'] += 1
+            if ip in self._seen:
+                self._stats['reopened'] += 1
+            self._seen.add(ip)
+            self._stats['peak_open'] = max(self._stats['peak_open'], len(self._sessions))
+
+    def remove(self, ip: str) -> Optional[Any]:
+        """
+        Forget a device's session, freeing its slot.
+
+        Returns:
+            The connection, for the caller to close, or None
+        """
+        with self._lock:
+            session = self._sessions.pop(ip, None)
+            if session is None:
+                return None
+            self._stats['closed'] += 1
+            self._slot_freed.notify_all()
+            return session.connection
+
+    def clear(self) -> List[Tuple[str, Any]]:
+        """
+        Forget every session.
+
+        Returns:
+            List of (address, connection) for the caller to close
+        """
+        with self._lock:
+            sessions = [(ip, session.connection) for ip, session in self._sessions.items()]
+            self._stats['closed'] += len(sessions)
+            self._sessions.clear()
+            self._slot_freed.notify_all()
+            return sessions
+
+    @contextmanager
+    def checkout(self, ip: str, timeout: Optional[float] = None) -> Iterator[Optional[Any]]:
+        """
+        Hold a device's session for exclusive use.
+
+        Re-entrant: a thread that already holds the device can check it
+        out again, e.g. to run single commands inside a longer workflow.
+
+        Args:
+            ip: Device address
+            timeout: Seconds to wait for another workflow to finish with
+                     the device (None waits indefinitely)
+
+        Yields:
+            The connection, or None if the device has no open session or
+            the wait timed out
+        """
+        lock = self.device_lock(ip)
+        if not lock.acquire(timeout=-1 if timeout is None else timeout):
+            yield None
+            return
+
+        try:
+            with self._lock:
+                session = self._sessions.get(ip)
+                if session is not None:
+                    session.in_use += 1
+                    session.last_used = time.monotonic()
+                    self._stats['checkouts'] += 1
+
+            try:
+                yield session.connection if session else None
+            finally:
+                if session is not None:
+                    with self._lock:
+                        session.in_use -= 1
+                        session.last_used = time.monotonic()
+                        if not session.in_use:
+                            self._slot_freed.notify_all()
+        finally:
+            lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Pool statistics.
+
+        Returns:
+            Dict with 'max', 'open', 'in_use', 'idle', 'reserved' and
+            'waiting' (current state), plus running totals 'opened',
+            'closed', 'evicted', 'checkouts', 'waits', 'wait_timeouts',
+            'wait_time' (seconds spent waiting for slots), 'peak_open',
+            the health check totals 'probes', 'probe_failures' and
+            'dead_sessions', and the churn totals 'reopened' (sessions
+            opened to a device that had one before), 'reaped' (closed
+            for idling), 'keepalives' and 'keepalive_failures'
+        """
+        with self._lock:
+            in_use = sum(1 for session in self._sessions.values() if session.in_use)
+            return {
+                'max': self.max_connections,
+                'open': len(self._sessions),
+                'in_use': in_use,
+                'idle': len(self._sessions) - in_use,
+                'reserved': self._reserved,
+                'waiting': len(self._waiters),
+                **self._stats,
+            }
+
+    def _pop_idle(self) -> Optional[Tuple[str, Any, Any]]:
+        """Remove the least recently used session nobody holds (lock held)"""
+        idle = [(session.last_used, ip) for ip, session in self._sessions.items() if not session.in_use]
+        if not idle:
+            return None
+
+        _, ip = min(idle)
+        session = self._sessions.pop(ip)
+        self._stats['evicted'] += 1
+        self._stats['closed'] += 1
+        return ip, session.connection, session.device
@@ -3,15 +3,46 @@ Discovery Engine
 Network device discovery and identification
 """
 
+import asyncio
+import bisect
 import logging
 import ipaddress
 import concurrent.futures
-from typing import List, Optional, Set
+import heapq
+import itertools
+import queue
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from datetime import datetime
 import subprocess
 import platform
+import time
+from pathlib import Path
 
 from models.device import Device, DeviceStatus, DeviceType
+from engines.icmp_prober import IcmpProber
+from engines.tcp_prober import TcpProber
+from engines.snmp_prober import ENT_PHYSICAL_SERIAL, SnmpProber, SNMP_ENGINE_ID, SYSTEM_OIDS
+from engines.ssh_banner import SshBannerGrabber
+from engines.fingerprints import fingerprint_snmp, fingerprint_ssh_banner, parse_show_version
+from engines.reachability_store import ReachabilityStore
+from engines.rtt_estimator import RttEstimator
+from engines.rate_limiter import ProbeRateLimiter
+from engines.scan_checkpoint import ScanCheckpoint
+from engines.sharded_discovery import default_workers, iter_sharded
+from engines.scan_history import ScanDiff, ScanHistory
+from engines.oui_lookup import OuiDatabase, build_oui_trie, read_local_neighbors
+from engines.topology import TopologyCrawler, TopologyGraph, TopologyStore
+from engines.reverse_dns import DnsCache, ReverseResolver
+from engines.identity import merge_devices
+from utils.ip_ranges import EXCLUDE_PREFIX, IPRangeSet, parse_target, read_target_file, split_targets
+
+
+# Probes past their adaptive timeout may hold 1/LINGER_SHARE of the probe window
+LINGER_SHARE = 8
+
+# Addresses held back by their subnet's rate limit, per probe window slot
+PARKED_PER_SLOT = 16
 
 
 class DiscoveryEngine:
@@ -22,14 +53,91 @@ class DiscoveryEngine:
         self.config = config
         self.max_threads = config.get('discovery', {}).get('max_threads', 100)
         self.ping_timeout = config.get('network', {}).get('ping_timeout', 1)
+        self.max_in_flight = config.get('discovery', {}).get('max_in_flight', 4096)
+        self.icmp_batch_size = config.get('discovery', {}).get('icmp_batch_size', 256)
+        self.methods = config.get('discovery', {}).get('methods', ['icmp'])
+        self.tcp_ports = config.get('discovery', {}).get('tcp_ports', [22, 23, 443, 830, 161])
+        self.tcp_max_concurrency = config.get('discovery', {}).get('tcp_max_concurrency', 4096)
+        self.ssh_port = config.get('network', {}).get('ssh_port', 22)
+        self.snmp_port = config.get('network', {}).get('snmp_port', 161)
+        self.snmp_community = config.get('discovery', {}).get('snmp_community', 'public')
+        self.snmp_version = config.get('discovery', {}).get('snmp_version', '2c')
+        self.snmp_timeout = config.get('discovery', {}).get('snmp_timeout', 2)
+        self.snmp_retries = config.get('discovery', {}).get('snmp_retries', 1)
+        self.snmp_max_concurrency = config.get('discovery', {}).get('snmp_max_concurrency', 1024)
+        self.ssh_banner_timeout = config.get('discovery', {}).get('ssh_banner_timeout', 3)
+        self.ssh_banner_max_concurrency = config.get('discovery', {}).get('ssh_banner_max_concurrency', 1024)
+        self.ssh_host_keys = config.get('discovery', {}).get('ssh_host_keys', True)
+        self.reachability_cache = config.get('discovery', {}).get('reachability_cache', False)
+        self.backoff_base = config.get('discovery', {}).get('backoff_base', 3600)
+        self.backoff_max = config.get('discovery', {}).get('backoff_max', 604800)
+        self.full_sweep_interval = config.get('discovery', {}).get('full_sweep_interval', 604800)
+        self.database_path = config.get('database', {}).get('path', 'config/snatt.db')
+        self.probe_retries = config.get('discovery', {}).get('probe_retries', 0)
+        self.rate_limiter = ProbeRateLimiter(
+            global_rate=config.get('discovery', {}).get('rate_limit', 0),
+            subnet_rate=config.get('discovery', {}).get('subnet_rate_limit', 0),
+            burst=config.get('discovery', {}).get('rate_limit_burst', 16),
+            prefix_v4=config.get('discovery', {}).get('rtt_subnet_prefix', 24)
+        )
+        self.last_scan_summary: Dict = {}
+        self.checkpoint_directory = config.get('discovery', {}).get('checkpoint_directory', 'scans')
+        self.checkpoint_interval = config.get('discovery', {}).get('checkpoint_interval', 5)
+        self.checkpoint_min_addresses = config.get('discovery', {}).get('checkpoint_min_addresses', 65536)
+        self.last_job_id: Optional[str] = None
+        self.workers = config.get('discovery', {}).get('workers', 0)
+        self.exclude = config.get('discovery', {}).get('exclude', [])
+        self.exclude_file = config.get('discovery', {}).get('exclude_file', '')
+        self.scan_history_keep = config.get('discovery', {}).get('scan_history_keep', 365)
+        self._scan_history: Optional[ScanHistory] = None
+        self.oui_registry = config.get('discovery', {}).get('oui_registry', 'data/oui.csv')
+        self.oui_database = config.get('discovery', {}).get('oui_database', 'data/oui.trie')
+        self._oui: Optional[OuiDatabase] = None
+        self._oui_unavailable = False
+        self.reverse_dns = config.get('discovery', {}).get('reverse_dns', True)
+        self.dns_servers = config.get('discovery', {}).get('dns_servers', [])
+        self.dns_timeout = config.get('discovery', {}).get('dns_timeout', 2)
+        self.dns_max_concurrency = config.get('discovery', {}).get('dns_max_concurrency', 256)
+        self.dns_cache = DnsCache(
+            min_ttl=config.get('discovery', {}).get('dns_min_ttl', 60),
+            max_ttl=config.get('discovery', {}).get('dns_max_ttl', 86400)
+        )
+        self.topology_max_sessions = config.get('discovery', {}).get('topology_max_sessions', 8)
+        self.topology_max_depth = config.get('discovery', {}).get('topology_max_depth', 0)
+        self.topology_scope = config.get('discovery', {}).get('topology_scope', [])
+        self._topology_store: Optional[TopologyStore] = None
+        # IP -> MAC entries gathered elsewhere (e.g. 'show arp' in diagnostics)
+        self.neighbor_table: Dict[str, str] = {}
+        self.adaptive_timeouts = config.get('discovery', {}).get('adaptive_timeouts', True)
+        self.rtt_estimator = RttEstimator(
+            initial_timeout=self.ping_timeout,
+            min_timeout=config.get('discovery', {}).get('rtt_min_timeout', 0.05),
+            max_timeout=config.get('discovery', {}).get('rtt_max_timeout', 3),
+            prefix_v4=config.get('discovery', {}).get('rtt_subnet_prefix', 24)
+        )
+        
+        self._reachability_store: Optional[ReachabilityStore] = None
+        self._is_windows = platform.system().lower() == 'windows'
+        self._ping_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._icmp_fallback_logged = False
     
-    def discover_subnet(self, subnet: str, progress_callback=None) -> List[Device]:
+    def discover_subnet(
+        self,
+        subnet: str,
+        progress_callback=None,
+        incremental: bool = False,
+        checkpoint: bool = False
+    ) -> List[Device]:
         """
-        Discover devices in a subnet using ICMP ping.
+        Discover devices in a subnet using the configured probe methods.
         
         Args:
             subnet: Subnet in CIDR notation (e.g., '192.168.1.0/24')
             progress_callback: Optional callback function for progress updates
+            incremental: Probe only addresses the reachability cache says
+                         are due (see iter_discover)
+            checkpoint: Save progress of a large sweep so it can be resumed
+                        (see prepare_scan_job)
             
         Returns:
             List of discovered Device objects
@@ -37,43 +145,10 @@ class DiscoveryEngine:
         self.logger.info(f"Starting discovery for subnet: {subnet}")
         
         try:
-            network = ipaddress.ip_network(subnet, strict=False)
-            hosts = list(network.hosts())
-            total_hosts = len(hosts)
-            
-            self.logger.info(f"Scanning {total_hosts} hosts...")
-            
-            discovered_devices = []
-            
-            # Ping sweep with thread pool
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                future_to_ip = {
-                    executor.submit(self._ping_host, str(ip)): str(ip) 
-                    for ip in hosts
-                }
-                
-                completed = 0
-                for future in concurrent.futures.as_completed(future_to_ip):
-                    completed += 1
-                    ip = future_to_ip[future]
-                    
-                    try:
-                        is_reachable = future.result()
-                        if is_reachable:
-                            device = Device(
-                                ip_address=ip,
-                                status=DeviceStatus.REACHABLE,
-                                last_seen=datetime.now()
-                            )
-                            discovered_devices.append(device)
-                            self.logger.debug(f"Device found: {ip}")
-                    
-                    except Exception as e:
-                        self.logger.error(f"Error checking {ip}: {e}")
-                    
-                    # Progress callback
-                    if progress_callback:
-                        progress_callback(completed, total_hosts)
+            discovered_devices = list(self.iter_discover(
+                subnet, progress_callback, incremental=incremental,
+                job=self.prepare_scan_job(subnet) if checkpoint else None
+            ))
             
             self.logger.info(f"Discovery complete. Found {len(discovered_devices)} devices.")
             return discovered_devices
@@ -82,7 +157,14 @@ class DiscoveryEngine:
             self.logger.error(f"Error during subnet discovery: {e}")
             return []
     
-    def discover_ip_range(self, start_ip: str, end_ip: str, progress_callback=None) -> List[Device]:
+    def discover_ip_range(
+        self,
+        start_ip: str,
+        end_ip: str,
+        progress_callback=None,
+        incremental: bool = False,
+        checkpoint: bool = False
+    ) -> List[Device]:
         """
         Discover devices in an IP range.
         
@@ -90,6 +172,10 @@ class DiscoveryEngine:
             start_ip: Starting IP address
             end_ip: Ending IP address
             progress_callback: Optional callback function for progress updates
+            incremental: Probe only addresses the reachability cache says
+                         are due (see iter_discover)
+            checkpoint: Save progress of a large sweep so it can be resumed
+                        (see prepare_scan_job)
             
         Returns:
             List of discovered Device objects
@@ -97,58 +183,1032 @@ class DiscoveryEngine:
         self.logger.info(f"Starting discovery for IP range: {start_ip} - {end_ip}")
         
         try:
-            start = ipaddress.ip_address(start_ip)
-            end = ipaddress.ip_address(end_ip)
-            
-            # Generate IP list
-            ips = []
-            current = start
-            while current <= end:
-                ips.append(str(current))
-                current += 1
-            
-            total_hosts = len(ips)
-            self.logger.info(f"Scanning {total_hosts} hosts...")
-            
-            discovered_devices = []
-            
-            # Ping sweep with thread pool
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                future_to_ip = {
-                    executor.submit(self._ping_host, ip): ip 
-                    for ip in ips
-                }
+            discovered_devices = list(self.iter_discover(
+                f"{start_ip}-{end_ip}", progress_callback,
+                incremental=incremental,
+                job=self.prepare_scan_job(f"{start_ip}-{end_ip}") if checkpoint else None
+            ))
+            
+            self.logger.info(f"Discovery complete. Found {len(discovered_devices)} devices.")
+            return discovered_devices
+        
+        except Exception as e:
+            self.logger.error(f"Error during IP range discovery: {e}")
+            return []
+    
+    def discover_many(
+        self,
+        targets: Iterable[str],
+        progress_callback=None,
+        target_progress_callback=None,
+        incremental: bool = False,
+        checkpoint: bool = False
+    ) -> List[Device]:
+        """
+        Discover devices across many targets in a single sweep.
+        
+        Targets may mix CIDR subnets, ranges and single addresses, and
+        exclusions prefixed with '!'. They are merged into one deduplicated
+        address set and probed under a single shared concurrency budget
+        rather than one pool per target.
+        
+        Args:
+            targets: List of targets
+            progress_callback: Optional callback(completed, total) for the
+                               aggregate sweep
+            target_progress_callback: Optional callback(target, completed, total)
+                                      invoked when a target's count advances
+            incremental: Probe only addresses the reachability cache says
+                         are due (see iter_discover)
+            checkpoint: Save progress of a large sweep so it can be resumed
+                        (see prepare_scan_job)
+            
+        Returns:
+            List of discovered Device objects
+        """
+        targets, excludes = split_targets(targets)
+        self.logger.info(f"Starting discovery for {len(targets)} target(s)")
+        
+        try:
+            swept = self.scan_targets(targets + [EXCLUDE_PREFIX + t for t in excludes])
+            tracker = _TargetTracker(targets, split_targets(swept)[1])
+            
+            def on_complete(ip: str, device: Optional[Device]) -> None:
+                for idx in tracker.record(ip, device is not None):
+                    if target_progress_callback:
+                        target_progress_callback(targets[idx], tracker.completed[idx], tracker.totals[idx])
+            
+            discovered_devices = list(self.iter_discover(
+                swept, progress_callback, on_complete, incremental,
+                self.prepare_scan_job(swept) if checkpoint else None
+            ))
+            
+            for idx, target in enumerate(targets):
+                self.logger.info(
+                    f"Target {target}: {tracker.found[idx]} device(s) in {tracker.totals[idx]} address(es)"
+                )
+            self.logger.info(f"Discovery complete. Found {len(discovered_devices)} devices.")
+            return discovered_devices
+        
+        except Exception as e:
+            self.logger.error(f"Error during multi-target discovery: {e}")
+            return []
+    
+    def iter_discover(
+        self,
+        targets: Union[str, Iterable[str]],
+        progress_callback=None,
+        completion_hook: Optional[Callable[[str, Optional[Device]], None]] = None,
+        incremental: bool = False,
+        job: Optional[ScanCheckpoint] = None
+    ) -> Iterator[Device]:
+        """
+        Discover devices, yielding each one as soon as it answers.
+        
+        The sweep runs on its own event loop in a background thread, so
+        probing continues while the caller works on the devices already
+        yielded. Closing the generator early cancels the sweep. Overlapping
+        targets are merged so every address is probed once.
+        
+        With the reachability cache enabled, every outcome is recorded. An
+        incremental sweep probes previously seen devices first and then
+        only the addresses that are due: dead ones on an exponential
+        backoff schedule, and the never-seen space once per
+        full_sweep_interval.
+        
+        Args:
+            targets: A target or list of targets. Each is a CIDR subnet
+                     ('10.0.0.0/24'), a range ('10.0.0.1-10.0.0.50') or a
+                     single address; a '!' prefix excludes it instead.
+                     The configured exclusions are always applied
+            progress_callback: Optional callback function for progress updates,
+                               called from the sweep thread
+            completion_hook: Optional callable invoked with (ip, device or None)
+                             for every probed address, from the sweep thread
+            incremental: Skip addresses that are not due for a probe
+            job: Optional checkpoint to record progress in; addresses it
+                 already covers are skipped and its targets are used
+            
+        Yields:
+            Discovered Device objects
+            
+        Raises:
+            ValueError: If a target cannot be parsed
+        """
+        range_set = job.range_set if job else IPRangeSet.from_targets(self.scan_targets(targets))
+        results = queue.Queue()
+        done = object()
+        
+        async def pump():
+            async for device in self._aiter_ranges(range_set, progress_callback, completion_hook, incremental, job):
+                results.put(device)
+        
+        loop = asyncio.new_event_loop()
+        task = loop.create_task(pump())
+        
+        def run():
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                results.put(e)
+            finally:
+                loop.close()
+                results.put(done)
+        
+        thread = threading.Thread(target=run, name='discovery-sweep', daemon=True)
+        thread.start()
+        
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if thread.is_alive():
+                try:
+                    loop.call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    pass  # Loop already closed
+                thread.join()
+    
+    def discover_sharded(
+        self,
+        targets: Union[str, Iterable[str]],
+        progress_callback=None,
+        workers: Optional[int] = None
+    ) -> List[Device]:
+        """
+        Discover devices using one worker process per CPU core.
+        
+        Args:
+            targets: A target or list of targets (see iter_discover)
+            progress_callback: Optional callback function for progress updates
+            workers: Number of worker processes (defaults to discovery.workers,
+                     or the number of cores when that is 0)
+            
+        Returns:
+            List of discovered Device objects
+        """
+        try:
+            discovered_devices = list(self.iter_discover_sharded(targets, progress_callback, workers))
+            
+            self.logger.info(f"Discovery complete. Found {len(discovered_devices)} devices.")
+            return discovered_devices
+        
+        except Exception as e:
+            self.logger.error(f"Error during sharded discovery: {e}")
+            return []
+    
+    def iter_discover_sharded(
+        self,
+        targets: Union[str, Iterable[str]],
+        progress_callback=None,
+        workers: Optional[int] = None
+    ) -> Iterator[Device]:
+        """
+        Discover devices across worker processes, yielding each as it answers.
+        
+        For sweeps too large for one interpreter: the address space is
+        sharded over worker processes, each running its own probe loop,
+        and found devices stream back over pipes. Workers do not update
+        the reachability cache or scan checkpoints, and share the global
+        rate limit and in-flight budget equally.
+        If a worker fails, the other shards still complete and
+        last_scan_summary['failed_shards'] counts the ones that did not.
+        
+        Args:
+            targets: A target or list of targets (see iter_discover)
+            progress_callback: Optional callback function for progress updates
+            workers: Number of worker processes (see discover_sharded)
+            
+        Yields:
+            Discovered Device objects
+            
+        Raises:
+            ValueError: If a target cannot be parsed
+        """
+        range_set = IPRangeSet.from_targets(self.scan_targets(targets))
+        workers = workers or self.workers or default_workers()
+        block_size = 2 ** (32 - self.rate_limiter.prefix_v4)
+        
+        self.last_scan_summary = yield from iter_sharded(
+            self.config, range_set, workers, progress_callback, block_size
+        )
+    
+    async def aiter_discover(
+        self,
+        targets: Union[str, Iterable[str]],
+        progress_callback=None,
+        incremental: bool = False,
+        job: Optional[ScanCheckpoint] = None
+    ) -> AsyncIterator[Device]:
+        """
+        Discover devices on the running event loop, yielding each as it answers.
+        
+        Args:
+            targets: A target or list of targets (see iter_discover)
+            progress_callback: Optional callback function for progress updates
+            incremental: Skip addresses that are not due for a probe
+            job: Optional checkpoint to record progress in (see iter_discover)
+            
+        Yields:
+            Discovered Device objects
+        """
+        range_set = job.range_set if job else IPRangeSet.from_targets(self.scan_targets(targets))
+        async for device in self._aiter_ranges(range_set, progress_callback, incremental=incremental, job=job):
+            yield device
+    
+    async def _aiter_ranges(
+        self,
+        range_set: IPRangeSet,
+        progress_callback=None,
+        completion_hook: Optional[Callable[[str, Optional[Device]], None]] = None,
+        incremental: bool = False,
+        job: Optional[ScanCheckpoint] = None
+    ) -> AsyncIterator[Device]:
+        """
+        Probe an address set, then re-probe only the addresses that stayed silent.
+        
+        Each pass runs through _sweep_pass. Outcomes of silent addresses are
+        held back until their last attempt, so the reachability cache and
+        completion hooks see one final result per address. Progress counts
+        probes, and its total grows when a retry pass starts.
+        """
+        store = self._get_reachability_store()
+        if job:
+            if incremental:
+                self.logger.warning("Checkpointed scans always cover every address, ignoring incremental")
+            address_iter, total_hosts, full_sweep = job.pending_addresses(), job.remaining, True
+        else:
+            address_iter, total_hosts, full_sweep = self._plan_sweep(range_set, store, incremental)
+        self.logger.info(f"Scanning {total_hosts} hosts...")
+        
+        icmp_prober = self._open_icmp_prober() if 'icmp' in self.methods else None
+        tcp_prober = self._open_tcp_prober()
+        summary = {
+            'addresses': total_hosts,
+            'probes_sent': 0,
+            'responders': 0,
+            'retried': 0,
+            'recovered_on_retry': 0,
+            'late_answers': 0,
+        }
+        started = time.monotonic()
+        finished = False
+        sweep = None
+        
+        try:
+            total_probes = total_hosts
+            
+            for attempt in range(self.probe_retries + 1):
+                last_attempt = attempt == self.probe_retries
+                silent = IPRangeSet()
+                sweep = self._sweep_pass(address_iter, icmp_prober, tcp_prober, summary)
                 
-                completed = 0
-                for future in concurrent.futures.as_completed(future_to_ip):
-                    completed += 1
-                    ip = future_to_ip[future]
-                    
-                    try:
-                        is_reachable = future.result()
-                        if is_reachable:
-                            device = Device(
-                                ip_address=ip,
-                                status=DeviceStatus.REACHABLE,
-                                last_seen=datetime.now()
-                            )
-                            discovered_devices.append(device)
-                            self.logger.debug(f"Device found: {ip}")
-                    
-                    except Exception as e:
-                        self.logger.error(f"Error checking {ip}: {e}")
+                async for ip, device in sweep:
+                    summary['probes_sent'] += 1
                     
                     # Progress callback
                     if progress_callback:
-                        progress_callback(completed, total_hosts)
+                        progress_callback(summary['probes_sent'], total_probes)
+                    
+                    if device is None and not last_attempt:
+                        address = ipaddress.ip_address(ip)
+                        silent.add(address.version, int(address), int(address))
+                        continue
+                    
+                    if store:
+                        store.record(ip, device is not None)
+                    if job:
+                        job.record(ip, device)
+                    if completion_hook:
+                        completion_hook(ip, device)
+                    
+                    if device:
+                        summary['responders'] += 1
+                        if attempt:
+                            summary['recovered_on_retry'] += 1
+                        self.logger.debug(f"Device found: {device.ip_address}")
+                        yield device
+                
+                sweep = None
+                if not silent:
+                    break
+                
+                # Retry only the non-responders
+                retry_count = silent.num_addresses
+                summary['retried'] += retry_count
+                total_probes += retry_count
+                address_iter = iter(silent)
+                self.logger.info(f"Retrying {retry_count} silent address(es) (attempt {attempt + 2})")
             
-            self.logger.info(f"Discovery complete. Found {len(discovered_devices)} devices.")
-            return discovered_devices
+            finished = True
+        
+        finally:
+            if sweep is not None:
+                await sweep.aclose()
+            
+            if icmp_prober:
+                icmp_prober.close()
+            if tcp_prober:
+                tcp_prober.close()
+            
+            if store:
+                try:
+                    store.flush()
+                    if finished and full_sweep:
+                        store.mark_full_sweep(store.scope_of(range_set))
+                except Exception as e:
+                    self.logger.error(f"Error saving reachability cache: {e}")
+            
+            if job:
+                try:
+                    # A finished job has nothing left to resume
+                    if finished:
+                        job.delete()
+                    else:
+                        job.close()
+                except Exception as e:
+                    self.logger.error(f"Error saving checkpoint of scan job {job.job_id}: {e}")
+            
+            elapsed = time.monotonic() - started
+            summary['duration'] = round(elapsed, 3)
+            summary['probe_rate'] = round(summary['probes_sent'] / elapsed, 1) if elapsed > 0 else 0.0
+            # Share of live hosts whose first probe went unanswered
+            summary['first_probe_loss'] = (
+                round(summary['recovered_on_retry'] / summary['responders'], 4)
+                if summary['responders'] else 0.0
+            )
+            self.last_scan_summary = summary
+            self.logger.info(
+                f"Sweep summary: {summary['responders']} responder(s), {summary['probes_sent']} probe(s) "
+                f"at {summary['probe_rate']}/s, {summary['recovered_on_retry']} recovered on retry "
+                f"({summary['first_probe_loss']:.1%} first-probe loss), {summary['late_answers']} late answer(s)"
+            )
+    
+    async def _sweep_pass(
+        self,
+        address_iter: Iterator[str],
+        icmp_prober: Optional[IcmpProber],
+        tcp_prober: Optional[TcpProber],
+        summary: Dict
+    ) -> AsyncIterator[Tuple[str, Optional[Device]]]:
+        """
+        Probe addresses with at most max_in_flight probes outstanding.
+        
+        Every probe in the pass shares this one window, however many
+        targets the set was built from. A probe gives up its slot at its
+        subnet's adaptive timeout; probes still listening for a late answer
+        after that may hold only 1/LINGER_SHARE of the window, and when
+        more pass their timeout the oldest is given up as silent. Dead
+        hosts therefore free capacity at the learned timeout, not at
+        ping_timeout.
+        
+        An address whose subnet is over its rate limit reserves its
+        subnet slot and is parked outside the window until that slot is
+        due, so throttled subnets do not crowd out probes to other
+        subnets. Addresses are enumerated only as slots free up (and at
+        most PARKED_PER_SLOT per slot are parked), so memory stays flat
+        regardless of the size of the address space.
         
+        Yields:
+            (ip, device or None) for every address
+        """
+        in_flight: Dict[asyncio.Future, str] = {}
+        lingering: Dict[asyncio.Future, str] = {}  # Past their adaptive timeout, oldest first
+        max_lingering = max(1, self.max_in_flight // LINGER_SHARE)
+        parked: List[Tuple[float, int, str]] = []  # (due, sequence, ip), subnet slot reserved
+        max_parked = self.max_in_flight * PARKED_PER_SLOT
+        sequence = 0
+        
+        try:
+            exhausted = False
+            
+            while True:
+                now = self.rate_limiter.clock()
+                while len(in_flight) + len(lingering) < self.max_in_flight:
+                    if parked and parked[0][0] <= now:
+                        ip = heapq.heappop(parked)[2]
+                    elif not exhausted and len(parked) < max_parked:
+                        try:
+                            ip = next(address_iter)
+                        except StopIteration:
+                            exhausted = True
+                            continue
+                        delay = self.rate_limiter.reserve_subnet(ip, now)
+                        if delay > 0:
+                            heapq.heappush(parked, (now + delay, sequence, ip))
+                            sequence += 1
+                            continue
+                    else:
+                        break
+                    task = asyncio.ensure_future(self._probe_with_deadline(ip, icmp_prober, tcp_prober))
+                    in_flight[task] = ip
+                
+                if not in_flight and not lingering:
+                    if not parked:
+                        break
+                    await asyncio.sleep(parked[0][0] - now)
+                    continue
+                
+                # Wake for the next parked address too, if the window has room for it
+                timeout = None
+                if parked and len(in_flight) + len(lingering) < self.max_in_flight:
+                    timeout = max(0.0, parked[0][0] - now)
+                done, _ = await asyncio.wait(
+                    set(in_flight) | set(lingering), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                for task in done:
+                    if task in in_flight:
+                        ip = in_flight.pop(task)
+                        result = self._probe_result(task)
+                        if isinstance(result, asyncio.Future):
+                            # Adaptive timeout passed: keep listening for a late answer
+                            lingering[result] = ip
+                            if len(lingering) > max_lingering:
+                                oldest = next(iter(lingering))
+                                expired_ip = lingering.pop(oldest)
+                                oldest.cancel()
+                                await asyncio.gather(oldest, return_exceptions=True)
+                                device = None if oldest.cancelled() else self._probe_result(oldest)
+                                if device is not None:
+                                    summary['late_answers'] += 1
+                                yield expired_ip, device
+                            continue
+                    elif task in lingering:
+                        ip = lingering.pop(task)
+                        result = self._probe_result(task)
+                        if result is not None:
+                            summary['late_answers'] += 1
+                    else:
+                        continue  # Given up above while this batch was pending
+                    
+                    yield ip, result
+        
+        finally:
+            pending = set(in_flight) | set(lingering)
+            for task in pending:
+                task.cancel()
+            if pending:
+                results = await asyncio.gather(*pending, return_exceptions=True)
+                # Probes that had just passed their adaptive timeout
+                handed_over = [r for r in results if isinstance(r, asyncio.Future)]
+                for probe in handed_over:
+                    probe.cancel()
+                if handed_over:
+                    await asyncio.gather(*handed_over, return_exceptions=True)
+    
+    def _probe_result(self, task: asyncio.Future):
+        """Result of a finished probe task, None if it raised"""
+        try:
+            return task.result()
         except Exception as e:
-            self.logger.error(f"Error during IP range discovery: {e}")
+            self.logger.error(f"Error during probe: {e}")
+            return None
+    
+    def scan_targets(self, targets: Union[str, Iterable[str]]) -> List[str]:
+        """
+        Targets with the configured exclusions appended.
+        
+        Exclusions come from discovery.exclude and from discovery.exclude_file
+        (re-read on every scan, so edits apply to the next one).
+        
+        Args:
+            targets: A target or list of targets
+            
+        Returns:
+            List of targets, exclusions prefixed with '!'
+            
+        Raises:
+            ValueError: If the exclude file cannot be read; scanning
+                        address space that was meant to be excluded is
+                        worse than not scanning
+        """
+        if isinstance(targets, str):
+            targets = [targets]
+        targets = [str(t).strip() for t in targets]
+        
+        excludes = list(self.exclude)
+        if self.exclude_file:
+            try:
+                excludes += read_target_file(self.exclude_file)
+            except OSError as e:
+                raise ValueError(f"Cannot read exclude file {self.exclude_file}: {e}")
+        
+        for exclude in excludes:
+            exclude = str(exclude).strip()
+            exclude = exclude if exclude.startswith(EXCLUDE_PREFIX) else EXCLUDE_PREFIX + exclude
+            if exclude not in targets:
+                targets.append(exclude)
+        return targets
+    
+    def create_scan_job(self, targets: Union[str, Iterable[str]]) -> ScanCheckpoint:
+        """
+        Start a checkpointed scan job.
+        
+        Pass the returned checkpoint to iter_discover (job=...) to record
+        progress; the job can later be resumed by its job_id.
+        
+        Args:
+            targets: A target or list of targets
+            
+        Returns:
+            New ScanCheckpoint
+        """
+        job = ScanCheckpoint.create(self.checkpoint_directory, targets, self.checkpoint_interval)
+        self.last_job_id = job.job_id
+        self.logger.info(f"Checkpointing scan of {job.total} address(es) as job {job.job_id}")
+        return job
+    
+    def open_scan_job(self, job_id: str) -> ScanCheckpoint:
+        """
+        Open an existing scan job.
+        
+        Raises:
+            FileNotFoundError: If the job does not exist
+            ValueError: If the job files are corrupt
+        """
+        return ScanCheckpoint.load(self.checkpoint_directory, job_id, self.checkpoint_interval)
+    
+    def list_scan_jobs(self) -> List[Dict]:
+        """
+        List unfinished checkpointed scan jobs, newest first.
+        
+        Finished jobs delete their checkpoint, so every job listed can
+        be resumed.
+        
+        Returns:
+            List of dicts with 'job_id', 'targets', 'created' and 'total'
+        """
+        return ScanCheckpoint.list_jobs(self.checkpoint_directory)
+    
+    def find_scan_job(self, targets: Union[str, Iterable[str]]) -> Optional[str]:
+        """
+        Find the newest unfinished job scanning exactly these targets.
+        
+        Returns:
+            Job id, or None
+        """
+        if isinstance(targets, str):
+            targets = [targets]
+        targets = [str(t).strip() for t in targets]
+        
+        for meta in self.list_scan_jobs():
+            if meta.get('targets') == targets:
+                return meta['job_id']
+        return None
+    
+    def resume_scan(self, job_id: str, progress_callback=None) -> List[Device]:
+        """
+        Resume a checkpointed scan, skipping already-probed addresses.
+        
+        Args:
+            job_id: Job to resume
+            progress_callback: Optional callback function for progress updates
+                               (counts only the remaining addresses)
+            
+        Returns:
+            Devices found before the interruption plus those found now
+        """
+        try:
+            job = self.open_scan_job(job_id)
+            self.last_job_id = job_id
+            previous = job.load_devices()
+            self.logger.info(
+                f"Resuming scan job {job_id}: {job.remaining} of {job.total} address(es) left, "
+                f"{len(previous)} device(s) already found"
+            )
+            
+            found = {d.ip_address: d for d in previous}
+            for device in self.iter_discover(job.targets, progress_callback, job=job):
+                found[device.ip_address] = device
+            
+            self.logger.info(f"Discovery complete. Found {len(found)} devices.")
+            return list(found.values())
+        
+        except Exception as e:
+            self.logger.error(f"Error resuming scan job {job_id}: {e}")
+            return []
+    
+    def prepare_scan_job(self, targets: Union[str, Iterable[str]], resume: bool = False) -> Optional[ScanCheckpoint]:
+        """
+        Pick the checkpoint for a sweep that is large enough to be worth resuming.
+        
+        The job's files are removed once the sweep finishes. Sweeps larger
+        than ScanCheckpoint.MAX_ADDRESSES run without a checkpoint.
+        
+        Args:
+            targets: A target or list of targets
+            resume: Reuse the newest unfinished job with the same targets
+            
+        Returns:
+            ScanCheckpoint, or None for small sweeps or if checkpointing is off
+        """
+        # Jobs record the exclusions they were started with, so changing
+        # them starts a new job instead of resuming one with the old set
+        targets = self.scan_targets(targets)
+        
+        if resume:
+            job_id = self.find_scan_job(targets)
+            if job_id:
+                try:
+                    job = self.open_scan_job(job_id)
+                    self.last_job_id = job_id
+                    return job
+                except (OSError, ValueError, MemoryError) as e:
+                    self.logger.warning(f"Could not reopen scan job {job_id}, starting a new one: {e}")
+        
+        if not self.checkpoint_min_addresses:
+            return None
+        total = IPRangeSet.from_targets(targets).num_addresses
+        if total < self.checkpoint_min_addresses:
+            return None
+        if total > ScanCheckpoint.MAX_ADDRESSES:
+            self.logger.info(f"Sweep of {total} address(es) is too large to checkpoint, scanning without one")
+            return None
+        
+        try:
+            return self.create_scan_job(targets)
+        except (OSError, ValueError, MemoryError, OverflowError) as e:
+            self.logger.warning(f"Could not create scan checkpoint, scanning without one: {e}")
+            return None
+    
+    def record_scan(self, devices: List[Device], targets: Union[str, Iterable[str]]) -> Optional[int]:
+        """
+        Save a finished scan's results to the scan history.
+        
+        Call this once enrichment (SNMP, SSH banners) is done, so the
+        stored attributes are the ones worth comparing.
+        
+        Args:
+            devices: Devices found by the scan
+            targets: Targets that were scanned
+            
+        Returns:
+            Scan id, or None if the history could not be written
+        """
+        try:
+            scan_id = self._get_scan_history().save_scan(devices, targets)
+            self.logger.info(f"Saved scan {scan_id} with {len(devices)} device(s) to history")
+            return scan_id
+        except Exception as e:
+            self.logger.error(f"Error saving scan history: {e}")
+            return None
+    
+    def list_scans(self, limit: int = 50) -> List[Dict]:
+        """
+        Recent scans from the history, newest first.
+        
+        Returns:
+            List of dicts with 'id', 'completed_at', 'targets' and 'device_count'
+        """
+        try:
+            return self._get_scan_history().list_scans(limit)
+        except Exception as e:
+            self.logger.error(f"Error reading scan history: {e}")
             return []
     
+    def diff_scans(self, old_scan: int, new_scan: int) -> Optional[ScanDiff]:
+        """
+        Compare two stored scans.
+        
+        Args:
+            old_scan: Id of the earlier scan
+            new_scan: Id of the later scan
+            
+        Returns:
+            ScanDiff with added, removed and changed hosts, or None on error
+        """
+        try:
+            return self._get_scan_history().diff(old_scan, new_scan)
+        except Exception as e:
+            self.logger.error(f"Error comparing scans {old_scan} and {new_scan}: {e}")
+            return None
+    
+    def discover_topology(
+        self,
+        seeds: List[Device],
+        connection_manager,
+        progress_callback=None
+    ) -> Optional[TopologyGraph]:
+        """
+        Discover devices by crawling CDP/LLDP neighbor tables from seed devices.
+        
+        Logs into up to `topology_max_sessions` devices at once, reads
+        'show cdp neighbors detail' and 'show lldp neighbors detail', and
+        follows every neighbor that advertises a management address inside
+        `topology_scope` (everything when empty), each exactly once. The
+        graph is saved next to the scan history.
+        
+        Args:
+            seeds: Devices to start from (need credentials)
+            connection_manager: ConnectionManager used to log in
+            progress_callback: Optional callback(visited, known)
+            
+        Returns:
+            TopologyGraph with adjacency lists and interface labels, or None on error
+        """
+        try:
+            scope = IPRangeSet.from_targets(self.topology_scope) if self.topology_scope else None
+            crawler = TopologyCrawler(
+                connection_manager,
+                max_sessions=self.topology_max_sessions,
+                max_depth=self.topology_max_depth,
+                scope=scope
+            )
+            graph = crawler.crawl(seeds, progress_callback)
+        except Exception as e:
+            self.logger.error(f"Error during topology discovery: {e}")
+            return None
+        
+        try:
+            self._get_topology_store().save(graph, [seed.ip_address for seed in seeds])
+        except Exception as e:
+            self.logger.error(f"Error saving topology: {e}")
+        
+        return graph
+    
+    def load_topology(self, topology_id: Optional[int] = None) -> Optional[TopologyGraph]:
+        """
+        Load a saved topology.
+        
+        Args:
+            topology_id: Topology to load (None = most recent)
+            
+        Returns:
+            TopologyGraph, or None if none is saved
+        """
+        try:
+            return self._get_topology_store().load(topology_id)
+        except Exception as e:
+            self.logger.error(f"Error loading topology: {e}")
+            return None
+    
+    def _get_topology_store(self) -> TopologyStore:
+        """Open the topology store on first use"""
+        if self._topology_store is None:
+            self._topology_store = TopologyStore(self.database_path)
+        return self._topology_store
+    
+    def _get_scan_history(self) -> ScanHistory:
+        """Open the scan history on first use"""
+        if self._scan_history is None:
+            self._scan_history = ScanHistory(self.database_path, keep=self.scan_history_keep)
+        return self._scan_history
+    
+    def get_scan_timing(self) -> List[Dict]:
+        """
+        Round-trip timing learned by the adaptive probe timeouts.
+        
+        Returns:
+            One dict per measured subnet with 'subnet', 'samples', 'srtt_ms',
+            'rttvar_ms' and 'timeout_ms'
+        """
+        return self.rtt_estimator.snapshot()
+    
+    def _get_reachability_store(self) -> Optional[ReachabilityStore]:
+        """
+        Open the reachability cache on first use.
+        
+        Returns:
+            ReachabilityStore, or None when the cache is disabled or the
+            database cannot be opened
+        """
+        if not self.reachability_cache:
+            return None
+        
+        if self._reachability_store is None:
+            try:
+                self._reachability_store = ReachabilityStore(
+                    self.database_path,
+                    base_backoff=self.backoff_base,
+                    max_backoff=self.backoff_max
+                )
+            except Exception as e:
+                self.logger.error(f"Error opening reachability cache, disabling it: {e}")
+                self.reachability_cache = False
+                return None
+        
+        return self._reachability_store
+    
+    def _plan_sweep(
+        self,
+        range_set: IPRangeSet,
+        store: Optional[ReachabilityStore],
+        incremental: bool
+    ) -> Tuple[Iterator[str], int, bool]:
+        """
+        Decide which addresses a sweep probes, and in what order.
+        
+        Returns:
+            Tuple of (address iterator, number of addresses, whether every
+            address in the set is probed)
+        """
+        if not incremental or store is None:
+            if incremental:
+                self.logger.warning("Incremental discovery requested but the reachability cache is disabled")
+            return iter(range_set), range_set.num_addresses, True
+        
+        now = time.time()
+        records = store.lookup(range_set)
+        known_alive = sorted(
+            (ip for ip, record in records.items() if record.misses == 0),
+            key=ipaddress.ip_address
+        )
+        
+        scope = store.scope_of(range_set)
+        if now - store.last_full_sweep(scope) >= self.full_sweep_interval:
+            self.logger.info(f"Full sweep due, probing {len(known_alive)} known device(s) first")
+            alive_set = set(known_alive)
+            rest = (ip for ip in range_set if ip not in alive_set)
+            return itertools.chain(known_alive, rest), range_set.num_addresses, True
+        
+        backed_off = sorted(
+            (ip for ip, record in records.items() if record.misses and store.next_probe_due(record) <= now),
+            key=ipaddress.ip_address
+        )
+        skipped = range_set.num_addresses - len(known_alive) - len(backed_off)
+        self.logger.info(
+            f"Incremental sweep: {len(known_alive)} known device(s), "
+            f"{len(backed_off)} due for re-probe, {skipped} skipped"
+        )
+        return itertools.chain(known_alive, backed_off), len(known_alive) + len(backed_off), False
+    
+    def _open_icmp_prober(self) -> Optional[IcmpProber]:
+        """
+        Open the in-process ICMP prober.
+        
+        Returns:
+            Open IcmpProber, or None when ICMP sockets are not permitted and
+            the subprocess ping fallback must be used
+        """
+        prober = IcmpProber(batch_size=self.icmp_batch_size)
+        try:
+            prober.open()
+            return prober
+        except PermissionError as e:
+            if not self._icmp_fallback_logged:
+                self.logger.warning(f"ICMP socket unavailable ({e}), falling back to ping subprocess")
+                self._icmp_fallback_logged = True
+            return None
+    
+    def _open_tcp_prober(self) -> Optional[TcpProber]:
+        """
+        Open the TCP connect prober for the 'tcp' method.
+        
+        Sweeps only send TCP connects when 'tcp' is listed explicitly;
+        'ssh' alone talks to the SSH port of hosts that already answered
+        (see grab_ssh_banners). With both, the SSH port is probed too.
+        
+        Returns:
+            Open TcpProber, or None if the method is not enabled
+        """
+        if 'tcp' not in self.methods:
+            return None
+        
+        ports = list(self.tcp_ports)
+        if 'ssh' in self.methods and self.ssh_port not in ports:
+            ports.append(self.ssh_port)
+        
+        if not ports:
+            return None
+        
+        prober = TcpProber(ports, max_concurrency=self.tcp_max_concurrency)
+        prober.open()
+        return prober
+    
+    async def _probe_with_deadline(
+        self,
+        ip: str,
+        icmp_prober: Optional[IcmpProber],
+        tcp_prober: Optional[TcpProber]
+    ) -> Union[Device, None, 'asyncio.Future']:
+        """
+        Probe a host, waiting only as long as its subnet usually needs.
+        
+        The probe is first paced by the global rate limit (the sweep has
+        already waited for its subnet's slot). With adaptive
+        timeouts the probe itself may run until ping_timeout (or the
+        estimator's upper bound, if lower), so a dead host never costs
+        more than without them. If it has not answered by the subnet's
+        learned timeout it is handed back still running, so the sweep can
+        tell the answer was late while still accepting it.
+        
+        Returns:
+            Device, None if unreachable, or the still-running probe task
+        """
+        await self.rate_limiter.acquire_global()
+        
+        if not self.adaptive_timeouts:
+            return await self._probe_host(ip, icmp_prober, tcp_prober, self.ping_timeout)
+        
+        late_deadline = min(self.ping_timeout, self.rtt_estimator.max_timeout)
+        timeout = self.rtt_estimator.timeout(ip)
+        if timeout >= late_deadline:
+            return await self._probe_host(ip, icmp_prober, tcp_prober, late_deadline)
+        
+        probe = asyncio.ensure_future(self._probe_host(ip, icmp_prober, tcp_prober, late_deadline))
+        try:
+            done, _ = await asyncio.wait({probe}, timeout=timeout)
+        except asyncio.CancelledError:
+            probe.cancel()
+            raise
+        
+        return probe.result() if done else probe
+    
+    async def _probe_host(
+        self,
+        ip: str,
+        icmp_prober: Optional[IcmpProber],
+        tcp_prober: Optional[TcpProber],
+        timeout: float
+    ) -> Optional[Device]:
+        """
+        Probe a single host with every enabled method concurrently.
+        
+        The first method to get an answer decides; the others are
+        cancelled, so a host answering ICMP does not wait out connect
+        timeouts on filtered ports. Its open_ports are then left empty:
+        they are only known when TCP answered first, e.g. with 'tcp'
+        as the only method.
+        
+        Args:
+            ip: IP address to probe
+            icmp_prober: Open ICMP prober, or None for the ping subprocess
+            tcp_prober: Open TCP prober, or None if TCP methods are disabled
+            timeout: Probe timeout in seconds
+            
+        Returns:
+            Device if the host answered any probe, otherwise None
+        """
+        probes = {}
+        if 'icmp' in self.methods:
+            probes[asyncio.ensure_future(self._ping_async(ip, icmp_prober, timeout))] = 'icmp'
+        if tcp_prober:
+            probes[asyncio.ensure_future(tcp_prober.probe(ip, timeout))] = 'tcp'
+        
+        if not probes:
+            return None
+        
+        icmp_rtt, tcp_rtt, open_ports = None, None, {}
+        pending = set(probes)
+        try:
+            while pending and icmp_rtt is None and tcp_rtt is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if probes[task] == 'icmp':
+                        icmp_rtt = task.result()
+                    else:
+                        open_ports, tcp_rtt = task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        if icmp_rtt is None and tcp_rtt is None:
+            return None
+        
+        rtt = icmp_rtt if icmp_rtt is not None else tcp_rtt
+        self.rtt_estimator.observe(ip, rtt)
+        
+        return Device(
+            ip_address=ip,
+            status=DeviceStatus.REACHABLE,
+            last_seen=datetime.now(),
+            open_ports=sorted(open_ports),
+            response_time=round(rtt * 1000, 3)
+        )
+    
+    async def _ping_async(self, ip: str, prober: Optional[IcmpProber], timeout: float) -> Optional[float]:
+        """
+        Send one ICMP echo, in-process if possible.
+        
+        Args:
+            ip: IP address to probe
+            prober: Open ICMP prober, or None to use the ping subprocess
+            timeout: Reply timeout in seconds (the subprocess uses ping_timeout)
+            
+        Returns:
+            Round-trip time in seconds, or None if unreachable
+        """
+        if prober and ':' not in ip:
+            return await prober.ping(ip, timeout)
+        
+        loop = asyncio.get_running_loop()
+        if self._ping_executor is None:
+            self._ping_executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_threads)
+        
+        start = time.perf_counter()
+        reachable = await loop.run_in_executor(self._ping_executor, self._ping_host, ip)
+        return (time.perf_counter() - start) if reachable else None
+    
     def _ping_host(self, ip: str) -> bool:
         """
         Ping a single host to check if it's reachable.
@@ -161,10 +1221,10 @@ class DiscoveryEngine:
         """
         try:
             # Determine ping command based on OS
-            param = '-n' if platform.system().lower() == 'windows' else '-c'
-            timeout_param = '-w' if platform.system().lower() == 'windows' else '-W'
-            
-            command = ['ping', param, '1', timeout_param, str(self.ping_timeout * 1000 if platform.system().lower() == 'windows' else self.ping_timeout), ip]
+            if self._is_windows:
+                command = ['ping', '-n', '1', '-w', str(self.ping_timeout * 1000), ip]
+            else:
+                command = ['ping', '-c', '1', '-W', str(self.ping_timeout), ip]
             
             result = subprocess.run(
                 command,
@@ -181,93 +1241,503 @@ class DiscoveryEngine:
             self.logger.debug(f"Ping error for {ip}: {e}")
             return False
     
-    def identify_device_vendor(self, device: Device, connection) -> Device:
+    def fingerprint_devices(self, devices: List[Device], progress_callback=None) -> List[Device]:
         """
-        Identify device vendor and type through SSH banner or command output.
+        Identify devices over SNMP before any SSH login.
+        
+        Queries sysDescr, sysObjectID, sysUpTime and sysName on every device
+        concurrently and fills in vendor, model, os_version, hostname and
+        uptime where they are not already known. SNMPv2c agents are also
+        asked for snmpEngineID and the chassis serial number, which
+        identify multi-homed devices.
         
         Args:
-            device: Device object
-            connection: Active connection to device
+            devices: Devices to fingerprint (updated in place)
+            progress_callback: Optional callback function for progress updates
             
         Returns:
-            Updated Device object with vendor information
+            The same list of devices
         """
+        if not devices:
+            return devices
+        
+        self.logger.info(f"SNMP fingerprinting {len(devices)} device(s)...")
+        
         try:
-            # Try to get device information through show version or similar
-            output = connection.send_command("show version", read_timeout=10)
-            
-            # Vendor identification patterns
-            vendor_patterns = {
-                'Cisco': ['Cisco', 'IOS', 'NX-OS', 'IOS-XE', 'IOS-XR'],
-                'Juniper': ['Juniper', 'JUNOS', 'JunOS'],
-                'HP': ['HP ', 'HPE ', 'ProCurve', 'Aruba'],
-                'Huawei': ['Huawei', 'VRP'],
-                'MikroTik': ['MikroTik', 'RouterOS'],
-                'Ubiquiti': ['Ubiquiti', 'EdgeOS']
-            }
-            
-            # Check output for vendor patterns
-            output_lower = output.lower()
-            for vendor, patterns in vendor_patterns.items():
-                if any(pattern.lower() in output_lower for pattern in patterns):
-                    device.vendor = vendor
-                    self.logger.info(f"Identified {device.ip_address} as {vendor}")
-                    break
+            asyncio.run(self.afingerprint_devices(devices, progress_callback))
+        except Exception as e:
+            self.logger.error(f"Error during SNMP fingerprinting: {e}")
+        
+        return devices
+    
+    async def afingerprint_devices(self, devices: List[Device], progress_callback=None) -> List[Device]:
+        """
+        Async variant of fingerprint_devices for use on a running event loop.
+        
+        Args:
+            devices: Devices to fingerprint (updated in place)
+            progress_callback: Optional callback function for progress updates
             
-            # Try to extract model and OS version (Cisco example)
-            if device.vendor == 'Cisco':
-                # Extract model
-                if 'cisco' in output_lower:
-                    lines = output.split('\n')
-                    for line in lines:
-                        if 'cisco' in line.lower() and ('bytes' in line.lower() or 'processor' in line.lower()):
-                            parts = line.split()
-                            if len(parts) > 1:
-                                device.model = parts[1]
-                            break
+        Returns:
+            The same list of devices
+        """
+        prober = SnmpProber(
+            community=self.snmp_community,
+            version=self.snmp_version,
+            port=self.snmp_port,
+            retries=self.snmp_retries,
+            max_concurrency=self.snmp_max_concurrency
+        )
+        
+        # snmpEngineID and the serial identify multi-homed devices; SNMPv1
+        # agents would fail the whole request if they do not expose them
+        oids = SYSTEM_OIDS if str(self.snmp_version) == '1' else SYSTEM_OIDS + [SNMP_ENGINE_ID, ENT_PHYSICAL_SERIAL]
+        
+        async def fingerprint(device: Device) -> bool:
+            values = await prober.get(device.ip_address, oids, self.snmp_timeout)
+            if not values:
+                return False
+            self._apply_fingerprint(device, fingerprint_snmp(values))
+            return True
+        
+        async with prober:
+            tasks = [asyncio.ensure_future(fingerprint(device)) for device in devices]
+            
+            identified = 0
+            for completed, task in enumerate(asyncio.as_completed(tasks), 1):
+                try:
+                    if await task:
+                        identified += 1
+                except Exception as e:
+                    self.logger.debug(f"SNMP fingerprint error: {e}")
                 
-                # Extract IOS version
-                for line in output.split('\n'):
-                    if 'version' in line.lower() and ('ios' in line.lower() or 'nx-os' in line.lower()):
-                        device.os_version = line.strip()
-                        break
+                if progress_callback:
+                    progress_callback(completed, len(devices))
+        
+        self.logger.info(f"SNMP identified {identified}/{len(devices)} device(s)")
+        return devices
+    
+    def grab_ssh_banners(self, devices: List[Device], progress_callback=None) -> List[Device]:
+        """
+        Fingerprint devices from their SSH identification string, without logging in.
+        
+        Sets ssh_banner and, for recognised banners, vendor (if unknown) and
+        netmiko_device_type so the first login uses the right driver. With
+        discovery.ssh_host_keys, servers that sent a banner also get a key
+        exchange (no login) to record ssh_host_key, which identifies
+        multi-homed devices. Devices whose port scan showed the SSH port
+        closed are skipped.
+        
+        Args:
+            devices: Devices to fingerprint (updated in place)
+            progress_callback: Optional callback function for progress updates
             
-            return device
+        Returns:
+            The same list of devices
+        """
+        if not devices:
+            return devices
         
+        self.logger.info(f"Reading SSH banners from {len(devices)} device(s)...")
+        
+        try:
+            asyncio.run(self.agrab_ssh_banners(devices, progress_callback))
         except Exception as e:
-            self.logger.error(f"Error identifying device {device.ip_address}: {e}")
-            return device
+            self.logger.error(f"Error during SSH banner grab: {e}")
+        
+        return devices
     
-    def enrich_device_info(self, device: Device, connection) -> Device:
+    async def agrab_ssh_banners(self, devices: List[Device], progress_callback=None) -> List[Device]:
         """
-        Enrich device information with hostname, uptime, etc.
+        Async variant of grab_ssh_banners for use on a running event loop.
+        
+        Args:
+            devices: Devices to fingerprint (updated in place)
+            progress_callback: Optional callback function for progress updates
+            
+        Returns:
+            The same list of devices
+        """
+        async def grab(device: Device) -> bool:
+            if device.open_ports and device.ssh_port not in device.open_ports:
+                return False
+            
+            banner = await grabber.grab(device.ip_address, device.ssh_port, self.ssh_banner_timeout)
+            if not banner:
+                return False
+            
+            device.ssh_banner = banner
+            if self.ssh_host_keys and not device.ssh_host_key:
+                device.ssh_host_key = await grabber.host_key(
+                    device.ip_address, device.ssh_port, self.ssh_banner_timeout
+                )
+            fingerprint = fingerprint_ssh_banner(banner)
+            if fingerprint:
+                vendor, device_type = fingerprint
+                self._apply_fingerprint(device, {'vendor': vendor, 'netmiko_device_type': device_type})
+            return fingerprint is not None
+        
+        async with SshBannerGrabber(max_concurrency=self.ssh_banner_max_concurrency) as grabber:
+            tasks = [asyncio.ensure_future(grab(device)) for device in devices]
+            
+            identified = 0
+            for completed, task in enumerate(asyncio.as_completed(tasks), 1):
+                try:
+                    if await task:
+                        identified += 1
+                except Exception as e:
+                    self.logger.debug(f"SSH banner error: {e}")
+                
+                if progress_callback:
+                    progress_callback(completed, len(devices))
+        
+        self.logger.info(f"SSH banners identified {identified}/{len(devices)} device(s)")
+        return devices
+    
+    def resolve_hostnames(self, devices: List[Device], progress_callback=None) -> List[Device]:
+        """
+        Name devices from reverse DNS (PTR records).
+        
+        Only devices without a hostname are looked up, so names from SNMP
+        or an SSH login are kept. Answers are cached for their DNS TTL
+        (negative answers too), so rescans do not query again.
+        
+        Args:
+            devices: Devices to name (updated in place)
+            progress_callback: Optional callback function for progress updates
+            
+        Returns:
+            The same list of devices
+        """
+        unnamed = [device for device in devices if not device.hostname]
+        if not unnamed or not self.reverse_dns:
+            return devices
+        
+        self.logger.info(f"Resolving hostnames of {len(unnamed)} device(s) via reverse DNS...")
+        
+        try:
+            asyncio.run(self.aresolve_hostnames(unnamed, progress_callback))
+        except Exception as e:
+            self.logger.error(f"Error during reverse DNS lookup: {e}")
+        
+        return devices
+    
+    async def aresolve_hostnames(self, devices: List[Device], progress_callback=None) -> List[Device]:
+        """
+        Async variant of resolve_hostnames for use on a running event loop.
+        
+        Args:
+            devices: Devices to name (updated in place)
+            progress_callback: Optional callback function for progress updates
+            
+        Returns:
+            The same list of devices
+        """
+        resolver = ReverseResolver(
+            nameservers=self.dns_servers,
+            timeout=self.dns_timeout,
+            max_concurrency=self.dns_max_concurrency,
+            cache=self.dns_cache
+        )
+        
+        async def resolve(device: Device) -> bool:
+            name = await resolver.resolve(device.ip_address)
+            if not name:
+                return False
+            self._apply_fingerprint(device, {'hostname': name})
+            return True
+        
+        async with resolver:
+            tasks = [asyncio.ensure_future(resolve(device)) for device in devices]
+            
+            named = 0
+            for completed, task in enumerate(asyncio.as_completed(tasks), 1):
+                try:
+                    if await task:
+                        named += 1
+                except Exception as e:
+                    self.logger.debug(f"Reverse DNS error: {e}")
+                
+                if progress_callback:
+                    progress_callback(completed, len(devices))
+        
+        self.logger.info(
+            f"Reverse DNS named {named}/{len(devices)} device(s) with {resolver.queries_sent} query(ies)"
+        )
+        return devices
+    
+    def identify_by_mac(self, devices: List[Device], neighbors: Optional[Dict[str, str]] = None) -> List[Device]:
+        """
+        Guess vendors from MAC addresses, without contacting the devices.
+        
+        MACs come from this host's ARP/neighbor cache, from `neighbor_table`
+        (filled by 'show arp' in the connectivity workflow) and from
+        `neighbors`. Each device gets its mac_address and, if its vendor is
+        still unknown, the vendor registered for the MAC's OUI. Run it after
+        SNMP and SSH banner identification, which are more specific.
+        
+        Args:
+            devices: Devices to identify (updated in place)
+            neighbors: Optional extra IP -> MAC entries
+            
+        Returns:
+            The same list of devices
+        """
+        if not devices:
+            return devices
+        
+        try:
+            table = read_local_neighbors()
+            table.update(self.neighbor_table)
+            table.update(neighbors or {})
+            oui = self._get_oui_database()
+            
+            identified = 0
+            for device in devices:
+                mac = table.get(device.ip_address)
+                if not mac:
+                    continue
+                device.mac_address = mac
+                vendor = oui.lookup(mac) if oui else None
+                if vendor:
+                    self._apply_fingerprint(device, {'vendor': vendor})
+                    identified += 1
+            
+            self.logger.info(f"OUI lookup identified {identified}/{len(devices)} device(s)")
+        
+        except Exception as e:
+            self.logger.error(f"Error during OUI lookup: {e}")
+        
+        return devices
+    
+    def _get_oui_database(self) -> Optional[OuiDatabase]:
+        """
+        Open the OUI trie on first use, compiling it from the registry if
+        it is missing or older than the registry file.
+        
+        Returns:
+            OuiDatabase, or None when neither file is available
+        """
+        if self._oui is not None or self._oui_unavailable:
+            return self._oui
+        
+        database = Path(self.oui_database)
+        registry = Path(self.oui_registry)
+        
+        try:
+            if registry.exists() and (
+                not database.exists() or database.stat().st_mtime < registry.stat().st_mtime
+            ):
+                count = build_oui_trie([registry], database)
+                self.logger.info(f"Compiled {count} OUI assignments into {database}")
+            
+            if database.exists():
+                self._oui = OuiDatabase(database)
+            else:
+                self.logger.warning(
+                    f"No OUI registry at {registry}; MAC addresses are recorded without vendors"
+                )
+                self._oui_unavailable = True
+        
+        except Exception as e:
+            self.logger.error(f"Error opening OUI database: {e}")
+            self._oui_unavailable = True
+        
+        return self._oui
+    
+    def merge_multihomed(self, devices: List[Device]) -> List[Device]:
+        """
+        Collapse devices found under several addresses into one each.
+        
+        Devices sharing a serial number, SNMP engine ID or SSH host key are
+        merged into one canonical device whose alias_ips lists the other
+        addresses, so a router with a dozen loopbacks and SVIs is backed up
+        and diagnosed once. A shared sysName alone never merges devices.
+        Run it after fingerprint_devices and grab_ssh_banners, which supply
+        the identifiers before anyone logs in.
+        
+        Args:
+            devices: Devices to merge
+            
+        Returns:
+            New list with one device per physical device, in input order
+        """
+        try:
+            merged = merge_devices(devices)
+        except Exception as e:
+            self.logger.error(f"Error merging multi-homed devices: {e}")
+            return devices
+        
+        if len(merged) < len(devices):
+            self.logger.info(f"Merged {len(devices)} address(es) into {len(merged)} device(s)")
+        return merged
+    
+    def _apply_fingerprint(self, device: Device, attributes: Dict[str, Optional[str]]) -> None:
+        """Fill device attributes that are still unknown"""
+        for name, value in attributes.items():
+            if value and not getattr(device, name):
+                setattr(device, name, value)
+    
+    def identify_device(self, device: Device, connection_manager) -> Device:
+        """
+        Identify and enrich a device from one 'show version'.
+        
+        Vendor, model, OS version, uptime and (where the output carries it)
+        hostname all come from a single command; a hostname query is only
+        sent to Cisco devices whose output did not name them. Commands go
+        through the connection manager, so a 'show version' that a workflow
+        ran moments ago is served from its command cache.
         
         Args:
             device: Device object
-            connection: Active connection to device
+            connection_manager: ConnectionManager holding the device's session
             
         Returns:
             Updated Device object
         """
         try:
-            # Get hostname
-            if device.vendor == 'Cisco':
-                hostname_output = connection.send_command("show running-config | include hostname")
-                if hostname_output:
+            success, output = connection_manager.execute_command(device, "show version", timeout=10)
+            if not success:
+                self.logger.error(f"Error identifying device {device.ip_address}: {output}")
+                return device
+            info = parse_show_version(output)
+            
+            if info['vendor']:
+                device.vendor = info['vendor']
+                self.logger.info(f"Identified {device.ip_address} as {device.vendor}")
+            
+            for name in ('model', 'os_version', 'uptime', 'hostname'):
+                if info[name]:
+                    setattr(device, name, info[name])
+            
+            if not info['hostname'] and device.vendor == 'Cisco':
+                success, hostname_output = connection_manager.execute_command(
+                    device, "show running-config | include hostname"
+                )
+                if success and hostname_output:
                     parts = hostname_output.split()
                     if len(parts) >= 2:
                         device.hostname = parts[1]
             
-            # Get uptime (basic implementation)
-            version_output = connection.send_command("show version")
-            for line in version_output.split('\n'):
-                if 'uptime' in line.lower():
-                    device.uptime = line.strip()
-                    break
-            
             self.logger.info(f"Enriched device info for {device.ip_address}")
             return device
         
         except Exception as e:
-            self.logger.error(f"Error enriching device info for {device.ip_address}: {e}")
+            self.logger.error(f"Error identifying device {device.ip_address}: {e}")
             return device
+    
+    def identify_device_vendor(self, device: Device, connection_manager) -> Device:
+        """Identify device vendor and type; same pipeline as identify_device"""
+        return self.identify_device(device, connection_manager)
+    
+    def enrich_device_info(self, device: Device, connection_manager) -> Device:
+        """Enrich device information; same pipeline as identify_device"""
+        return self.identify_device(device, connection_manager)
+
+
+class _TargetTracker:
+    """
+    Per-target progress accounting for a merged multi-target sweep.
+    
+    The address space is cut at every target boundary into disjoint
+    segments, each knowing which targets cover it, so an address is
+    attributed to all of its targets with one binary search. Excluded
+    addresses are never probed, so they only reduce the totals.
+    """
+    
+    def __init__(self, targets: List[str], excludes: Optional[List[str]] = None):
+        ranges = [parse_target(t) for t in targets]
+        excluded = IPRangeSet(parse_target(t, hosts_only=False) for t in excludes or [])
+        
+        self.totals = [0] * len(targets)
+        self.completed = [0] * len(targets)
+        self.found = [0] * len(targets)
+        
+        # version -> (segment starts, segment ends, owning target indices)
+        self._segments: Dict[int, Tuple[List[int], List[int], List[List[int]]]] = {}
+        
+        for version in (4, 6):
+            # One sweep over the sorted target boundaries: +idx where a target
+            # starts, -idx just past where it ends
+            events = sorted(
+                event
+                for idx, (v, first, last) in enumerate(ranges) if v == version
+                for event in ((first, 1, idx), (last + 1, -1, idx))
+            )
+            excluded_count = self._overlap_counter([
+                (first, last) for v, first, last in excluded.ranges() if v == version
+            ])
+            
+            starts, ends, owners = [], [], []
+            active: Set[int] = set()
+            pos = 0
+            while pos < len(events):
+                seg_start = events[pos][0]
+                while pos < len(events) and events[pos][0] == seg_start:
+                    _, kind, idx = events[pos]
+                    if kind > 0:
+                        active.add(idx)
+                    else:
+                        active.discard(idx)
+                    pos += 1
+                
+                if not active or pos == len(events):
+                    continue
+                covering = sorted(active)
+                seg_end = events[pos][0] - 1
+                starts.append(seg_start)
+                ends.append(seg_end)
+                owners.append(covering)
+                
+                size = seg_end - seg_start + 1 - excluded_count(seg_start, seg_end)
+                for idx in covering:
+                    self.totals[idx] += size
+            
+            self._segments[version] = (starts, ends, owners)
+    
+    @staticmethod
+    def _overlap_counter(intervals: List[Tuple[int, int]]) -> Callable[[int, int], int]:
+        """
+        Counter of how many addresses of [first, last] fall in sorted,
+        disjoint intervals, answering each query with two binary searches.
+        """
+        interval_starts = [first for first, _ in intervals]
+        interval_ends = [last for _, last in intervals]
+        cumulative = [0]
+        for first, last in intervals:
+            cumulative.append(cumulative[-1] + last - first + 1)
+        
+        def count(first: int, last: int) -> int:
+            hi = bisect.bisect_right(interval_starts, last) - 1
+            lo = bisect.bisect_left(interval_ends, first)
+            if hi < lo:
+                return 0
+            return (
+                cumulative[hi + 1] - cumulative[lo]
+                - max(0, first - interval_starts[lo])
+                - max(0, interval_ends[hi] - last)
+            )
+        
+        return count
+    
+    def record(self, ip: str, found: bool) -> List[int]:
+        """
+        Count a completed probe against every target covering the address.
+        
+        Returns:
+            Indices of the targets that were updated
+        """
+        address = ipaddress.ip_address(ip)
+        starts, ends, owners = self._segments[address.version]
+        value = int(address)
+        
+        idx = bisect.bisect_right(starts, value) - 1
+        if idx < 0 or value > ends[idx]:
+            return []
+        
+        for target_idx in owners[idx]:
+            self.completed[target_idx] += 1
+            if found:
+                self.found[target_idx] += 1
+        
+        return owners[idx]
@@ -0,0 +1,290 @@
+"""
+Fingerprints
+Vendor, model and OS identification tables
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from engines.snmp_prober import (
+    ENT_PHYSICAL_SERIAL, SYS_DESCR, SYS_OBJECT_ID, SYS_UPTIME, SYS_NAME, SNMP_ENGINE_ID
+)
+
+
+# IANA private enterprise numbers (1.3.6.1.4.1.<n>) of common network vendors.
+# Vendor names match DESCRIPTION_VENDORS, SSH_BANNERS and the OUI lookup,
+# so a device gets the same vendor whichever probe identified it; Aruba
+# and ProCurve are HPE brands and report as 'HP'.
+ENTERPRISE_VENDORS = {
+    9: 'Cisco',
+    11: 'HP',
+    2011: 'Huawei',
+    2636: 'Juniper',
+    4526: 'Netgear',
+    12356: 'Fortinet',
+    14823: 'HP',  # Aruba
+    14988: 'MikroTik',
+    25461: 'Palo Alto',
+    25506: 'HP',
+    30065: 'Arista',
+    41112: 'Ubiquiti',
+}
+
+ENTERPRISES_PREFIX = '1.3.6.1.4.1.'
+
+# Vendor keywords in free-text descriptions, in priority order
+DESCRIPTION_VENDORS = [
+    ('Cisco', r'cisco|ios-xe|ios-xr|nx-os|\bios\b'),
+    ('Juniper', r'juniper|junos'),
+    ('HP', r'\bhpe?\b|procurve|aruba'),
+    ('Huawei', r'huawei|\bvrp\b'),
+    ('MikroTik', r'mikrotik|routeros'),
+    ('Ubiquiti', r'ubiquiti|edgeos'),
+    ('Arista', r'arista'),
+]
+
+# All vendors in one alternation: text is scanned once, and the
+# highest-priority vendor seen wins
+_VENDOR_REGEX = re.compile(
+    '|'.join(f'(?P<v{idx}>{pattern})' for idx, (_, pattern) in enumerate(DESCRIPTION_VENDORS)),
+    re.IGNORECASE
+)
+
+# Model and OS version extraction from sysDescr, per vendor
+SYSDESCR_MODEL = {
+    'Cisco': re.compile(r'Software,?\s+\(?([A-Za-z0-9]+[-A-Za-z0-9]*?)\)?\s+Software', re.IGNORECASE),
+    'Juniper': re.compile(r'Inc\.\s+(\S+)', re.IGNORECASE),
+    'MikroTik': re.compile(r'RouterOS\s+(\S+)', re.IGNORECASE),
+    'Arista': re.compile(r'Arista Networks\s+\S+\s+\S+\s+running on an Arista Networks\s+(\S+)', re.IGNORECASE),
+}
+
+SYSDESCR_VERSION = {
+    'Juniper': re.compile(r'JUNOS\s+([^\s,]+)', re.IGNORECASE),
+    'Huawei': re.compile(r'Version\s+\S+\s+\(?\s*([^\s)]+)', re.IGNORECASE),
+    'Arista': re.compile(r'EOS version\s+([^\s,]+)', re.IGNORECASE),
+}
+
+GENERIC_VERSION = re.compile(r'[Vv]ersion\s+([^\s,]+)')
+
+# 'show version' line patterns (multiline), compiled once
+SHOW_VERSION_CISCO_MODEL = re.compile(r'^\s*cisco\s+(\S+).*(?:bytes|processor)', re.IGNORECASE | re.MULTILINE)
+SHOW_VERSION_CISCO_OS = re.compile(r'^(?=.*version)(?=.*(?:ios|nx-os)).*$', re.IGNORECASE | re.MULTILINE)
+SHOW_VERSION_MODEL = re.compile(r'^\s*Model:\s*(\S+)', re.IGNORECASE | re.MULTILINE)
+SHOW_VERSION_HOSTNAME = re.compile(r'^\s*Hostname:\s*(\S+)', re.IGNORECASE | re.MULTILINE)
+SHOW_VERSION_JUNOS = re.compile(r'^\s*Junos:\s*(\S+)', re.IGNORECASE | re.MULTILINE)
+SHOW_VERSION_UPTIME = re.compile(r'^.*uptime.*$', re.IGNORECASE | re.MULTILINE)
+SHOW_VERSION_UPTIME_HOST = re.compile(r'^\s*(\S+)\s+uptime is', re.IGNORECASE)
+
+SHOW_VERSION_CACHE_SIZE = 4096
+
+_show_version_cache: 'OrderedDict[bytes, Dict[str, Optional[str]]]' = OrderedDict()
+_show_version_lock = threading.Lock()
+
+# SSH identification strings: (pattern, vendor, Netmiko device_type)
+SSH_BANNERS = [
+    (r'SSH-[\d.]+-Cisco-', 'Cisco', 'cisco_ios'),
+    (r'SSH-[\d.]+-ROSSSH', 'MikroTik', 'mikrotik_routeros'),
+    (r'SSH-[\d.]+-HUAWEI-', 'Huawei', 'huawei'),
+    (r'SSH-[\d.]+-Comware-', 'HP', 'hp_comware'),
+    (r'SSH-[\d.]+-Mocana SSH', 'HP', 'hp_procurve'),
+    (r'SSH-[\d.]+-NetScreen', 'Juniper', 'juniper_screenos'),
+    (r'SSH-[\d.]+-FortiSSH', 'Fortinet', 'fortinet'),
+    (r'SSH-[\d.]+-ArubaOS', 'HP', 'aruba_os'),
+]
+
+# One alternation, so a banner is classified in a single regex pass
+_SSH_BANNER_REGEX = re.compile(
+    '|'.join(f'(?P<b{idx}>{pattern})' for idx, (pattern, _, _) in enumerate(SSH_BANNERS))
+)
+
+
+def vendor_from_object_id(object_id: Optional[str]) -> Optional[str]:
+    """
+    Map a sysObjectID to a vendor via its enterprise number.
+
+    Args:
+        object_id: sysObjectID value
+
+    Returns:
+        Vendor name or None
+    """
+    if not object_id or not str(object_id).startswith(ENTERPRISES_PREFIX):
+        return None
+
+    enterprise = str(object_id)[len(ENTERPRISES_PREFIX):].split('.', 1)[0]
+    return ENTERPRISE_VENDORS.get(int(enterprise)) if enterprise.isdigit() else None
+
+
+def vendor_from_description(text: Optional[str]) -> Optional[str]:
+    """
+    Guess a vendor from free text such as sysDescr.
+
+    Args:
+        text: Description text
+
+    Returns:
+        Vendor name or None
+    """
+    if not text:
+        return None
+
+    best = None
+    for match in _VENDOR_REGEX.finditer(text):
+        idx = int(match.lastgroup[1:])
+        if best is None or idx < best:
+            best = idx
+            if best == 0:
+                break
+
+    return DESCRIPTION_VENDORS[best][0] if best is not None else None
+
+
+def fingerprint_ssh_banner(banner: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Classify an SSH identification string.
+
+    Args:
+        banner: Identification string, e.g. 'SSH-2.0-Cisco-1.25'
+
+    Returns:
+        Tuple of (vendor, Netmiko device_type), or None if unrecognised
+    """
+    if not banner:
+        return None
+
+    match = _SSH_BANNER_REGEX.match(banner)
+    if not match:
+        return None
+
+    _, vendor, device_type = SSH_BANNERS[int(match.lastgroup[1:])]
+    return vendor, device_type
+
+
+def parse_show_version(output: str) -> Dict[str, Optional[str]]:
+    """
+    Extract device attributes from 'show version' output.
+
+    Results are memoized by a digest of the output, so devices running the
+    same image with the same output skip the regex work entirely.
+
+    Args:
+        output: Command output
+
+    Returns:
+        Dict with 'vendor', 'model', 'os_version', 'hostname' and 'uptime'
+        (values None when not found). Callers must not mutate it.
+    """
+    key = hashlib.blake2b(output.encode('utf-8', errors='replace'), digest_size=16).digest()
+
+    with _show_version_lock:
+        cached = _show_version_cache.get(key)
+        if cached is not None:
+            _show_version_cache.move_to_end(key)
+            return cached
+
+    result = _parse_show_version(output)
+
+    with _show_version_lock:
+        _show_version_cache[key] = result
+        if len(_show_version_cache) > SHOW_VERSION_CACHE_SIZE:
+            _show_version_cache.popitem(last=False)
+
+    return result
+
+
+def _parse_show_version(output: str) -> Dict[str, Optional[str]]:
+    """Uncached body of parse_show_version"""
+    vendor = vendor_from_description(output)
+    model = None
+    os_version = None
+    hostname = None
+
+    if vendor == 'Cisco':
+        match = SHOW_VERSION_CISCO_MODEL.search(output)
+        if match:
+            model = match.group(1)
+
+        match = SHOW_VERSION_CISCO_OS.search(output)
+        if match:
+            os_version = match.group(0).strip()
+
+    else:
+        match = SHOW_VERSION_MODEL.search(output)
+        if match:
+            model = match.group(1)
+
+        match = SHOW_VERSION_JUNOS.search(output)
+        if match:
+            os_version = match.group(1)
+
+    match = SHOW_VERSION_HOSTNAME.search(output)
+    if match:
+        hostname = match.group(1)
+
+    uptime = None
+    match = SHOW_VERSION_UPTIME.search(output)
+    if match:
+        uptime = match.group(0).strip()
+        # Cisco prints '<hostname> uptime is ...'
+        host_match = SHOW_VERSION_UPTIME_HOST.match(uptime)
+        if host_match and not hostname:
+            hostname = host_match.group(1)
+
+    return {
+        'vendor': vendor,
+        'model': model,
+        'os_version': os_version,
+        'hostname': hostname,
+        'uptime': uptime,
+    }
+
+
+def fingerprint_snmp(values: Dict) -> Dict[str, Optional[str]]:
+    """
+    Derive device attributes from MIB-2 system group values.
+
+    Args:
+        values: Dict of oid -> value as returned by SnmpProber.get
+
+    Returns:
+        Dict with 'vendor', 'model', 'os_version', 'hostname', 'uptime',
+        'sys_name', 'snmp_engine_id' (hex) and 'serial_number' (chassis
+        serial from the ENTITY-MIB)
+    """
+    descr = values.get(SYS_DESCR) or ''
+    descr = descr.strip() if isinstance(descr, str) else ''
+
+    vendor = vendor_from_object_id(values.get(SYS_OBJECT_ID)) or vendor_from_description(descr)
+
+    model = None
+    if vendor in SYSDESCR_MODEL:
+        match = SYSDESCR_MODEL[vendor].search(descr)
+        if match:
+            model = match.group(1)
+
+    version_pattern = SYSDESCR_VERSION.get(vendor, GENERIC_VERSION)
+    match = version_pattern.search(descr) or GENERIC_VERSION.search(descr)
+    os_version = match.group(1).rstrip(',') if match else None
+
+    hostname = values.get(SYS_NAME)
+    hostname = hostname.strip() if isinstance(hostname, str) and hostname.strip() else None
+    uptime = values.get(SYS_UPTIME)
+    engine_id = values.get(SNMP_ENGINE_ID)
+    if isinstance(engine_id, str):
+        engine_id = engine_id.encode('utf-8')
+    serial = values.get(ENT_PHYSICAL_SERIAL)
+    serial = serial.strip() if isinstance(serial, str) and serial.strip() else None
+
+    return {
+        'vendor': vendor,
+        'model': model,
+        'os_version': os_version,
+        'hostname': hostname,
+        'uptime': str(uptime) if uptime is not None else None,
+        'sys_name': hostname,
+        'snmp_engine_id': engine_id.hex() if engine_id else None,
+        'serial_number': serial,
+    }
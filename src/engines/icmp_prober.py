@@ -0,0 +1,310 @@
+"""
+ICMP Prober
+In-process ICMP echo probing on a single socket driven by asyncio
+"""
+
+import asyncio
+import errno
+import logging
+import os
+import socket
+import struct
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+# Linux raw-socket option: bitmask of ICMP types the kernel should drop
+SOL_RAW = 255
+ICMP_FILTER = 1
+
+RECEIVE_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def icmp_checksum(data: bytes) -> int:
+    """
+    Compute the RFC 1071 internet checksum.
+
+    Args:
+        data: Bytes to checksum
+
+    Returns:
+        16-bit checksum
+    """
+    if len(data) % 2:
+        data += b'\x00'
+
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+
+    return ~total & 0xFFFF
+
+
+def build_echo_request(ident: int, sequence: int, payload: bytes = b'SNATT-PROBE') -> bytes:
+    """
+    Build an ICMP echo request packet.
+
+    Args:
+        ident: Echo identifier
+        sequence: Echo sequence number
+        payload: Echo payload
+
+    Returns:
+        Packet bytes with checksum filled in
+    """
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, sequence)
+    checksum = icmp_checksum(header + payload)
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, ident, sequence)
+    return header + payload
+
+
+class IcmpProber:
+    """
+    Sends ICMP echo requests from one socket and matches replies by id/sequence.
+
+    Works with an unprivileged datagram ICMP socket where the OS allows it
+    (Linux ``net.ipv4.ping_group_range``, macOS) and with a raw socket
+    otherwise. IPv4 only. Use as an async context manager inside a running
+    event loop:
+
+        async with IcmpProber() as prober:
+            rtt = await prober.ping('192.168.1.1', timeout=1.0)
+
+    Requests are queued and flushed in batches once per event loop
+    iteration, so thousands of probes can be in flight at once while only
+    one file descriptor is used.
+    """
+
+    def __init__(self, batch_size: int = 256):
+        self.logger = logging.getLogger(__name__)
+        self.batch_size = batch_size
+
+        self._sock: Optional[socket.socket] = None
+        self._raw = False
+        self._ident = (os.getpid() ^ id(self)) & 0xFFFF
+        self._sequence = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # (ip, sequence) -> (future, send time, timeout handle)
+        self._pending: Dict[Tuple[str, int], list] = {}
+        self._send_queue: deque = deque()
+        self._flush_scheduled = False
+        self._writer_registered = False
+
+    @staticmethod
+    def open_socket() -> Tuple[socket.socket, bool]:
+        """
+        Open an ICMP socket, preferring the unprivileged datagram variant.
+
+        Returns:
+            Tuple of (socket, is_raw)
+
+        Raises:
+            PermissionError: If neither socket type is permitted
+        """
+        for sock_type, is_raw in ((socket.SOCK_DGRAM, False), (socket.SOCK_RAW, True)):
+            try:
+                sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+            except PermissionError:
+                continue
+            except OSError as e:
+                if e.errno in (errno.EPERM, errno.EACCES, errno.EPROTONOSUPPORT):
+                    continue
+                raise
+
+            sock.setblocking(False)
+
+            # Replies arrive in bursts; a small buffer silently drops them
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_SIZE)
+            except OSError:
+                pass
+
+            if is_raw:
+                # Only deliver echo replies, not every ICMP packet on the host
+                try:
+                    sock.setsockopt(SOL_RAW, ICMP_FILTER, struct.pack('I', ~(1 << ICMP_ECHO_REPLY) & 0xFFFFFFFF))
+                except OSError:
+                    pass
+
+            return sock, is_raw
+
+        raise PermissionError("No permission to open an ICMP socket")
+
+    async def __aenter__(self) -> 'IcmpProber':
+        self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """Open the socket and attach it to the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._sock, self._raw = self.open_socket()
+
+        try:
+            self._loop.add_reader(self._sock.fileno(), self._on_readable)
+        except NotImplementedError:
+            # Proactor loops (Windows) have no readiness callbacks
+            self._sock.close()
+            self._sock = None
+            raise PermissionError("Event loop does not support raw socket readers")
+
+        self.logger.debug(f"ICMP prober opened ({'raw' if self._raw else 'datagram'} socket)")
+
+    def close(self) -> None:
+        """Detach from the loop, close the socket and fail pending probes"""
+        if self._sock is None:
+            return
+
+        fd = self._sock.fileno()
+        self._loop.remove_reader(fd)
+        if self._writer_registered:
+            self._loop.remove_writer(fd)
+            self._writer_registered = False
+
+        self._sock.close()
+        self._sock = None
+
+        for future, _, handle in self._pending.values():
+            if handle:
+                handle.cancel()
+            if not future.done():
+                future.set_result(None)
+        self._pending.clear()
+        self._send_queue.clear()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of probes awaiting a reply"""
+        return len(self._pending)
+
+    async def ping(self, ip: str, timeout: float = 1.0) -> Optional[float]:
+        """
+        Send one echo request and wait for the matching reply.
+
+        Args:
+            ip: IPv4 address to probe
+            timeout: Seconds to wait for the reply
+
+        Returns:
+            Round-trip time in seconds, or None if no reply arrived in time
+        """
+        if self._sock is None:
+            raise RuntimeError("ICMP prober is not open")
+
+        self._sequence = (self._sequence + 1) & 0xFFFF
+        sequence = self._sequence
+        key = (ip, sequence)
+
+        future = self._loop.create_future()
+        handle = self._loop.call_later(timeout, self._expire, key)
+        self._pending[key] = [future, None, handle]
+
+        self._send_queue.append((ip, sequence, build_echo_request(self._ident, sequence)))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush)
+
+        try:
+            return await future
+        finally:
+            entry = self._pending.pop(key, None)
+            if entry and entry[2]:
+                entry[2].cancel()
+
+    def _expire(self, key: Tuple[str, int]) -> None:
+        """Resolve a probe as unanswered when its deadline passes"""
+        entry = self._pending.get(key)
+        if entry and not entry[0].done():
+            entry[0].set_result(None)
+
+    def _flush(self) -> None:
+        """Send queued echo requests, up to batch_size per loop iteration"""
+        self._flush_scheduled = False
+        if self._sock is None:
+            return
+
+        sent = 0
+        while self._send_queue and sent < self.batch_size:
+            ip, sequence, packet = self._send_queue[0]
+            entry = self._pending.get((ip, sequence))
+
+            if entry is None or entry[0].done():
+                self._send_queue.popleft()
+                continue
+
+            try:
+                self._sock.sendto(packet, (ip, 0))
+            except (BlockingIOError, InterruptedError):
+                # Socket buffer full: resume once it drains
+                if not self._writer_registered:
+                    self._loop.add_writer(self._sock.fileno(), self._on_writable)
+                    self._writer_registered = True
+                return
+            except OSError as e:
+                self.logger.debug(f"ICMP send to {ip} failed: {e}")
+                entry[0].set_result(None)
+                self._send_queue.popleft()
+                continue
+
+            entry[1] = time.perf_counter()
+            self._send_queue.popleft()
+            sent += 1
+
+        if self._send_queue and not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush)
+
+    def _on_writable(self) -> None:
+        """Socket buffer has room again"""
+        self._loop.remove_writer(self._sock.fileno())
+        self._writer_registered = False
+        self._flush()
+
+    def _on_readable(self) -> None:
+        """Drain every datagram currently queued on the socket"""
+        now = time.perf_counter()
+
+        while True:
+            try:
+                data, address = self._sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                self.logger.debug(f"ICMP receive error: {e}")
+                return
+
+            reply = self._parse_reply(data)
+            if reply is None:
+                continue
+
+            ident, sequence = reply
+            if self._raw and ident != self._ident:
+                continue
+
+            entry = self._pending.get((address[0], sequence))
+            if entry and entry[1] is not None and not entry[0].done():
+                entry[0].set_result(now - entry[1])
+
+    def _parse_reply(self, data: bytes) -> Optional[Tuple[int, int]]:
+        """
+        Extract (identifier, sequence) from an echo reply.
+
+        Raw sockets deliver the IP header; datagram sockets do not.
+        """
+        offset = (data[0] & 0x0F) * 4 if self._raw and data else 0
+
+        if len(data) < offset + 8:
+            return None
+
+        icmp_type, _, _, ident, sequence = struct.unpack_from('!BBHHH', data, offset)
+        if icmp_type != ICMP_ECHO_REPLY:
+            return None
+
+        return ident, sequence
@@ -0,0 +1,170 @@
+"""
+Device Identity
+Merging of multi-homed devices discovered under several addresses
+"""
+
+import ipaddress
+from typing import Dict, List, Tuple
+
+from models.device import Device, DeviceStatus, DeviceType
+
+
+# Strong identifiers, strongest first; a weaker match never merges devices
+# whose stronger identifiers disagree. sysName is deliberately absent:
+# administrators reuse names, so a shared name alone is no evidence.
+IDENTITY_ATTRIBUTES = ('serial_number', 'snmp_engine_id', 'ssh_host_key')
+
+# Factory-default or placeholder values that many unrelated devices share
+GENERIC_VALUES = {
+    'serial_number': {'', 'n/a', 'na', 'none', 'unknown', '0', '1234567890'},
+}
+
+# Attributes copied from merged addresses when the canonical device lacks them
+FILL_ATTRIBUTES = (
+    'hostname',
+    'vendor',
+    'model',
+    'os_version',
+    'serial_number',
+    'credential_name',
+    'ssh_banner',
+    'netmiko_device_type',
+    'uptime',
+    'sys_name',
+    'snmp_engine_id',
+    'ssh_host_key',
+)
+
+
+def identity_keys(device: Device) -> Dict[str, str]:
+    """
+    Normalized strong identifiers of a device.
+
+    Returns:
+        Dict of attribute -> value for every usable identifier
+    """
+    keys = {}
+    for name in IDENTITY_ATTRIBUTES:
+        value = getattr(device, name, None)
+        if not value:
+            continue
+        value = str(value).strip()
+        if name == 'serial_number':
+            value = value.upper()
+        if value.lower() in GENERIC_VALUES.get(name, ()):
+            continue
+        keys[name] = value
+    return keys
+
+
+def _canonical_rank(device: Device, position: int) -> Tuple:
+    """Sort key choosing the address a merged device is managed through"""
+    return (
+        device.status != DeviceStatus.CONNECTED,
+        not device.credential_name,
+        device.ssh_port not in device.open_ports if device.open_ports else True,
+        position,
+    )
+
+
+def _address_key(ip: str) -> Tuple:
+    """Sort key ordering addresses numerically"""
+    try:
+        address = ipaddress.ip_address(ip)
+        return address.version, int(address)
+    except ValueError:
+        return 7, ip
+
+
+def _merge_cluster(members: List[Tuple[int, Device]]) -> Device:
+    """Fold a cluster of addresses into its canonical device"""
+    _, canonical = min(members, key=lambda member: _canonical_rank(member[1], member[0]))
+    aliases = set(canonical.alias_ips)
+
+    for _, device in members:
+        if device is canonical:
+            continue
+
+        for name in FILL_ATTRIBUTES:
+            value = getattr(device, name)
+            if value and not getattr(canonical, name):
+                setattr(canonical, name, value)
+
+        if canonical.device_type == DeviceType.UNKNOWN:
+            canonical.device_type = device.device_type
+        if device.response_time is not None and (
+            canonical.response_time is None or device.response_time < canonical.response_time
+        ):
+            canonical.response_time = device.response_time
+
+        canonical.open_ports = sorted(set(canonical.open_ports) | set(device.open_ports))
+        for tag in device.tags:
+            canonical.add_tag(tag)
+
+        aliases.add(device.ip_address)
+        aliases.update(device.alias_ips)
+
+    aliases.discard(canonical.ip_address)
+    canonical.alias_ips = sorted(aliases, key=_address_key)
+    return canonical
+
+
+def merge_devices(devices: List[Device]) -> List[Device]:
+    """
+    Cluster devices by strong identifiers and merge each cluster.
+
+    Every identifier value goes into a hash index, so clustering is linear
+    in the number of devices. Clusters are joined with union-find; a join
+    is refused when the two clusters already carry different values for
+    an identifier, so e.g. two chassis sharing a cloned SSH host key but
+    reporting different serials stay apart.
+
+    Args:
+        devices: Discovered devices (canonical devices are updated in place)
+
+    Returns:
+        One device per cluster, in order of first appearance. The
+        canonical device is the connected one, else one with credentials,
+        else one with SSH open, else the first found; the other
+        addresses become its alias_ips.
+    """
+    parent = list(range(len(devices)))
+    device_keys = [identity_keys(device) for device in devices]
+    # Identifiers of each cluster, kept at its root
+    identities: List[Dict[str, str]] = [dict(keys) for keys in device_keys]
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            return
+        first, second = identities[root_i], identities[root_j]
+        if any(first[name] != second[name] for name in first.keys() & second.keys()):
+            return
+        if root_j < root_i:
+            root_i, root_j, first, second = root_j, root_i, second, first
+        parent[root_j] = root_i
+        for name, value in second.items():
+            first.setdefault(name, value)
+
+    for name in IDENTITY_ATTRIBUTES:
+        index: Dict[str, int] = {}
+        for i, keys in enumerate(device_keys):
+            value = keys.get(name)
+            if value is not None:
+                union(index.setdefault(value, i), i)
+
+    clusters: Dict[int, List[Tuple[int, Device]]] = {}
+    for i, device in enumerate(devices):
+        clusters.setdefault(find(i), []).append((i, device))
+
+    return [
+        _merge_cluster(members) if len(members) > 1 else members[0][1]
+        for members in clusters.values()
+    ]
+
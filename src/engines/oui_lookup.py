@@ -0,0 +1,317 @@
+"""
+OUI Lookup
+MAC address vendor identification from ARP/neighbor tables
+"""
+
+import csv
+import ipaddress
+import logging
+import mmap
+import os
+import platform
+import re
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+# Registry organisation names mapped onto the vendor names used elsewhere,
+# in priority order; other organisations keep their registered name
+ORGANIZATION_VENDORS = [
+    ('Cisco', r'cisco|meraki'),
+    ('Juniper', r'juniper'),
+    ('HP', r'hewlett|\bhpe?\b|aruba|procurve'),
+    ('Huawei', r'huawei'),
+    ('MikroTik', r'mikrotik|routerboard'),
+    ('Ubiquiti', r'ubiquiti'),
+    ('Arista', r'arista'),
+    ('Fortinet', r'fortinet'),
+    ('Palo Alto', r'palo alto'),
+    ('Netgear', r'netgear'),
+]
+
+_ORGANIZATION_REGEX = [(vendor, re.compile(pattern, re.IGNORECASE)) for vendor, pattern in ORGANIZATION_VENDORS]
+
+# MAC address notations: aa:bb:cc:dd:ee:ff, aa-bb-cc-dd-ee-ff, aabb.ccdd.eeff
+_MAC_REGEX = re.compile(
+    r'(?:[0-9A-Fa-f]{1,2}[:-]){5}[0-9A-Fa-f]{1,2}|(?:[0-9A-Fa-f]{4}\.){2}[0-9A-Fa-f]{4}'
+)
+
+# Assignment lengths in hex digits: MA-L (24 bit), MA-M (28 bit), MA-S (36 bit)
+ASSIGNMENT_DIGITS = (6, 7, 9)
+
+# Trie file layout: header, nodes, vendor offsets, vendor names (UTF-8)
+TRIE_MAGIC = b'OUIT'
+TRIE_VERSION = 1
+_HEADER = struct.Struct('<4sHII')  # magic, version, node count, vendor count
+_NODE = struct.Struct('<HII')      # child bitmap, first child index, vendor number (0 = none)
+_OFFSET = struct.Struct('<I')
+
+
+def normalize_mac(value: str) -> Optional[str]:
+    """
+    Canonical form of a MAC address.
+
+    Args:
+        value: MAC in colon, dash or Cisco dotted notation
+
+    Returns:
+        Lower-case colon-separated MAC, or None if the value is not a MAC
+    """
+    value = value.strip()
+    if not _MAC_REGEX.fullmatch(value):
+        return None
+    if '.' in value:
+        digits = value.replace('.', '')
+    else:
+        digits = ''.join(part.zfill(2) for part in re.split('[:-]', value))
+    digits = digits.lower()
+    return ':'.join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+def is_global_mac(mac: str) -> bool:
+    """True for a unicast, globally administered (vendor-assigned) MAC"""
+    first_octet = int(mac[:2], 16)
+    return not first_octet & 0x03 and mac != '00:00:00:00:00:00'
+
+
+def parse_neighbor_table(output: str) -> Dict[str, str]:
+    """
+    Extract IP-to-MAC entries from an ARP or neighbor table.
+
+    Any line holding one IP address and one MAC address is an entry, which
+    covers /proc/net/arp, `ip neigh`, `arp -a` (Windows and BSD style) and
+    `show arp` / `show ip arp` on Cisco, Juniper and similar devices.
+    Incomplete, broadcast and multicast entries are skipped.
+
+    Args:
+        output: Table text
+
+    Returns:
+        Dict of IP address -> normalized MAC address
+    """
+    entries: Dict[str, str] = {}
+
+    for line in output.splitlines():
+        match = _MAC_REGEX.search(line)
+        if not match:
+            continue
+        mac = normalize_mac(match.group(0))
+        # Broadcast and multicast have the group bit set; all-zero is incomplete
+        if mac is None or int(mac[:2], 16) & 0x01 or mac == '00:00:00:00:00:00':
+            continue
+
+        for token in line[:match.start()].split() + line[match.end():].split():
+            token = token.strip('()[],')
+            try:
+                address = ipaddress.ip_address(token.split('%')[0])
+            except ValueError:
+                continue
+            entries[str(address)] = mac
+            break
+
+    return entries
+
+
+def read_local_neighbors(timeout: float = 5) -> Dict[str, str]:
+    """
+    Read this host's ARP/neighbor cache.
+
+    Uses /proc/net/arp and `ip neigh` on Linux and `arp -a` elsewhere.
+    Unavailable sources are skipped.
+
+    Returns:
+        Dict of IP address -> normalized MAC address
+    """
+    logger = logging.getLogger(__name__)
+    entries: Dict[str, str] = {}
+
+    proc_arp = Path('/proc/net/arp')
+    if proc_arp.exists():
+        try:
+            entries.update(parse_neighbor_table(proc_arp.read_text()))
+        except OSError as e:
+            logger.debug(f"Cannot read {proc_arp}: {e}")
+
+    if platform.system().lower() == 'windows' or not shutil.which('ip'):
+        commands = [['arp', '-a']] if shutil.which('arp') else []
+    else:
+        commands = [['ip', 'neigh', 'show']]
+
+    for command in commands:
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+            entries.update(parse_neighbor_table(result.stdout))
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.debug(f"Cannot run {' '.join(command)}: {e}")
+
+    return entries
+
+
+def organization_vendor(organization: str) -> str:
+    """Vendor name for a registry organisation name"""
+    for vendor, regex in _ORGANIZATION_REGEX:
+        if regex.search(organization):
+            return vendor
+    return organization.strip()
+
+
+def read_registry(path: Union[str, Path]) -> Iterable[Tuple[str, str]]:
+    """
+    Read an IEEE MAC address registry file.
+
+    Supports the CSV exports (oui.csv, mam.csv, oui36.csv) and the oui.txt
+    text format.
+
+    Yields:
+        (assignment as upper-case hex digits, organisation name)
+    """
+    path = Path(path)
+    with open(path, encoding='utf-8', errors='replace', newline='') as registry:
+        if path.suffix.lower() == '.csv':
+            for row in csv.reader(registry):
+                if len(row) < 3:
+                    continue
+                assignment = row[1].strip().upper()
+                if len(assignment) in ASSIGNMENT_DIGITS and re.fullmatch('[0-9A-F]+', assignment):
+                    yield assignment, row[2]
+        else:
+            for line in registry:
+                match = re.match(r'\s*([0-9A-Fa-f]{2})-([0-9A-Fa-f]{2})-([0-9A-Fa-f]{2})\s+\(hex\)\s+(.*)', line)
+                if match:
+                    yield ''.join(match.group(1, 2, 3)).upper(), match.group(4)
+
+
+def build_oui_trie(registries: Iterable[Union[str, Path]], output: Union[str, Path]) -> int:
+    """
+    Compile IEEE registry files into a trie file for OuiDatabase.
+
+    The trie branches on one hex digit (4 bits) per level. Each node stores
+    a 16-bit bitmap of present children and the index of its first child;
+    children are stored contiguously, so child n sits at first +
+    popcount(bitmap below n). Vendor names are stored once each.
+
+    Args:
+        registries: Registry files (see read_registry); later files
+                    override earlier ones for the same assignment
+        output: Trie file to write
+
+    Returns:
+        Number of assignments compiled
+    """
+    if isinstance(registries, (str, Path)):
+        registries = [registries]
+
+    assignments: Dict[str, str] = {}
+    for registry in registries:
+        for assignment, organization in read_registry(registry):
+            assignments[assignment] = organization_vendor(organization)
+
+    # Nested dict trie: {digit: child} plus the vendor under key None
+    root: Dict = {}
+    for assignment, vendor in assignments.items():
+        node = root
+        for digit in assignment:
+            node = node.setdefault(int(digit, 16), {})
+        node[None] = vendor
+
+    vendors: List[str] = sorted(set(assignments.values()))
+    vendor_numbers = {vendor: number for number, vendor in enumerate(vendors, 1)}
+
+    # Breadth-first layout keeps every node's children contiguous
+    order = [root]
+    first_child = []
+    for node in order:
+        first_child.append(len(order))
+        order.extend(node[digit] for digit in sorted(k for k in node if k is not None))
+
+    names = [vendor.encode('utf-8') for vendor in vendors]
+    parts = [_HEADER.pack(TRIE_MAGIC, TRIE_VERSION, len(order), len(vendors))]
+    for node, first in zip(order, first_child):
+        mask = 0
+        for digit in node:
+            if digit is not None:
+                mask |= 1 << digit
+        parts.append(_NODE.pack(mask, first, vendor_numbers.get(node.get(None), 0)))
+
+    offset = 0
+    for name in names:
+        parts.append(_OFFSET.pack(offset))
+        offset += len(name)
+    parts.append(_OFFSET.pack(offset))
+    parts.extend(names)
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_name(output.name + '.tmp')
+    tmp_path.write_bytes(b''.join(parts))
+    os.replace(tmp_path, output)
+
+    return len(assignments)
+
+
+class OuiDatabase:
+    """
+    Read-only OUI trie, memory-mapped from a file built by build_oui_trie.
+
+    Opening only maps the file and reads its header, so it takes the same
+    few milliseconds however large the registry; lookups touch at most
+    ten nodes and resolve the longest registered prefix, so MA-M and MA-S
+    blocks win over the MA-L block they were carved from.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as trie_file:
+            self._map = mmap.mmap(trie_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.node_count, self.vendor_count = _HEADER.unpack_from(self._map, 0)
+        if magic != TRIE_MAGIC or version != TRIE_VERSION:
+            self._map.close()
+            raise ValueError(f"{self.path} is not an OUI trie file")
+
+        self._offsets_start = _HEADER.size + self.node_count * _NODE.size
+        self._names_start = self._offsets_start + (self.vendor_count + 1) * _OFFSET.size
+
+    def lookup(self, mac: str) -> Optional[str]:
+        """
+        Vendor of a MAC address.
+
+        Args:
+            mac: MAC address in any notation accepted by normalize_mac
+
+        Returns:
+            Vendor name, or None for unregistered, locally administered or
+            invalid addresses
+        """
+        mac = normalize_mac(mac)
+        if mac is None or not is_global_mac(mac):
+            return None
+
+        best = 0
+        index = 0
+        for digit in mac.replace(':', ''):
+            mask, first, vendor = _NODE.unpack_from(self._map, _HEADER.size + index * _NODE.size)
+            if vendor:
+                best = vendor
+            bit = 1 << int(digit, 16)
+            if not mask & bit:
+                break
+            index = first + bin(mask & (bit - 1)).count('1')
+        else:
+            _, _, vendor = _NODE.unpack_from(self._map, _HEADER.size + index * _NODE.size)
+            best = vendor or best
+
+        return self._vendor_name(best) if best else None
+
+    def _vendor_name(self, number: int) -> str:
+        """Vendor name by its 1-based number"""
+        start, = _OFFSET.unpack_from(self._map, self._offsets_start + (number - 1) * _OFFSET.size)
+        end, = _OFFSET.unpack_from(self._map, self._offsets_start + number * _OFFSET.size)
+        return self._map[self._names_start + start:self._names_start + end].decode('utf-8')
+
+    def close(self) -> None:
+        """Unmap the trie file"""
+        self._map.close()
@@ -0,0 +1,157 @@
+"""
+Rate Limiter
+Token-bucket pacing of discovery probes per subnet and overall
+"""
+
+import asyncio
+import ipaddress
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """
+    Token bucket implemented as a virtual schedule (GCRA).
+
+    Instead of counting tokens, each acquisition reserves the next free
+    send slot, so waiters are served in arrival order without polling and
+    the long-run rate stays exactly at `rate` while allowing bursts of up
+    to `burst` back-to-back acquisitions.
+
+    `clock` and `sleep` default to time.monotonic and asyncio.sleep; tests
+    pass a fake pair to check the schedule without real waiting.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.sleep = sleep
+        self._interval = 1.0 / rate
+        self._tolerance = (self.burst - 1) * self._interval
+        self._tat = 0.0  # Theoretical arrival time of the next acquisition
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """
+        Reserve one token.
+
+        Args:
+            now: Current time (defaults to the bucket's clock)
+
+        Returns:
+            Seconds to wait before using the token
+        """
+        now = self.clock() if now is None else now
+        tat = max(self._tat, now)
+        self._tat = tat + self._interval
+        return max(0.0, tat - self._tolerance - now)
+
+    def idle(self, now: float) -> bool:
+        """True if the bucket is full again and can be discarded"""
+        return self._tat + self._tolerance <= now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available"""
+        delay = self.reserve()
+        if delay > 0:
+            await self.sleep(delay)
+
+
+class ProbeRateLimiter:
+    """
+    Paces probes with one bucket per target subnet and one shared bucket.
+
+    A probe first waits for its subnet's bucket and only then reserves a
+    slot in the global bucket, so a throttled subnet never holds global
+    slots it cannot use.
+    """
+
+    # Drop full subnet buckets once this many have accumulated
+    PRUNE_THRESHOLD = 4096
+
+    def __init__(
+        self,
+        global_rate: float = 0,
+        subnet_rate: float = 0,
+        burst: int = 1,
+        prefix_v4: int = 24,
+        prefix_v6: int = 64,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.global_rate = global_rate
+        self.subnet_rate = subnet_rate
+        self.burst = burst
+        self.prefix_v4 = prefix_v4
+        self.prefix_v6 = prefix_v6
+        self.clock = clock
+        self.sleep = sleep
+
+        self._global = TokenBucket(global_rate, burst, clock, sleep) if global_rate > 0 else None
+        self._subnets: Dict[Tuple[int, int], TokenBucket] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """True if any limit is configured"""
+        return self._global is not None or self.subnet_rate > 0
+
+    def _subnet_key(self, ip: str) -> Tuple[int, int]:
+        """(version, network number) of the subnet an address belongs to"""
+        address = ipaddress.ip_address(ip)
+        if address.version == 4:
+            return 4, int(address) >> (32 - self.prefix_v4)
+        return 6, int(address) >> (128 - self.prefix_v6)
+
+    def _subnet_bucket(self, ip: str) -> TokenBucket:
+        """Bucket of an address's subnet, created on first use"""
+        key = self._subnet_key(ip)
+        bucket = self._subnets.get(key)
+
+        if bucket is None:
+            if len(self._subnets) >= self.PRUNE_THRESHOLD:
+                now = self.clock()
+                self._subnets = {k: b for k, b in self._subnets.items() if not b.idle(now)}
+            bucket = self._subnets[key] = TokenBucket(self.subnet_rate, self.burst, self.clock, self.sleep)
+
+        return bucket
+
+    def reserve_subnet(self, ip: str, now: Optional[float] = None) -> float:
+        """
+        Reserve a send slot in an address's subnet bucket without waiting.
+
+        Lets a caller hold back a throttled address without tying up
+        anything else while it waits; follow with acquire_global() once
+        the returned delay has passed.
+
+        Args:
+            ip: Address about to be probed
+            now: Current time (defaults to the limiter's clock)
+
+        Returns:
+            Seconds until the probe may be sent (0 without a subnet limit)
+        """
+        if self.subnet_rate <= 0:
+            return 0.0
+        return self._subnet_bucket(ip).reserve(now)
+
+    async def acquire_global(self) -> None:
+        """Wait for a slot in the shared bucket, if there is a global limit"""
+        if self._global is not None:
+            await self._global.acquire()
+
+    async def acquire(self, ip: str) -> None:
+        """
+        Wait until a probe to an address may be sent.
+
+        Args:
+            ip: Address about to be probed
+        """
+        if self.subnet_rate > 0:
+            await self._subnet_bucket(ip).acquire()
+        await self.acquire_global()
@@ -0,0 +1,173 @@
+"""
+Reachability Store
+Persistent per-address discovery history for incremental scans
+"""
+
+import ipaddress
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.ip_ranges import IPRangeSet
+
+
+@dataclass
+class ReachabilityRecord:
+    """Discovery history of one address"""
+    last_seen: float
+    last_probed: float
+    misses: int = 0
+
+
+class ReachabilityStore:
+    """
+    SQLite-backed history of addresses that have answered a probe.
+
+    Only addresses that answered at least once get a row; address space
+    that has never answered is tracked per target set by the time of its
+    last full sweep. Dead addresses are re-probed on an exponential
+    schedule: after n consecutive misses the next probe is due
+    base_backoff * 2^(n-1) seconds after the last one, capped at
+    max_backoff. Writes are buffered and flushed in batches.
+    """
+
+    FLUSH_THRESHOLD = 1000
+
+    def __init__(self, path: str, base_backoff: float = 3600, max_backoff: float = 7 * 86400):
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._pending: List[Tuple[str, int, str, bool, float]] = []
+
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS reachability (
+                    version INTEGER NOT NULL,
+                    ip_key TEXT NOT NULL,
+                    ip TEXT NOT NULL,
+                    last_seen REAL NOT NULL,
+                    last_probed REAL NOT NULL,
+                    misses INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (version, ip_key)
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS full_sweeps (
+                    scope TEXT PRIMARY KEY,
+                    completed_at REAL NOT NULL
+                )"""
+            )
+
+    @staticmethod
+    def _key(version: int, value: int) -> str:
+        """Fixed-width hex so text order matches numeric order"""
+        return format(value, '08x' if version == 4 else '032x')
+
+    @staticmethod
+    def scope_of(range_set: IPRangeSet) -> str:
+        """Stable identifier of a target set for full-sweep bookkeeping"""
+        return ','.join(f"{v}:{first}-{last}" for v, first, last in range_set.ranges())
+
+    def lookup(self, range_set: IPRangeSet) -> Dict[str, ReachabilityRecord]:
+        """
+        Load the history of every known address inside a target set.
+
+        Args:
+            range_set: Addresses of interest
+
+        Returns:
+            Dict of ip -> ReachabilityRecord
+        """
+        self.flush()
+        records = {}
+
+        with self._lock:
+            for version, first, last in range_set.ranges():
+                rows = self._conn.execute(
+                    """SELECT ip, last_seen, last_probed, misses FROM reachability
+                       WHERE version = ? AND ip_key BETWEEN ? AND ?""",
+                    (version, self._key(version, first), self._key(version, last))
+                )
+                for ip, last_seen, last_probed, misses in rows:
+                    records[ip] = ReachabilityRecord(last_seen, last_probed, misses)
+
+        return records
+
+    def next_probe_due(self, record: ReachabilityRecord) -> float:
+        """Timestamp at which an address should be probed again"""
+        if record.misses == 0:
+            return record.last_probed
+        delay = min(self.base_backoff * (2 ** (record.misses - 1)), self.max_backoff)
+        return record.last_probed + delay
+
+    def record(self, ip: str, alive: bool, now: Optional[float] = None) -> None:
+        """
+        Buffer the outcome of one probe.
+
+        Misses are only recorded for addresses that have answered before.
+        """
+        address = ipaddress.ip_address(ip)
+        key = self._key(address.version, int(address))
+        entry = (str(address), address.version, key, alive, time.time() if now is None else now)
+
+        with self._lock:
+            self._pending.append(entry)
+            should_flush = len(self._pending) >= self.FLUSH_THRESHOLD
+
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered probe outcomes"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+
+            with self._conn:
+                self._conn.executemany(
+                    """INSERT INTO reachability (version, ip_key, ip, last_seen, last_probed, misses)
+                       VALUES (?, ?, ?, ?, ?, 0)
+                       ON CONFLICT (version, ip_key) DO UPDATE SET
+                           last_seen = excluded.last_seen,
+                           last_probed = excluded.last_probed,
+                           misses = 0""",
+                    [(v, key, ip, now, now) for ip, v, key, alive, now in pending if alive]
+                )
+                self._conn.executemany(
+                    """UPDATE reachability SET last_probed = ?, misses = misses + 1
+                       WHERE version = ? AND ip_key = ?""",
+                    [(now, v, key) for ip, v, key, alive, now in pending if not alive]
+                )
+
+    def last_full_sweep(self, scope: str) -> float:
+        """Completion time of the last full sweep of a scope, 0 if never"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completed_at FROM full_sweeps WHERE scope = ?", (scope,)
+            ).fetchone()
+        return row[0] if row else 0.0
+
+    def mark_full_sweep(self, scope: str, now: Optional[float] = None) -> None:
+        """Record that every address of a scope was just probed"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO full_sweeps (scope, completed_at) VALUES (?, ?)
+                   ON CONFLICT (scope) DO UPDATE SET completed_at = excluded.completed_at""",
+                (scope, time.time() if now is None else now)
+            )
+
+    def close(self) -> None:
+        """Flush and close the database"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
@@ -34,7 +34,8 @@ class ReportingEngine:
         self,
         devices: List[Device],
         diagnostic_results: List[DiagnosticResult],
-        format: str = 'excel'
+        format: str = 'excel',
+        scan_timing: Optional[List[Dict]] = None
     ) -> Optional[Path]:
         """
         Generate comprehensive network health report.
@@ -43,6 +44,8 @@ class ReportingEngine:
             devices: List of devices
             diagnostic_results: List of diagnostic results
             format: Output format ('excel', 'csv', 'html')
+            scan_timing: Optional per-subnet timing from
+                         DiscoveryEngine.get_scan_timing (Excel only)
             
         Returns:
             Path to generated report file
@@ -54,7 +57,7 @@ class ReportingEngine:
             filename = f"network_health_report_{timestamp}"
             
             if format == 'excel':
-                return self._generate_excel_report(devices, diagnostic_results, filename)
+                return self._generate_excel_report(devices, diagnostic_results, filename, scan_timing)
             elif format == 'csv':
                 return self._generate_csv_report(devices, diagnostic_results, filename)
             else:
@@ -69,7 +72,8 @@ class ReportingEngine:
         self,
         devices: List[Device],
         diagnostic_results: List[DiagnosticResult],
-        filename: str
+        filename: str,
+        scan_timing: Optional[List[Dict]] = None
     ) -> Path:
         """Generate Excel report with multiple sheets"""
         
@@ -92,6 +96,10 @@ class ReportingEngine:
             
             # Sheet 5: Warnings
             self._create_issues_sheet(writer, diagnostic_results, severity=Severity.WARNING, sheet_name='Warnings')
+            
+            # Sheet 6: Scan Timing
+            if scan_timing:
+                self._create_scan_timing_sheet(writer, scan_timing)
         
         # Apply formatting
         self._format_excel_report(filepath)
@@ -230,6 +238,22 @@ class ReportingEngine:
         df = pd.DataFrame(issues_data)
         df.to_excel(writer, sheet_name=sheet_name, index=False)
     
+    def _create_scan_timing_sheet(self, writer: pd.ExcelWriter, scan_timing: List[Dict]) -> None:
+        """Create sheet with the round-trip timing learned per subnet"""
+        
+        timing_data = []
+        for entry in scan_timing:
+            timing_data.append({
+                'Subnet': entry['subnet'],
+                'Samples': entry['samples'],
+                'Smoothed RTT (ms)': entry['srtt_ms'],
+                'RTT Variation (ms)': entry['rttvar_ms'],
+                'Probe Timeout (ms)': entry['timeout_ms']
+            })
+        
+        df = pd.DataFrame(timing_data)
+        df.to_excel(writer, sheet_name='Scan Timing', index=False)
+    
     def _format_excel_report(self, filepath: Path) -> None:
         """Apply formatting to Excel report"""
         
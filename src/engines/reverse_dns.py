@@ -0,0 +1,391 @@
+"""
+Reverse DNS
+Asynchronous bulk PTR lookups with a TTL cache
+"""
+
+import asyncio
+import ipaddress
+import logging
+import random
+import socket
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+TYPE_PTR = 12
+TYPE_SOA = 6
+CLASS_IN = 1
+RCODE_NXDOMAIN = 3
+
+_HEADER = struct.Struct('>HHHHHH')  # id, flags, qdcount, ancount, nscount, arcount
+_RR_FIXED = struct.Struct('>HHIH')  # type, class, ttl, rdlength
+
+# Marks a cache miss, as None is a cached "no PTR record"
+MISSING = object()
+
+
+def system_nameservers(resolv_conf: str = '/etc/resolv.conf') -> List[str]:
+    """
+    Nameservers configured for this host.
+
+    Returns:
+        Nameserver addresses from resolv.conf (empty where there is none,
+        e.g. on Windows)
+    """
+    servers = []
+    try:
+        for line in Path(resolv_conf).read_text().splitlines():
+            parts = line.split()
+            if len(parts) >= 2 and parts[0] == 'nameserver':
+                servers.append(parts[1].split('%')[0])
+    except OSError:
+        pass
+    return servers
+
+
+def canonical_address(ip: str) -> str:
+    """
+    Compressed, lower-case text form of an address without its IPv6 zone id,
+    as sockets report reply sources; text that is not an address is returned as is.
+    """
+    try:
+        return str(ipaddress.ip_address(ip.split('%', 1)[0]))
+    except ValueError:
+        return ip
+
+
+def encode_ptr_query(query_id: int, ip: str) -> bytes:
+    """
+    Build a recursive PTR query for an address.
+
+    Args:
+        query_id: 16-bit query id
+        ip: IPv4 or IPv6 address
+
+    Returns:
+        DNS message bytes
+    """
+    name = ipaddress.ip_address(ip).reverse_pointer
+    qname = b''.join(bytes([len(label)]) + label.encode('ascii') for label in name.split('.')) + b'\x00'
+    return _HEADER.pack(query_id, 0x0100, 1, 0, 0, 0) + qname + struct.pack('>HH', TYPE_PTR, CLASS_IN)
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """
+    Decode a possibly compressed domain name.
+
+    Returns:
+        Tuple of (name without trailing dot, offset after the name)
+    """
+    labels = []
+    end = None
+    jumps = 0
+
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            jumps += 1
+            if jumps > 64:
+                raise ValueError("DNS name compression loop")
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode('ascii', errors='replace'))
+        offset += length
+
+    return '.'.join(labels), end if end is not None else offset
+
+
+def decode_ptr_response(data: bytes) -> Dict:
+    """
+    Decode a PTR query response.
+
+    Returns:
+        Dict with 'id', 'rcode', 'question' (queried name), 'name' (first
+        PTR target or None) and 'ttl' (of the PTR record, or the negative
+        caching TTL from the SOA record, or None)
+
+    Raises:
+        ValueError: If the message is malformed
+    """
+    try:
+        query_id, flags, qdcount, ancount, nscount, _ = _HEADER.unpack_from(data, 0)
+        offset = _HEADER.size
+
+        question = None
+        for _ in range(qdcount):
+            question, offset = _read_name(data, offset)
+            offset += 4
+
+        name = None
+        ttl = None
+        for index in range(ancount + nscount):
+            _, offset = _read_name(data, offset)
+            rtype, rclass, record_ttl, rdlength = _RR_FIXED.unpack_from(data, offset)
+            offset += _RR_FIXED.size
+
+            if index < ancount and rtype == TYPE_PTR and name is None:
+                name, _ = _read_name(data, offset)
+                ttl = record_ttl
+            elif index >= ancount and rtype == TYPE_SOA and name is None:
+                # RFC 2308: negative answers are cached for min(SOA TTL, SOA MINIMUM)
+                _, rdata = _read_name(data, offset)
+                _, rdata = _read_name(data, rdata)
+                minimum = struct.unpack_from('>I', data, rdata + 16)[0]
+                ttl = min(record_ttl, minimum)
+
+            offset += rdlength
+
+    except (IndexError, struct.error) as e:
+        raise ValueError(f"Malformed DNS message: {e}")
+
+    return {'id': query_id, 'rcode': flags & 0x0F, 'question': question, 'name': name, 'ttl': ttl}
+
+
+class DnsCache:
+    """
+    PTR results keyed by address, each kept for its record's TTL.
+
+    Negative answers (no PTR record) are cached too, so rescans of dark
+    address space do not re-query either.
+    """
+
+    def __init__(self, max_entries: int = 65536, min_ttl: float = 60, max_ttl: float = 86400):
+        self.max_entries = max_entries
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self._entries: Dict[str, Tuple[float, Optional[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, ip: str, now: Optional[float] = None):
+        """
+        Cached name for an address.
+
+        Returns:
+            Hostname, None for a cached negative answer, or MISSING
+        """
+        entry = self._entries.get(ip)
+        if entry is None:
+            return MISSING
+        expires, name = entry
+        if expires <= (time.monotonic() if now is None else now):
+            del self._entries[ip]
+            return MISSING
+        return name
+
+    def put(self, ip: str, name: Optional[str], ttl: float, now: Optional[float] = None) -> None:
+        """Cache a result for ttl seconds (clamped to min_ttl..max_ttl)"""
+        now = time.monotonic() if now is None else now
+
+        if ip not in self._entries and len(self._entries) >= self.max_entries:
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            while len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+        self._entries[ip] = (now + min(self.max_ttl, max(self.min_ttl, ttl)), name)
+
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+    """Routes received datagrams back to the resolver"""
+
+    def __init__(self, resolver: 'ReverseResolver'):
+        self.resolver = resolver
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.resolver._on_datagram(data, addr)
+
+    def error_received(self, exc: Exception) -> None:
+        # ICMP port unreachable etc. — the query simply times out
+        pass
+
+
+class ReverseResolver:
+    """
+    Resolves PTR records for many addresses from one UDP socket per family.
+
+    Queries go straight to the configured nameservers (or the system's),
+    at most max_concurrency at a time, and are matched to responses by
+    query id, server address and question name. Where no nameserver is
+    known the system resolver is used instead, through the event loop's
+    thread pool. Use as an async context manager:
+
+        async with ReverseResolver(cache=DnsCache()) as resolver:
+            names = await resolver.resolve_many(['10.0.0.1', '10.0.0.2'])
+    """
+
+    def __init__(
+        self,
+        nameservers: Optional[List[str]] = None,
+        port: int = 53,
+        timeout: float = 2.0,
+        retries: int = 1,
+        max_concurrency: int = 256,
+        cache: Optional[DnsCache] = None,
+        default_ttl: float = 300
+    ):
+        self.logger = logging.getLogger(__name__)
+        # Canonical, so replies can be matched on the source address text
+        self.nameservers = [canonical_address(s) for s in (nameservers or system_nameservers())]
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.max_concurrency = min(max_concurrency, 32768)
+        self.cache = cache if cache is not None else DnsCache()
+        self.default_ttl = default_ttl  # For answers without a TTL
+        self.queries_sent = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._transports: Dict[int, asyncio.DatagramTransport] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[int, Tuple[asyncio.Future, str, str]] = {}
+
+    async def __aenter__(self) -> 'ReverseResolver':
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    async def open(self) -> None:
+        """Bind the resolver to the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def close(self) -> None:
+        """Close sockets and fail pending queries"""
+        for transport in self._transports.values():
+            transport.close()
+        self._transports.clear()
+
+        for future, _, _ in self._pending.values():
+            if not future.done():
+                future.set_result(None)
+        self._pending.clear()
+
+    async def _transport(self, family: int) -> asyncio.DatagramTransport:
+        """Lazily open the socket for an address family"""
+        if family not in self._transports:
+            local = ('::', 0) if family == socket.AF_INET6 else ('0.0.0.0', 0)
+            transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: _DnsProtocol(self),
+                local_addr=local,
+                family=family
+            )
+            self._transports[family] = transport
+        return self._transports[family]
+
+    def _next_query_id(self) -> int:
+        """Random query id not currently in use"""
+        while True:
+            query_id = random.getrandbits(16)
+            if query_id not in self._pending:
+                return query_id
+
+    async def resolve(self, ip: str) -> Optional[str]:
+        """
+        Hostname of one address.
+
+        Args:
+            ip: IPv4 or IPv6 address
+
+        Returns:
+            PTR name, or None if there is none or no server answered
+        """
+        cached = self.cache.get(ip)
+        if cached is not MISSING:
+            return cached
+
+        async with self._semaphore:
+            if self.nameservers:
+                result = await self._query(ip)
+            else:
+                result = await self._system_lookup(ip)
+
+        if result is not None:
+            name, ttl = result
+            self.cache.put(ip, name, ttl if ttl is not None else self.default_ttl)
+            return name
+        return None
+
+    async def resolve_many(self, ips: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Hostnames of many addresses, resolved concurrently.
+
+        Returns:
+            Dict of address -> PTR name (None where there is none)
+        """
+        ips = list(dict.fromkeys(ips))
+        names = await asyncio.gather(*(self.resolve(ip) for ip in ips))
+        return dict(zip(ips, names))
+
+    async def _query(self, ip: str) -> Optional[Tuple[Optional[str], Optional[float]]]:
+        """
+        Send a PTR query, rotating through the nameservers on retries.
+
+        Returns:
+            Tuple of (name or None, TTL or None) for an authoritative answer,
+            or None if no server answered usably
+        """
+        question = ipaddress.ip_address(ip).reverse_pointer
+
+        for attempt in range(self.retries + 1):
+            server = self.nameservers[attempt % len(self.nameservers)]
+            family = socket.AF_INET6 if ':' in server else socket.AF_INET
+            query_id = self._next_query_id()
+            future = self._loop.create_future()
+            self._pending[query_id] = (future, server, question)
+
+            try:
+                transport = await self._transport(family)
+                transport.sendto(encode_ptr_query(query_id, ip), (server, self.port))
+                self.queries_sent += 1
+                response = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                continue
+            except OSError as e:
+                self.logger.debug(f"DNS query to {server} failed: {e}")
+                continue
+            finally:
+                self._pending.pop(query_id, None)
+
+            if response is None:
+                return None
+            if response['name'] is not None or response['rcode'] in (0, RCODE_NXDOMAIN):
+                return response['name'], response['ttl']
+            # SERVFAIL, REFUSED...: try the next server
+
+        return None
+
+    async def _system_lookup(self, ip: str) -> Optional[Tuple[Optional[str], Optional[float]]]:
+        """Resolve through the operating system (no TTL available)"""
+        try:
+            host, _ = await self._loop.getnameinfo((ip, 0), socket.NI_NAMEREQD)
+            return host, None
+        except (socket.gaierror, socket.herror):
+            return None, None
+        except OSError as e:
+            self.logger.debug(f"Reverse lookup of {ip} failed: {e}")
+            return None
+
+    def _on_datagram(self, data: bytes, addr) -> None:
+        """Resolve the pending query a response belongs to"""
+        try:
+            response = decode_ptr_response(data)
+        except ValueError:
+            return
+
+        entry = self._pending.get(response['id'])
+        if entry is None:
+            return
+        future, server, question = entry
+        source = addr[0].split('%', 1)[0]
+        if source == server and (response['question'] or '').lower() == question and not future.done():
+            future.set_result(response)
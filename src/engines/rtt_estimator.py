@@ -0,0 +1,143 @@
+"""
+RTT Estimator
+Per-subnet round-trip time estimation for adaptive probe timeouts
+"""
+
+import ipaddress
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class RttState:
+    """Smoothed round-trip statistics of one subnet, in seconds"""
+    srtt: float
+    rttvar: float
+    samples: int = 1
+
+
+class RttEstimator:
+    """
+    Learns how long each subnet takes to answer, like TCP's RTO (RFC 6298).
+
+    Every RTT sample updates a smoothed RTT and a mean deviation for the
+    sample's subnet (and for the sweep as a whole):
+
+        RTTVAR = (1 - beta) * RTTVAR + beta * |SRTT - R|
+        SRTT   = (1 - alpha) * SRTT + alpha * R
+
+    and the probe timeout is SRTT + max(granularity, K * RTTVAR), clamped
+    to [min_timeout, max_timeout]. Subnets without samples fall back to
+    the global estimate, then to initial_timeout.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(
+        self,
+        initial_timeout: float = 1.0,
+        min_timeout: float = 0.05,
+        max_timeout: float = 3.0,
+        prefix_v4: int = 24,
+        prefix_v6: int = 64,
+        granularity: float = 0.001
+    ):
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max(max_timeout, min_timeout)
+        self.prefix_v4 = prefix_v4
+        self.prefix_v6 = prefix_v6
+        self.granularity = granularity
+
+        self._lock = threading.Lock()
+        self._subnets: Dict[Tuple[int, int], RttState] = {}
+        self._global: Optional[RttState] = None
+
+    def _subnet_key(self, ip: str) -> Tuple[int, int]:
+        """(version, network number) of the subnet an address belongs to"""
+        address = ipaddress.ip_address(ip)
+        if address.version == 4:
+            return 4, int(address) >> (32 - self.prefix_v4)
+        return 6, int(address) >> (128 - self.prefix_v6)
+
+    def _update(self, state: Optional[RttState], rtt: float) -> RttState:
+        """Fold one sample into a state, creating it on the first sample"""
+        if state is None:
+            return RttState(srtt=rtt, rttvar=rtt / 2)
+
+        state.rttvar = (1 - self.BETA) * state.rttvar + self.BETA * abs(state.srtt - rtt)
+        state.srtt = (1 - self.ALPHA) * state.srtt + self.ALPHA * rtt
+        state.samples += 1
+        return state
+
+    def _rto(self, state: RttState) -> float:
+        """Clamped retransmission-style timeout of a state"""
+        rto = state.srtt + max(self.granularity, self.K * state.rttvar)
+        return min(max(rto, self.min_timeout), self.max_timeout)
+
+    def observe(self, ip: str, rtt: float) -> None:
+        """
+        Record a round-trip time sample.
+
+        Args:
+            ip: Address that answered
+            rtt: Round-trip time in seconds
+        """
+        key = self._subnet_key(ip)
+
+        with self._lock:
+            self._subnets[key] = self._update(self._subnets.get(key), rtt)
+            self._global = self._update(self._global, rtt)
+
+    def timeout(self, ip: str) -> float:
+        """
+        Probe timeout for an address.
+
+        Args:
+            ip: Address about to be probed
+
+        Returns:
+            Timeout in seconds
+        """
+        key = self._subnet_key(ip)
+
+        with self._lock:
+            state = self._subnets.get(key) or self._global
+
+        if state is None:
+            return min(max(self.initial_timeout, self.min_timeout), self.max_timeout)
+        return self._rto(state)
+
+    def snapshot(self) -> List[Dict]:
+        """
+        Learned timing of every subnet with samples.
+
+        Returns:
+            List of dicts with 'subnet', 'samples', and 'srtt_ms', 'rttvar_ms'
+            and 'timeout_ms', ordered by subnet
+        """
+        with self._lock:
+            items = sorted(self._subnets.items())
+            rows = []
+            for (version, network), state in items:
+                if version == 4:
+                    subnet = ipaddress.IPv4Network((network << (32 - self.prefix_v4), self.prefix_v4))
+                else:
+                    subnet = ipaddress.IPv6Network((network << (128 - self.prefix_v6), self.prefix_v6))
+                rows.append({
+                    'subnet': str(subnet),
+                    'samples': state.samples,
+                    'srtt_ms': round(state.srtt * 1000, 3),
+                    'rttvar_ms': round(state.rttvar * 1000, 3),
+                    'timeout_ms': round(self._rto(state) * 1000, 3),
+                })
+        return rows
+
+    def reset(self) -> None:
+        """Forget all samples"""
+        with self._lock:
+            self._subnets.clear()
+            self._global = None
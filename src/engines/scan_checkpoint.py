@@ -0,0 +1,259 @@
+"""
+Scan Checkpoint
+On-disk progress of long discovery sweeps, so they can be resumed
+"""
+
+import bisect
+import ipaddress
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from models.device import Device
+from utils.ip_ranges import IPRangeSet
+
+
+class ScanCheckpoint:
+    """
+    Progress of one discovery job.
+
+    A job directory holds three files:
+
+    - meta.json: job id, targets and completion flag
+    - progress.bin: one bit per address of the merged target set, in
+      IPRangeSet order, set once the address has its final outcome
+    - devices.jsonl: append-only journal of found devices
+
+    Devices are appended to the journal as they are found. The bitmap is
+    rewritten atomically at most every `interval` seconds, so a crash
+    loses at most that much probing, never a found device.
+
+    Target sets above MAX_ADDRESSES (e.g. an IPv6 /64) are refused: their
+    bitmap would not fit in memory, let alone be rewritten every interval.
+    """
+
+    META_FILE = 'meta.json'
+    BITMAP_FILE = 'progress.bin'
+    JOURNAL_FILE = 'devices.jsonl'
+
+    # 2 MB of bitmap
+    MAX_ADDRESSES = 1 << 24
+
+    def __init__(self, directory: Union[str, Path], job_id: str, targets: List[str], interval: float = 5.0):
+        self.logger = logging.getLogger(__name__)
+        self.job_id = job_id
+        self.path = Path(directory) / job_id
+        self.targets = list(targets)
+        self.interval = interval
+        self.range_set = IPRangeSet.from_targets(self.targets)
+        self.total = self.range_set.num_addresses
+        if self.total > self.MAX_ADDRESSES:
+            raise ValueError(
+                f"{self.total} addresses are too many to checkpoint (at most {self.MAX_ADDRESSES})"
+            )
+        self.created = datetime.now().isoformat(timespec='seconds')
+
+        # Position of each interval in the bitmap, for O(log n) lookups
+        self._starts: Dict[int, List[int]] = {4: [], 6: []}
+        self._offsets: Dict[int, List[int]] = {4: [], 6: []}
+        offset = 0
+        for version, first, last in self.range_set.ranges():
+            self._starts[version].append(first)
+            self._offsets[version].append(offset)
+            offset += last - first + 1
+
+        self._bitmap = bytearray((self.total + 7) // 8)
+        self._done = 0
+        self._journal = None
+        self._last_save = time.monotonic()
+
+    @classmethod
+    def create(cls, directory: Union[str, Path], targets: Iterable[str], interval: float = 5.0) -> 'ScanCheckpoint':
+        """
+        Start a new job.
+
+        Args:
+            directory: Directory holding all scan jobs
+            targets: Scan targets (see DiscoveryEngine.iter_discover)
+            interval: Minimum seconds between bitmap writes
+
+        Returns:
+            ScanCheckpoint with its files created
+
+        Raises:
+            ValueError: If a target cannot be parsed or the targets hold
+                        more than MAX_ADDRESSES addresses
+        """
+        if isinstance(targets, str):
+            targets = [targets]
+        job_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        checkpoint = cls(directory, job_id, [str(t).strip() for t in targets], interval)
+
+        checkpoint.path.mkdir(parents=True, exist_ok=True)
+        checkpoint._write_meta()
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], job_id: str, interval: float = 5.0) -> 'ScanCheckpoint':
+        """
+        Open an existing job.
+
+        Raises:
+            FileNotFoundError: If the job does not exist
+            ValueError: If the job files are corrupt
+        """
+        path = Path(directory) / job_id
+        meta = json.loads((path / cls.META_FILE).read_text(encoding='utf-8'))
+        checkpoint = cls(directory, job_id, meta['targets'], interval)
+        checkpoint.created = meta.get('created', checkpoint.created)
+
+        bitmap_path = path / cls.BITMAP_FILE
+        if bitmap_path.exists():
+            data = bitmap_path.read_bytes()
+            if len(data) != len(checkpoint._bitmap):
+                raise ValueError(f"Progress bitmap of job {job_id} does not match its targets")
+            checkpoint._bitmap[:] = data
+            checkpoint._done = sum(bin(byte).count('1') for byte in data)
+
+        return checkpoint
+
+    @classmethod
+    def list_jobs(cls, directory: Union[str, Path]) -> List[Dict]:
+        """
+        Describe every job in a directory.
+
+        Returns:
+            List of meta dicts ('job_id', 'targets', 'created', 'total'),
+            newest first; finished jobs are deleted, so every job listed
+            can be resumed
+        """
+        jobs = []
+        for meta_path in Path(directory).glob(f'*/{cls.META_FILE}'):
+            try:
+                jobs.append(json.loads(meta_path.read_text(encoding='utf-8')))
+            except (OSError, ValueError):
+                continue
+        return sorted(jobs, key=lambda meta: meta.get('created', ''), reverse=True)
+
+    @property
+    def remaining(self) -> int:
+        """Number of addresses without a final outcome"""
+        return self.total - self._done
+
+    def _index(self, ip: str) -> int:
+        """Bitmap position of an address"""
+        address = ipaddress.ip_address(ip)
+        value = int(address)
+        idx = bisect.bisect_right(self._starts[address.version], value) - 1
+        if idx < 0 or value not in self.range_set:
+            raise ValueError(f"{ip} is not part of job {self.job_id}")
+        return self._offsets[address.version][idx] + value - self._starts[address.version][idx]
+
+    def pending_addresses(self) -> Iterator[str]:
+        """Lazily enumerate addresses still to be probed, skipping finished bytes"""
+        bitmap = self._bitmap
+        offset = 0
+
+        for version, first, last in self.range_set.ranges():
+            address_class = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+            end = offset + last - first + 1
+            index = offset
+
+            while index < end:
+                if not index & 7 and index + 8 <= end and bitmap[index >> 3] == 0xFF:
+                    index += 8
+                    continue
+                if not bitmap[index >> 3] & (1 << (index & 7)):
+                    yield str(address_class(first + index - offset))
+                index += 1
+
+            offset = end
+
+    def record(self, ip: str, device: Optional[Device]) -> None:
+        """
+        Record the final outcome of an address.
+
+        Found devices are journaled immediately; the bitmap is saved when
+        the checkpoint interval has passed.
+        """
+        if device is not None:
+            if self._journal is None:
+                self._journal = open(self.path / self.JOURNAL_FILE, 'a', encoding='utf-8')
+            self._journal.write(json.dumps(device.to_dict()) + '\n')
+            self._journal.flush()
+
+        index = self._index(ip)
+        mask = 1 << (index & 7)
+        if not self._bitmap[index >> 3] & mask:
+            self._bitmap[index >> 3] |= mask
+            self._done += 1
+
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save()
+
+    def save(self) -> None:
+        """Atomically write the progress bitmap"""
+        if self._journal is not None:
+            os.fsync(self._journal.fileno())
+
+        tmp_path = self.path / (self.BITMAP_FILE + '.tmp')
+        tmp_path.write_bytes(self._bitmap)
+        os.replace(tmp_path, self.path / self.BITMAP_FILE)
+        self._last_save = time.monotonic()
+
+    def load_devices(self) -> List[Device]:
+        """
+        Devices found so far, from the journal.
+
+        Returns:
+            One Device per address (the latest entry wins)
+        """
+        journal_path = self.path / self.JOURNAL_FILE
+        if not journal_path.exists():
+            return []
+
+        devices: Dict[str, Device] = {}
+        with open(journal_path, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    device = Device.from_dict(json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # Torn last line after a crash
+                devices[device.ip_address] = device
+
+        return list(devices.values())
+
+    def close(self) -> None:
+        """Save progress and close the journal"""
+        try:
+            self.save()
+        finally:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def delete(self) -> None:
+        """Close the job and remove its files"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _write_meta(self) -> None:
+        """Write the job description"""
+        meta = {
+            'job_id': self.job_id,
+            'targets': self.targets,
+            'created': self.created,
+            'total': self.total,
+        }
+        tmp_path = self.path / (self.META_FILE + '.tmp')
+        tmp_path.write_text(json.dumps(meta, indent=2), encoding='utf-8')
+        os.replace(tmp_path, self.path / self.META_FILE)
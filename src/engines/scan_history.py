@@ -0,0 +1,257 @@
+"""
+Scan History
+Compact per-scan result storage and scan-to-scan diffs
+"""
+
+import ipaddress
+import json
+import logging
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models.device import Device
+
+
+# Device attributes compared between scans, in storage order
+TRACKED_ATTRIBUTES = (
+    'hostname',
+    'vendor',
+    'device_type',
+    'model',
+    'os_version',
+    'serial_number',
+    'open_ports',
+    'ssh_banner',
+    'netmiko_device_type',
+)
+
+# (ip version, address as int) -> attribute tuple in TRACKED_ATTRIBUTES order
+ScanRecords = List[Tuple[Tuple[int, int], tuple]]
+
+
+@dataclass
+class ScanDiff:
+    """Differences between two scans"""
+    old_scan: int
+    new_scan: int
+    added: List[Dict] = field(default_factory=list)
+    removed: List[Dict] = field(default_factory=list)
+    changed: List[Dict] = field(default_factory=list)
+
+    def has_changes(self) -> bool:
+        """True if any host appeared, vanished or changed"""
+        return bool(self.added or self.removed or self.changed)
+
+
+def device_attributes(device: Device) -> tuple:
+    """Tracked attributes of a device as a comparable tuple"""
+    values = []
+    for name in TRACKED_ATTRIBUTES:
+        value = getattr(device, name, None)
+        if name == 'device_type' and value is not None:
+            value = value.value
+        elif name == 'open_ports':
+            value = sorted(value or [])
+        values.append(value)
+    return tuple(values)
+
+
+def _ip_string(key: Tuple[int, int]) -> str:
+    """Address string of a record key"""
+    version, value = key
+    return str(ipaddress.IPv4Address(value) if version == 4 else ipaddress.IPv6Address(value))
+
+
+def _as_dict(key: Tuple[int, int], attributes: tuple) -> Dict:
+    """Readable form of one record"""
+    result = {'ip_address': _ip_string(key)}
+    result.update(zip(TRACKED_ATTRIBUTES, attributes))
+    return result
+
+
+def diff_records(old: ScanRecords, new: ScanRecords, old_scan: int = 0, new_scan: int = 0) -> ScanDiff:
+    """
+    Diff two address-sorted record lists in one merge pass.
+
+    Args:
+        old: Records of the earlier scan, sorted by address
+        new: Records of the later scan, sorted by address
+        old_scan: Id of the earlier scan
+        new_scan: Id of the later scan
+
+    Returns:
+        ScanDiff; changed entries carry 'ip_address' and 'changes', a dict
+        of attribute -> (old value, new value)
+    """
+    result = ScanDiff(old_scan, new_scan)
+    i = j = 0
+
+    while i < len(old) and j < len(new):
+        old_key, old_attributes = old[i]
+        new_key, new_attributes = new[j]
+
+        if old_key < new_key:
+            result.removed.append(_as_dict(old_key, old_attributes))
+            i += 1
+        elif new_key < old_key:
+            result.added.append(_as_dict(new_key, new_attributes))
+            j += 1
+        else:
+            if old_attributes != new_attributes:
+                changes = {
+                    name: (before, after)
+                    for name, before, after in zip(TRACKED_ATTRIBUTES, old_attributes, new_attributes)
+                    if before != after
+                }
+                result.changed.append({'ip_address': _ip_string(new_key), 'changes': changes})
+            i += 1
+            j += 1
+
+    result.removed.extend(_as_dict(key, attributes) for key, attributes in old[i:])
+    result.added.extend(_as_dict(key, attributes) for key, attributes in new[j:])
+    return result
+
+
+class ScanHistory:
+    """
+    SQLite-backed history of discovery results.
+
+    Each scan is one row: its IPv4 hosts as a sorted array of big-endian
+    32-bit integers, IPv6 hosts as sorted 16-byte big-endian values, and the
+    tracked attributes of every host as zlib-compressed JSON in the same
+    order. Scans are therefore already sorted when loaded, and two of
+    them diff in a single linear merge. Only the newest `keep` scans are
+    retained.
+    """
+
+    def __init__(self, path: str, keep: int = 365):
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.keep = keep
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS scans (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    completed_at REAL NOT NULL,
+                    targets TEXT NOT NULL,
+                    device_count INTEGER NOT NULL,
+                    ipv4 BLOB NOT NULL,
+                    ipv6 BLOB NOT NULL,
+                    attributes BLOB NOT NULL
+                )"""
+            )
+
+    def save_scan(self, devices: Iterable[Device], targets: Iterable[str] = (), now: Optional[float] = None) -> int:
+        """
+        Persist the results of one scan.
+
+        Args:
+            devices: Devices found by the scan (duplicates by IP collapse)
+            targets: Targets that were scanned
+            now: Completion timestamp (defaults to now)
+
+        Returns:
+            Scan id
+        """
+        records: Dict[Tuple[int, int], tuple] = {}
+        for device in devices:
+            address = ipaddress.ip_address(device.ip_address)
+            records[(address.version, int(address))] = device_attributes(device)
+
+        keys = sorted(records)
+        ipv4_values = [value for version, value in keys if version == 4]
+        ipv4 = struct.pack(f'>{len(ipv4_values)}I', *ipv4_values)
+        ipv6 = b''.join(value.to_bytes(16, 'big') for version, value in keys if version == 6)
+        attributes = zlib.compress(json.dumps([records[key] for key in keys]).encode('utf-8'))
+
+        if isinstance(targets, str):
+            targets = [targets]
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """INSERT INTO scans (completed_at, targets, device_count, ipv4, ipv6, attributes)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (
+                    time.time() if now is None else now,
+                    json.dumps(list(targets)),
+                    len(keys),
+                    ipv4,
+                    ipv6,
+                    attributes,
+                )
+            )
+            if self.keep:
+                self._conn.execute(
+                    "DELETE FROM scans WHERE id NOT IN (SELECT id FROM scans ORDER BY id DESC LIMIT ?)",
+                    (self.keep,)
+                )
+            return cursor.lastrowid
+
+    def list_scans(self, limit: int = 50) -> List[Dict]:
+        """
+        Most recent scans, newest first.
+
+        Returns:
+            List of dicts with 'id', 'completed_at', 'targets' and 'device_count'
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, completed_at, targets, device_count FROM scans ORDER BY id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+
+        return [
+            {'id': scan_id, 'completed_at': completed_at, 'targets': json.loads(targets), 'device_count': count}
+            for scan_id, completed_at, targets, count in rows
+        ]
+
+    def load_records(self, scan_id: int) -> ScanRecords:
+        """
+        Load a scan's records, sorted by address.
+
+        Raises:
+            KeyError: If the scan does not exist
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ipv4, ipv6, attributes FROM scans WHERE id = ?", (scan_id,)
+            ).fetchone()
+
+        if row is None:
+            raise KeyError(f"Scan {scan_id} not found")
+
+        ipv4_blob, ipv6_blob, attributes_blob = row
+        ipv4 = struct.unpack(f'>{len(ipv4_blob) // 4}I', ipv4_blob)
+        keys = [(4, value) for value in ipv4]
+        keys.extend(
+            (6, int.from_bytes(ipv6_blob[offset:offset + 16], 'big'))
+            for offset in range(0, len(ipv6_blob), 16)
+        )
+        attributes = json.loads(zlib.decompress(attributes_blob).decode('utf-8'))
+
+        return [(key, tuple(values)) for key, values in zip(keys, attributes)]
+
+    def diff(self, old_scan: int, new_scan: int) -> ScanDiff:
+        """
+        Diff two stored scans.
+
+        Raises:
+            KeyError: If either scan does not exist
+        """
+        return diff_records(self.load_records(old_scan), self.load_records(new_scan), old_scan, new_scan)
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
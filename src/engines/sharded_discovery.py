@@ -0,0 +1,275 @@
+"""
+Sharded Discovery
+Multi-process discovery sweeps, one probe loop per CPU core
+"""
+
+import asyncio
+import copy
+import logging
+import multiprocessing
+import os
+from datetime import datetime
+from multiprocessing.connection import wait
+from typing import Callable, Dict, Iterator, List, Optional
+
+from models.device import Device, DeviceStatus
+from utils.ip_ranges import AddressRange, IPRangeSet
+
+
+# Upper bound on blocks per worker, so huge IPv6 targets get coarser blocks
+MAX_BLOCKS_PER_SHARD = 65536
+
+# Worker progress is reported every this many completed addresses
+PROGRESS_BATCH = 256
+
+
+def default_workers() -> int:
+    """Number of usable CPU cores"""
+    if hasattr(os, 'sched_getaffinity'):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def shard_ranges(range_set: IPRangeSet, shards: int, block_size: int = 256) -> List[List[AddressRange]]:
+    """
+    Split an address set into interleaved shards.
+
+    The set is cut into blocks aligned to block_size (a power of two), and
+    blocks are dealt round-robin so dense subnets are spread over every
+    shard. Aligned blocks keep each subnet whole within one shard, so
+    per-subnet rate limits still hold.
+
+    Args:
+        range_set: Addresses to split
+        shards: Number of shards
+        block_size: Addresses per block, a power of two
+
+    Returns:
+        List of shards, each a list of (version, first, last) ranges;
+        empty shards are dropped
+    """
+    total = range_set.num_addresses
+    while total // block_size > MAX_BLOCKS_PER_SHARD * shards:
+        block_size *= 2
+
+    result: List[List[AddressRange]] = [[] for _ in range(shards)]
+    turn = 0
+
+    for version, first, last in range_set.ranges():
+        start = first
+        while start <= last:
+            end = min(last, (start | (block_size - 1)))
+            shard = result[turn % shards]
+            # Merge with the shard's previous block when contiguous
+            if shard and shard[-1][0] == version and shard[-1][2] + 1 == start:
+                shard[-1] = (version, shard[-1][1], end)
+            else:
+                shard.append((version, start, end))
+            turn += 1
+            start = end + 1
+
+    return [shard for shard in result if shard]
+
+
+def _worker_config(config: dict, workers: int) -> dict:
+    """Configuration for one worker: shared budgets split, parent-only features off"""
+    worker_config = copy.deepcopy(config)
+    discovery = worker_config.setdefault('discovery', {})
+
+    discovery['reachability_cache'] = False
+    discovery['checkpoint_min_addresses'] = 0
+    for key in ('max_in_flight', 'tcp_max_concurrency'):
+        if key in discovery:
+            discovery[key] = max(1, discovery[key] // workers)
+    if discovery.get('rate_limit'):
+        discovery['rate_limit'] = discovery['rate_limit'] / workers
+
+    return worker_config
+
+
+def _shard_worker(config: dict, ranges: List[AddressRange], conn) -> None:
+    """
+    Worker process entry point: sweep one shard and stream results back.
+
+    Messages sent on conn:
+        ('device', ip, response_time_ms, open_ports)
+        ('progress', completed, total)
+        ('done', scan_summary)
+        ('error', message)
+
+    Progress counts addresses with a final outcome, not probes, so
+    retries never push it past the shard's address count.
+    """
+    from engines.discovery_engine import DiscoveryEngine
+
+    try:
+        engine = DiscoveryEngine(config)
+        range_set = IPRangeSet(ranges)
+        total = range_set.num_addresses
+        completed = 0
+        last_sent = 0
+
+        def on_complete(ip: str, device: Optional[Device]) -> None:
+            nonlocal completed, last_sent
+            completed += 1
+            if completed - last_sent >= PROGRESS_BATCH or completed == total:
+                conn.send(('progress', completed, total))
+                last_sent = completed
+
+        async def run() -> None:
+            async for device in engine._aiter_ranges(range_set, completion_hook=on_complete):
+                conn.send(('device', device.ip_address, device.response_time, tuple(device.open_ports)))
+
+        asyncio.run(run())
+        conn.send(('done', engine.last_scan_summary))
+
+    except Exception as e:
+        try:
+            conn.send(('error', str(e)))
+        except (OSError, ValueError):
+            pass
+
+    finally:
+        conn.close()
+
+
+def iter_sharded(
+    config: dict,
+    range_set: IPRangeSet,
+    workers: int,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    block_size: int = 256
+) -> Iterator[Device]:
+    """
+    Sweep an address set with one worker process per shard.
+
+    Workers are spawned (not forked), so it is safe to call from a GUI
+    thread. Each sends only compact tuples for found devices plus batched
+    progress counts; Device objects are built here. Closing the generator
+    early terminates the workers.
+
+    A worker that fails or exits without finishing does not stop the
+    others; its shard is reported in the summary's 'failed_shards' count
+    (and its addresses in 'unscanned_addresses'), so a partial sweep is
+    never mistaken for a complete one.
+
+    Args:
+        config: Application configuration
+        range_set: Addresses to sweep
+        workers: Number of worker processes
+        progress_callback: Optional callback(completed, total) counting
+                           finished addresses over all workers
+        block_size: Shard block size (see shard_ranges)
+
+    Yields:
+        Discovered Device objects
+
+    Returns:
+        Summary dict merged from the workers' scan summaries (generator
+        return value)
+    """
+    logger = logging.getLogger(__name__)
+    shards = shard_ranges(range_set, max(1, workers), block_size)
+    worker_config = _worker_config(config, len(shards) or 1)
+    context = multiprocessing.get_context('spawn')
+
+    processes = []
+    conns = []
+    shard_of: Dict = {}
+    progress: Dict = {}
+    summaries: List[Dict] = []
+    finished = set()
+    total = range_set.num_addresses
+
+    logger.info(f"Scanning {total} hosts with {len(shards)} worker process(es)...")
+
+    try:
+        for ranges in shards:
+            parent_conn, child_conn = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_shard_worker,
+                args=(worker_config, ranges, child_conn),
+                name='discovery-shard',
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            processes.append(process)
+            conns.append(parent_conn)
+            shard_of[parent_conn] = ranges
+
+        while conns:
+            for conn in wait(conns):
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    conns.remove(conn)
+                    continue
+
+                kind = message[0]
+
+                if kind == 'device':
+                    _, ip, response_time, open_ports = message
+                    yield Device(
+                        ip_address=ip,
+                        status=DeviceStatus.REACHABLE,
+                        last_seen=datetime.now(),
+                        open_ports=list(open_ports),
+                        response_time=response_time
+                    )
+
+                elif kind == 'progress':
+                    progress[conn] = message[1]
+                    if progress_callback:
+                        progress_callback(sum(progress.values()), total)
+
+                elif kind == 'done':
+                    summaries.append(message[1])
+                    finished.add(conn)
+
+                elif kind == 'error':
+                    logger.error(f"Discovery worker failed: {message[1]}")
+
+    finally:
+        for conn in conns:
+            conn.close()
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    summary = merge_summaries(summaries)
+    failed = [ranges for conn, ranges in shard_of.items() if conn not in finished]
+    summary['failed_shards'] = len(failed)
+    summary['unscanned_addresses'] = sum(IPRangeSet(ranges).num_addresses for ranges in failed)
+    if failed:
+        logger.error(
+            f"Sweep incomplete: {len(failed)} of {len(shards)} worker(s) failed, "
+            f"{summary['unscanned_addresses']} address(es) not fully scanned"
+        )
+    return summary
+
+
+def merge_summaries(summaries: List[Dict]) -> Dict:
+    """
+    Combine per-worker scan summaries.
+
+    Counters are summed, duration is the longest worker's, and rates and
+    ratios are recomputed from the totals.
+    """
+    merged: Dict = {}
+    for summary in summaries:
+        for key, value in summary.items():
+            if key == 'duration':
+                merged[key] = max(merged.get(key, 0), value)
+            elif key not in ('probe_rate', 'first_probe_loss'):
+                merged[key] = merged.get(key, 0) + value
+
+    if merged:
+        duration = merged.get('duration', 0)
+        merged['probe_rate'] = round(merged.get('probes_sent', 0) / duration, 1) if duration else 0.0
+        responders = merged.get('responders', 0)
+        merged['first_probe_loss'] = (
+            round(merged.get('recovered_on_retry', 0) / responders, 4) if responders else 0.0
+        )
+    return merged
@@ -0,0 +1,433 @@
+"""
+SNMP Prober
+Asynchronous SNMP v1/v2c GET requests over a shared UDP socket
+
+Discovery only needs community-string GETs of a few scalars from
+thousands of agents at once, so the small BER codec below is used rather
+than pysnmp. pysnmp allocates engine and MIB state per request, which
+dominates at that fan-out. Its asyncio API has also changed across the
+releases our requirement range admits (getCmd in 4.x, get_cmd and async
+transport targets in 6.x/7.x). pysnmp remains the library for anything
+beyond this (SNMPv3, walks, traps).
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+from typing import Dict, List, Optional, Tuple, Union
+
+
+# Universal and SNMP application tags
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_NULL = 0x05
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+TAG_IP_ADDRESS = 0x40
+TAG_COUNTER32 = 0x41
+TAG_GAUGE32 = 0x42
+TAG_TIMETICKS = 0x43
+TAG_COUNTER64 = 0x46
+TAG_NO_SUCH_OBJECT = 0x80
+TAG_NO_SUCH_INSTANCE = 0x81
+TAG_END_OF_MIB_VIEW = 0x82
+
+PDU_GET_REQUEST = 0xA0
+PDU_GET_RESPONSE = 0xA2
+
+SNMP_VERSIONS = {'1': 0, '2c': 1}
+
+# MIB-2 system group
+SYS_DESCR = '1.3.6.1.2.1.1.1.0'
+SYS_OBJECT_ID = '1.3.6.1.2.1.1.2.0'
+SYS_UPTIME = '1.3.6.1.2.1.1.3.0'
+SYS_NAME = '1.3.6.1.2.1.1.5.0'
+
+SYSTEM_OIDS = [SYS_DESCR, SYS_OBJECT_ID, SYS_UPTIME, SYS_NAME]
+
+# SNMP-FRAMEWORK-MIB snmpEngineID, unique per agent
+SNMP_ENGINE_ID = '1.3.6.1.6.3.10.2.1.1.0'
+
+# ENTITY-MIB entPhysicalSerialNum of the first entity, the chassis on most agents
+ENT_PHYSICAL_SERIAL = '1.3.6.1.2.1.47.1.1.1.1.11.1'
+
+
+class ObjectIdentifier(str):
+    """OID value, kept distinct from OCTET STRING when encoding"""
+
+
+class TimeTicks(int):
+    """TimeTicks value (hundredths of a second)"""
+
+    def __str__(self) -> str:
+        seconds = int(self) // 100
+        days, seconds = divmod(seconds, 86400)
+        hours, seconds = divmod(seconds, 3600)
+        minutes, seconds = divmod(seconds, 60)
+        return f"{days} days, {hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+SnmpValue = Union[None, int, str, bytes, ObjectIdentifier, TimeTicks]
+
+
+def _encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes([length])
+    body = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes([0x80 | len(body)]) + body
+
+
+def _tlv(tag: int, value: bytes) -> bytes:
+    return bytes([tag]) + _encode_length(len(value)) + value
+
+
+def _encode_integer(value: int, tag: int = TAG_INTEGER) -> bytes:
+    length = max(1, (value.bit_length() + 8) // 8)
+    return _tlv(tag, value.to_bytes(length, 'big', signed=True))
+
+
+def _encode_oid(oid: str) -> bytes:
+    parts = [int(p) for p in oid.strip('.').split('.')]
+    if len(parts) < 2:
+        raise ValueError(f"Invalid OID: {oid}")
+
+    body = bytearray([parts[0] * 40 + parts[1]])
+    for part in parts[2:]:
+        chunk = [part & 0x7F]
+        part >>= 7
+        while part:
+            chunk.append(0x80 | (part & 0x7F))
+            part >>= 7
+        body.extend(reversed(chunk))
+
+    return _tlv(TAG_OID, bytes(body))
+
+
+def _encode_value(value: SnmpValue) -> bytes:
+    if value is None:
+        return _tlv(TAG_NULL, b'')
+    if isinstance(value, TimeTicks):
+        return _tlv(TAG_TIMETICKS, int(value).to_bytes(4, 'big'))
+    if isinstance(value, ObjectIdentifier):
+        return _encode_oid(value)
+    if isinstance(value, int):
+        return _encode_integer(value)
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return _tlv(TAG_OCTET_STRING, value)
+
+
+def encode_message(
+    version: int,
+    community: str,
+    pdu_type: int,
+    request_id: int,
+    varbinds: List[Tuple[str, SnmpValue]],
+    error_status: int = 0,
+    error_index: int = 0
+) -> bytes:
+    """
+    Encode an SNMP v1/v2c message.
+
+    Args:
+        version: Wire version (0 for v1, 1 for v2c)
+        community: Community string
+        pdu_type: PDU tag, e.g. PDU_GET_REQUEST
+        request_id: Request identifier
+        varbinds: List of (oid, value); use None for GET requests
+        error_status: PDU error-status
+        error_index: PDU error-index
+
+    Returns:
+        Encoded message bytes
+    """
+    bindings = b''.join(
+        _tlv(TAG_SEQUENCE, _encode_oid(oid) + _encode_value(value))
+        for oid, value in varbinds
+    )
+    pdu = _tlv(
+        pdu_type,
+        _encode_integer(request_id)
+        + _encode_integer(error_status)
+        + _encode_integer(error_index)
+        + _tlv(TAG_SEQUENCE, bindings)
+    )
+    return _tlv(
+        TAG_SEQUENCE,
+        _encode_integer(version) + _tlv(TAG_OCTET_STRING, community.encode('utf-8')) + pdu
+    )
+
+
+def _read_tlv(data: bytes, offset: int) -> Tuple[int, bytes, int]:
+    """Read one TLV; returns (tag, value, offset after it)"""
+    tag = data[offset]
+    length = data[offset + 1]
+    offset += 2
+
+    if length & 0x80:
+        count = length & 0x7F
+        length = int.from_bytes(data[offset:offset + count], 'big')
+        offset += count
+
+    end = offset + length
+    if end > len(data):
+        raise ValueError("Truncated BER value")
+
+    return tag, data[offset:end], end
+
+
+def _decode_oid(body: bytes) -> str:
+    first = body[0]
+    parts = [min(first // 40, 2), first - 40 * min(first // 40, 2)]
+
+    value = 0
+    for byte in body[1:]:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            parts.append(value)
+            value = 0
+
+    return '.'.join(str(p) for p in parts)
+
+
+def _decode_value(tag: int, body: bytes) -> SnmpValue:
+    if tag == TAG_INTEGER:
+        return int.from_bytes(body, 'big', signed=True)
+    if tag == TAG_OCTET_STRING:
+        # Binary values (engine IDs, MAC addresses) stay bytes, losslessly
+        try:
+            return body.decode('utf-8')
+        except UnicodeDecodeError:
+            return body
+    if tag == TAG_OID:
+        return ObjectIdentifier(_decode_oid(body))
+    if tag == TAG_TIMETICKS:
+        return TimeTicks(int.from_bytes(body, 'big'))
+    if tag in (TAG_COUNTER32, TAG_GAUGE32, TAG_COUNTER64):
+        return int.from_bytes(body, 'big')
+    if tag == TAG_IP_ADDRESS:
+        return socket.inet_ntoa(body) if len(body) == 4 else body.hex()
+    # NULL, noSuchObject, noSuchInstance, endOfMibView
+    return None
+
+
+def decode_message(data: bytes) -> Dict:
+    """
+    Decode an SNMP v1/v2c message.
+
+    Args:
+        data: Raw datagram
+
+    Returns:
+        Dict with 'version', 'community', 'pdu_type', 'request_id',
+        'error_status', 'error_index' and 'varbinds' (list of (oid, value))
+
+    Raises:
+        ValueError: If the datagram is not a well-formed SNMP message
+    """
+    try:
+        tag, message, _ = _read_tlv(data, 0)
+        if tag != TAG_SEQUENCE:
+            raise ValueError("Not an SNMP message")
+
+        _, version, offset = _read_tlv(message, 0)
+        _, community, offset = _read_tlv(message, offset)
+        pdu_type, pdu, _ = _read_tlv(message, offset)
+
+        _, request_id, offset = _read_tlv(pdu, 0)
+        _, error_status, offset = _read_tlv(pdu, offset)
+        _, error_index, offset = _read_tlv(pdu, offset)
+        _, bindings, _ = _read_tlv(pdu, offset)
+
+        varbinds = []
+        offset = 0
+        while offset < len(bindings):
+            _, binding, offset = _read_tlv(bindings, offset)
+            _, oid, value_offset = _read_tlv(binding, 0)
+            value_tag, value, _ = _read_tlv(binding, value_offset)
+            varbinds.append((_decode_oid(oid), _decode_value(value_tag, value)))
+
+        return {
+            'version': int.from_bytes(version, 'big'),
+            'community': community.decode('utf-8', errors='replace'),
+            'pdu_type': pdu_type,
+            'request_id': int.from_bytes(request_id, 'big', signed=True),
+            'error_status': int.from_bytes(error_status, 'big'),
+            'error_index': int.from_bytes(error_index, 'big'),
+            'varbinds': varbinds
+        }
+
+    except IndexError:
+        raise ValueError("Truncated SNMP message")
+
+
+class _SnmpProtocol(asyncio.DatagramProtocol):
+    """Routes received datagrams back to the prober"""
+
+    def __init__(self, prober: 'SnmpProber'):
+        self.prober = prober
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.prober._on_datagram(data, addr)
+
+    def error_received(self, exc: Exception) -> None:
+        # ICMP port unreachable etc. — the request simply times out
+        pass
+
+
+class SnmpProber:
+    """
+    Issues SNMP GET requests to many agents from one UDP socket per family.
+
+    Responses are matched to requests by request-id and source address.
+    Use as an async context manager:
+
+        async with SnmpProber(community='public') as prober:
+            values = await prober.get('10.0.0.1', SYSTEM_OIDS)
+    """
+
+    def __init__(
+        self,
+        community: str = 'public',
+        version: str = '2c',
+        port: int = 161,
+        retries: int = 1,
+        max_concurrency: int = 1024
+    ):
+        self.logger = logging.getLogger(__name__)
+
+        if str(version) not in SNMP_VERSIONS:
+            raise ValueError(f"Unsupported SNMP version: {version} (use '1' or '2c')")
+
+        self.community = community
+        self.version = SNMP_VERSIONS[str(version)]
+        self.port = port
+        self.retries = retries
+        self.max_concurrency = max_concurrency
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._transports: Dict[int, asyncio.DatagramTransport] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._request_id = 0
+        self._pending: Dict[int, Tuple[asyncio.Future, Optional[Tuple[int, int]]]] = {}
+
+    async def __aenter__(self) -> 'SnmpProber':
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    async def open(self) -> None:
+        """Bind the prober to the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def close(self) -> None:
+        """Close sockets and fail pending requests"""
+        for transport in self._transports.values():
+            transport.close()
+        self._transports.clear()
+
+        for future, _ in self._pending.values():
+            if not future.done():
+                future.set_result(None)
+        self._pending.clear()
+
+    async def _transport(self, family: int) -> asyncio.DatagramTransport:
+        """Lazily open the socket for an address family"""
+        if family not in self._transports:
+            local = ('::', 0) if family == socket.AF_INET6 else ('0.0.0.0', 0)
+            transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: _SnmpProtocol(self),
+                local_addr=local,
+                family=family
+            )
+            self._transports[family] = transport
+        return self._transports[family]
+
+    def _next_request_id(self) -> int:
+        self._request_id = (self._request_id % 0x7FFFFFFF) + 1
+        return self._request_id
+
+    async def get(self, ip: str, oids: List[str], timeout: float = 2.0) -> Optional[Dict[str, SnmpValue]]:
+        """
+        Fetch scalar OIDs from one agent.
+
+        Args:
+            ip: Agent address
+            oids: OIDs to fetch
+            timeout: Seconds to wait for each attempt
+
+        Returns:
+            Dict of oid -> value (None for missing objects), or None if the
+            agent did not answer or returned an error
+        """
+        family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+        address = _address_value(ip)
+
+        async with self._semaphore:
+            transport = await self._transport(family)
+
+            for _ in range(self.retries + 1):
+                request_id = self._next_request_id()
+                future = self._loop.create_future()
+                self._pending[request_id] = (future, address)
+
+                packet = encode_message(
+                    self.version,
+                    self.community,
+                    PDU_GET_REQUEST,
+                    request_id,
+                    [(oid, None) for oid in oids]
+                )
+
+                try:
+                    transport.sendto(packet, (ip, self.port))
+                    response = await asyncio.wait_for(future, timeout)
+                except asyncio.TimeoutError:
+                    continue
+                except OSError as e:
+                    self.logger.debug(f"SNMP send to {ip} failed: {e}")
+                    return None
+                finally:
+                    self._pending.pop(request_id, None)
+
+                if response is None:
+                    return None
+                if response['error_status'] != 0:
+                    self.logger.debug(f"SNMP error {response['error_status']} from {ip}")
+                    return None
+
+                return dict(response['varbinds'])
+
+        return None
+
+    def _on_datagram(self, data: bytes, addr) -> None:
+        """Resolve the pending request a response belongs to"""
+        try:
+            message = decode_message(data)
+        except ValueError:
+            return
+
+        if message['pdu_type'] != PDU_GET_RESPONSE:
+            return
+
+        entry = self._pending.get(message['request_id'])
+        if entry and not entry[0].done() and entry[1] == _address_value(addr[0]):
+            entry[0].set_result(message)
+
+
+def _address_value(ip: str) -> Optional[Tuple[int, int]]:
+    """
+    (version, numeric value) of an address, ignoring its text form and IPv6 zone id,
+    so replies match requests however either side formats the address.
+    """
+    try:
+        address = ipaddress.ip_address(ip.split('%', 1)[0])
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return address.version, int(address)
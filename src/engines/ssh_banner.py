@@ -0,0 +1,144 @@
+"""
+SSH Banner Grabber
+Reads SSH server identification strings and host keys without authenticating
+"""
+
+import asyncio
+import base64
+import concurrent.futures
+import hashlib
+import logging
+import socket
+from typing import Optional
+
+import paramiko
+
+
+# RFC 4253 allows other lines before the identification string
+MAX_PREAMBLE_LINES = 16
+MAX_LINE_LENGTH = 255
+
+# Key exchanges are CPU-bound and run on threads
+MAX_KEX_WORKERS = 32
+
+
+def host_key_fingerprint(key: paramiko.PKey) -> str:
+    """SHA256 fingerprint of an SSH host key, as shown by ssh-keygen"""
+    digest = hashlib.sha256(key.asbytes()).digest()
+    return 'SHA256:' + base64.b64encode(digest).decode('ascii').rstrip('=')
+
+
+class SshBannerGrabber:
+    """
+    Connects to SSH servers and reads their identification string.
+
+    grab() attempts no key exchange; the connection is reset as soon as
+    the 'SSH-' line arrives. host_key() goes as far as the key exchange,
+    which proves the server holds the key, and disconnects before
+    authentication. Concurrency is bounded by a shared semaphore and
+    every host gets one overall deadline. Use as an async context manager:
+
+        async with SshBannerGrabber() as grabber:
+            banner = await grabber.grab('10.0.0.1', 22, timeout=3.0)
+            key = await grabber.host_key('10.0.0.1', 22, timeout=3.0)
+    """
+
+    def __init__(self, max_concurrency: int = 1024):
+        self.logger = logging.getLogger(__name__)
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._kex_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    async def __aenter__(self) -> 'SshBannerGrabber':
+        self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._semaphore = None
+        if self._kex_executor is not None:
+            self._kex_executor.shutdown(wait=False, cancel_futures=True)
+            self._kex_executor = None
+
+    def open(self) -> None:
+        """Bind the grabber to the running event loop"""
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def grab(self, ip: str, port: int = 22, timeout: float = 3.0) -> Optional[str]:
+        """
+        Read the SSH identification string from a host.
+
+        Args:
+            ip: Host address
+            port: SSH port
+            timeout: Deadline for connect plus banner, in seconds
+
+        Returns:
+            Identification string (e.g. 'SSH-2.0-Cisco-1.25'), or None
+        """
+        async with self._semaphore:
+            try:
+                return await asyncio.wait_for(self._read_banner(ip, port), timeout)
+            except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return None
+
+    async def _read_banner(self, ip: str, port: int) -> Optional[str]:
+        reader, writer = await asyncio.open_connection(ip, port, limit=MAX_LINE_LENGTH * 4)
+
+        try:
+            for _ in range(MAX_PREAMBLE_LINES):
+                line = await reader.readline()
+                if not line:
+                    return None
+
+                text = line.decode('ascii', errors='replace').strip()
+                if text.startswith('SSH-'):
+                    return text[:MAX_LINE_LENGTH]
+
+            return None
+
+        finally:
+            # Reset rather than close: no need for a graceful shutdown
+            writer.transport.abort()
+
+    async def host_key(self, ip: str, port: int = 22, timeout: float = 3.0) -> Optional[str]:
+        """
+        Read a host's SSH host key without authenticating.
+
+        Args:
+            ip: Host address
+            port: SSH port
+            timeout: Deadline for connect plus key exchange, in seconds
+
+        Returns:
+            'SHA256:...' fingerprint of the host key, or None
+        """
+        if self._kex_executor is None:
+            self._kex_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.max_concurrency, MAX_KEX_WORKERS), thread_name_prefix='ssh-kex'
+            )
+
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            # The deadline is enforced by the socket and paramiko, so time
+            # spent queued for a worker thread does not count against it
+            return await loop.run_in_executor(self._kex_executor, self._read_host_key, ip, port, timeout)
+
+    def _read_host_key(self, ip: str, port: int, timeout: float) -> Optional[str]:
+        try:
+            sock = socket.create_connection((ip, port), timeout=timeout)
+        except OSError:
+            return None
+
+        transport = None
+        try:
+            transport = paramiko.Transport(sock)
+            transport.banner_timeout = timeout
+            transport.start_client(timeout=timeout)
+            return host_key_fingerprint(transport.get_remote_server_key())
+        except (paramiko.SSHException, OSError, EOFError) as e:
+            self.logger.debug(f"Could not read SSH host key of {ip}: {e}")
+            return None
+        finally:
+            if transport is not None:
+                transport.close()
+            sock.close()
@@ -0,0 +1,157 @@
+"""
+TCP Prober
+Non-blocking TCP connect probing for networks that filter ICMP
+"""
+
+import asyncio
+import errno
+import logging
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# File descriptors kept free for the rest of the application
+RESERVED_FDS = 128
+
+
+def raise_fd_limit(wanted: int) -> int:
+    """
+    Raise the soft open-file limit towards wanted, within the hard limit.
+
+    Args:
+        wanted: Desired number of descriptors
+
+    Returns:
+        The soft limit now in effect (wanted if limits are not enforced)
+    """
+    if resource is None:
+        return wanted
+
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY:
+            target = max(soft, wanted)
+        else:
+            target = min(max(soft, wanted), hard)
+
+        if target > soft:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        return target
+
+    except (ValueError, OSError):
+        return wanted
+
+
+class TcpProber:
+    """
+    Probes hosts with non-blocking TCP connects to a set of ports.
+
+    All connect attempts share one semaphore, so the number of half-open
+    sockets is bounded globally rather than per host. A refused connection
+    (RST) still proves the host is up. Use as an async context manager:
+
+        async with TcpProber([22, 443]) as prober:
+            open_ports, rtt = await prober.probe('10.0.0.1', timeout=1.0)
+    """
+
+    def __init__(self, ports: List[int], max_concurrency: int = 4096):
+        self.logger = logging.getLogger(__name__)
+        self.ports = list(ports)
+
+        limit = raise_fd_limit(max_concurrency + RESERVED_FDS)
+        self.max_concurrency = max(1, min(max_concurrency, limit - RESERVED_FDS))
+        if self.max_concurrency < max_concurrency:
+            self.logger.warning(
+                f"TCP probe concurrency capped at {self.max_concurrency} by the open file limit"
+            )
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self) -> 'TcpProber':
+        self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """Bind the prober to the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def close(self) -> None:
+        """Release the event loop binding"""
+        self._loop = None
+        self._semaphore = None
+
+    async def probe(self, ip: str, timeout: float = 1.0) -> Tuple[Dict[int, float], Optional[float]]:
+        """
+        Connect to every configured port on a host concurrently.
+
+        Args:
+            ip: IP address to probe
+            timeout: Seconds to wait for each connect
+
+        Returns:
+            Tuple of ({open port: connect RTT in seconds}, fastest answer in
+            seconds). The RTT is None if no port accepted or refused.
+        """
+        results = await asyncio.gather(*(self.connect(ip, port, timeout) for port in self.ports))
+
+        open_ports = {}
+        fastest = None
+        for port, (state, rtt) in zip(self.ports, results):
+            if state == 'open':
+                open_ports[port] = rtt
+            if rtt is not None and (fastest is None or rtt < fastest):
+                fastest = rtt
+
+        return open_ports, fastest
+
+    async def connect(self, ip: str, port: int, timeout: float = 1.0) -> Tuple[str, Optional[float]]:
+        """
+        Attempt one TCP connect.
+
+        Args:
+            ip: IP address
+            port: TCP port
+            timeout: Seconds to wait for the handshake
+
+        Returns:
+            Tuple of (state, RTT in seconds). State is 'open', 'refused'
+            or 'filtered'; RTT is None unless a SYN-ACK or RST arrived.
+        """
+        family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+
+        async with self._semaphore:
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            # Reset on close so thousands of probes don't pile up in TIME_WAIT
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._loop.sock_connect(sock, (ip, port)), timeout)
+                return 'open', time.perf_counter() - start
+
+            except ConnectionRefusedError:
+                return 'refused', time.perf_counter() - start
+
+            except asyncio.TimeoutError:
+                return 'filtered', None
+
+            except OSError as e:
+                if e.errno == errno.ECONNREFUSED:
+                    return 'refused', time.perf_counter() - start
+                return 'filtered', None
+
+            finally:
+                sock.close()
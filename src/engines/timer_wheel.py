@@ -0,0 +1,95 @@
+"""
+Timer Wheel
+Hashed timing wheel for large numbers of coarse timers
+"""
+
+import math
+import threading
+from typing import Dict, Hashable, List, Optional, Set
+
+
+class TimerWheel:
+    """
+    Timers bucketed by expiry tick in a fixed ring of slots.
+
+    Scheduling and cancelling are O(1); advancing the clock only visits
+    the slots of the ticks that passed, so thousands of timers cost one
+    thread and no per-timer heap operations. Timers further out than one
+    revolution wait in their slot for later rounds. Expiry is accurate to
+    one tick, which is plenty for session maintenance.
+
+    Each key has at most one pending timer: scheduling a key again moves
+    it. Thread-safe.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 512, now: float = 0.0):
+        self.tick = tick
+        self._slots: List[Set[Hashable]] = [set() for _ in range(slots)]
+        self._deadlines: Dict[Hashable, int] = {}  # key -> expiry tick
+        self._current = self._tick_of(now)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def _tick_of(self, when: float) -> int:
+        return math.ceil(when / self.tick)
+
+    def schedule(self, key: Hashable, when: float) -> None:
+        """Fire key at time when (or on the next advance if that has passed)"""
+        with self._lock:
+            self._discard(key)
+            expiry = max(self._tick_of(when), self._current + 1)
+            self._deadlines[key] = expiry
+            self._slots[expiry % len(self._slots)].add(key)
+
+    def cancel(self, key: Hashable) -> bool:
+        """
+        Cancel a pending timer.
+
+        Returns:
+            bool: True if the key had a timer
+        """
+        with self._lock:
+            return self._discard(key)
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        """Time a key is due, or None"""
+        expiry = self._deadlines.get(key)
+        return None if expiry is None else expiry * self.tick
+
+    def advance(self, now: float) -> List[Hashable]:
+        """
+        Move the clock forward.
+
+        Returns:
+            Keys whose timers expired, in expiry order
+        """
+        target = self._tick_of(now)
+        expired: List[Hashable] = []
+
+        with self._lock:
+            # After a long stall, one revolution visits every slot
+            start = max(self._current + 1, target - len(self._slots) + 1)
+            for tick in range(start, target + 1):
+                slot = self._slots[tick % len(self._slots)]
+                due = [key for key in slot if self._deadlines[key] <= target]
+                due.sort(key=self._deadlines.__getitem__)
+                for key in due:
+                    slot.discard(key)
+                    del self._deadlines[key]
+                expired.extend(due)
+            self._current = max(self._current, target)
+
+        return expired
+
+    def _discard(self, key: Hashable) -> bool:
+        """Remove a key's timer (lock held)"""
+        expiry = self._deadlines.pop(key, None)
+        if expiry is None:
+            return False
+        self._slots[expiry % len(self._slots)].discard(key)
+        return True
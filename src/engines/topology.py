@@ -0,0 +1,470 @@
+"""
+Topology Discovery
+CDP/LLDP neighbor crawling into a device graph
+"""
+
+import concurrent.futures
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from models.device import Device, DeviceStatus
+from engines.fingerprints import vendor_from_description
+from utils.ip_ranges import IPRangeSet
+
+
+_IPV4 = r'\d{1,3}(?:\.\d{1,3}){3}'
+
+# Entries of 'show ... neighbors detail' are separated by lines of dashes
+_ENTRY_SEPARATOR = re.compile(r'^\s*-{5,}\s*$', re.MULTILINE)
+
+
+@dataclass
+class Neighbor:
+    """One entry of a CDP or LLDP neighbor table"""
+    hostname: Optional[str]
+    ip_address: Optional[str]
+    local_interface: Optional[str]
+    remote_interface: Optional[str]
+    platform: Optional[str]
+    protocol: str
+
+
+@dataclass
+class Link:
+    """Adjacency between two graph nodes"""
+    source: str
+    target: str
+    source_interface: Optional[str]
+    target_interface: Optional[str]
+    protocol: str
+
+
+def _field(pattern: str, text: str) -> Optional[str]:
+    """First capture group of a pattern, stripped, or None"""
+    match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+    if not match:
+        return None
+    value = match.group(1).strip().strip('"')
+    return value or None
+
+
+def parse_cdp_neighbors(output: str) -> List[Neighbor]:
+    """
+    Parse 'show cdp neighbors detail' output (IOS, IOS-XE, NX-OS).
+
+    Args:
+        output: Command output
+
+    Returns:
+        List of Neighbor objects
+    """
+    neighbors = []
+
+    for entry in _ENTRY_SEPARATOR.split(output):
+        device_id = _field(r'Device ID:\s*(\S+)', entry)
+        if not device_id:
+            continue
+
+        neighbors.append(Neighbor(
+            hostname=re.sub(r'\(.*\)$', '', device_id),  # NX-OS appends the serial
+            ip_address=_field(rf'IP(?:v4)? address:\s*({_IPV4})', entry),
+            local_interface=_field(r'^Interface:\s*([^,]+),', entry),
+            remote_interface=_field(r'Port ID \(outgoing port\):\s*(\S+)', entry),
+            platform=_field(r'Platform:\s*([^,\n]+)', entry),
+            protocol='cdp'
+        ))
+
+    return neighbors
+
+
+def parse_lldp_neighbors(output: str) -> List[Neighbor]:
+    """
+    Parse 'show lldp neighbors detail' output (IOS style, also EOS and NX-OS fields).
+
+    Args:
+        output: Command output
+
+    Returns:
+        List of Neighbor objects
+    """
+    neighbors = []
+
+    for entry in _ENTRY_SEPARATOR.split(output):
+        hostname = _field(r'System Name:\s*(\S+)', entry)
+        ip_address = _field(rf'Management Address(?:es)?\s*:?\s*(?:\n\s*IP(?:v4)?\s*:?)?\s*({_IPV4})', entry)
+        if not hostname and not ip_address:
+            continue
+
+        neighbors.append(Neighbor(
+            hostname=hostname,
+            ip_address=ip_address,
+            local_interface=_field(r'Local (?:Intf|Port id|Interface):\s*(\S+)', entry),
+            remote_interface=_field(r'^\s*-?\s*Port id:\s*(\S+)', entry),
+            platform=_field(r'System Description:\s*\n?\s*([^\n]+)', entry),
+            protocol='lldp'
+        ))
+
+    return neighbors
+
+
+def interface_key(name: Optional[str]) -> Optional[str]:
+    """Comparable interface name: 'GigabitEthernet1/0/1' and 'Gi1/0/1' both give 'gi1/0/1'"""
+    if not name:
+        return None
+    match = re.match(r'([A-Za-z]+)[\s-]*([\d/.:]+)$', name.strip())
+    if not match:
+        return name.strip().lower()
+    return match.group(1)[:2].lower() + match.group(2)
+
+
+def _name_key(hostname: Optional[str]) -> Optional[str]:
+    """Comparable hostname: lower-case, without domain"""
+    return hostname.split('.', 1)[0].lower() if hostname else None
+
+
+class TopologyGraph:
+    """
+    Device graph built from neighbor tables.
+
+    Nodes are keyed by management IP address (or by hostname for
+    neighbors that advertise none). Each node's adjacency list holds its
+    links; a link seen from both ends, or over both CDP and LLDP, is kept
+    once.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, Device] = {}
+        self.adjacency: Dict[str, List[Link]] = {}
+        self._names: Dict[str, str] = {}
+        self._aliases: Dict[str, str] = {}
+        self._link_keys: Set[frozenset] = set()
+
+    @staticmethod
+    def node_key(device: Device) -> str:
+        """Key of a device's node"""
+        return device.ip_address or device.hostname
+
+    def add_node(self, device: Device) -> str:
+        """Add a device (if new) and return its node key"""
+        key = self.node_key(device)
+        if key not in self.nodes:
+            self.nodes[key] = device
+            self.adjacency[key] = []
+        self.add_alias(key, device.hostname)
+        return key
+
+    def add_alias(self, key: str, hostname: Optional[str] = None, ip_address: Optional[str] = None) -> None:
+        """Record another name or address a node is known by"""
+        name = _name_key(hostname)
+        if name:
+            self._names.setdefault(name, key)
+        if ip_address and ip_address != key:
+            self._aliases.setdefault(ip_address, key)
+
+    def resolve(self, hostname: Optional[str] = None, ip_address: Optional[str] = None) -> Optional[str]:
+        """Key of the node with this address or hostname, if any"""
+        if ip_address:
+            if ip_address in self.nodes:
+                return ip_address
+            if ip_address in self._aliases:
+                return self._aliases[ip_address]
+        name = _name_key(hostname)
+        if name and name in self._names:
+            return self._names[name]
+        if hostname in self.nodes:
+            return hostname
+        return None
+
+    def add_link(
+        self,
+        source: str,
+        target: str,
+        source_interface: Optional[str],
+        target_interface: Optional[str],
+        protocol: str
+    ) -> bool:
+        """
+        Add a link between two existing nodes.
+
+        Returns:
+            True if the link was new
+        """
+        link_key = frozenset([
+            (source, interface_key(source_interface)),
+            (target, interface_key(target_interface)),
+        ])
+        if link_key in self._link_keys:
+            return False
+        self._link_keys.add(link_key)
+
+        link = Link(source, target, source_interface, target_interface, protocol)
+        self.adjacency[source].append(link)
+        if target != source:
+            self.adjacency[target].append(link)
+        return True
+
+    @property
+    def links(self) -> List[Link]:
+        """Every link once"""
+        seen = set()
+        result = []
+        for links in self.adjacency.values():
+            for link in links:
+                if id(link) not in seen:
+                    seen.add(id(link))
+                    result.append(link)
+        return result
+
+    def neighbors(self, key: str) -> List[str]:
+        """Keys of the nodes adjacent to a node"""
+        return [link.target if link.source == key else link.source for link in self.adjacency.get(key, [])]
+
+    def to_dict(self) -> dict:
+        """Convert graph to dictionary"""
+        return {
+            'nodes': [device.to_dict() for device in self.nodes.values()],
+            'links': [asdict(link) for link in self.links],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TopologyGraph':
+        """Create graph from dictionary"""
+        graph = cls()
+        for node in data.get('nodes', []):
+            graph.add_node(Device.from_dict(dict(node)))
+        for link in data.get('links', []):
+            graph.add_link(
+                link['source'], link['target'], link['source_interface'], link['target_interface'], link['protocol']
+            )
+        return graph
+
+
+class TopologyCrawler:
+    """
+    Breadth-first CDP/LLDP crawl from seed devices.
+
+    Up to max_sessions devices are logged into at once. Every device
+    reached is queued exactly once: neighbors are matched to known nodes
+    by management address and by hostname, so a router reported under
+    several interface addresses is still visited a single time. Graph
+    updates happen only on the calling thread; sessions run in the pool.
+    """
+
+    # (command, parser)
+    NEIGHBOR_COMMANDS = (
+        ('show cdp neighbors detail', parse_cdp_neighbors),
+        ('show lldp neighbors detail', parse_lldp_neighbors),
+    )
+
+    def __init__(
+        self,
+        connection_manager,
+        max_sessions: int = 8,
+        max_depth: int = 0,
+        scope: Optional[IPRangeSet] = None
+    ):
+        """
+        Args:
+            connection_manager: ConnectionManager used to log in
+            max_sessions: Maximum concurrent SSH sessions
+            max_depth: Maximum hops from a seed to crawl (0 = unlimited)
+            scope: Only crawl neighbors inside these addresses (None = all)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.connection_manager = connection_manager
+        self.max_sessions = max(1, max_sessions)
+        self.max_depth = max_depth
+        self.scope = scope
+
+    def crawl(
+        self,
+        seeds: Iterable[Device],
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> TopologyGraph:
+        """
+        Crawl outward from seed devices.
+
+        Neighbors inherit the credential of the device that reported them.
+
+        Args:
+            seeds: Devices to start from (need credentials)
+            progress_callback: Optional callback(visited, known)
+
+        Returns:
+            TopologyGraph of every device seen
+        """
+        graph = TopologyGraph()
+        queue: Deque[Tuple[Device, int]] = deque()
+
+        for seed in seeds:
+            if graph.resolve(seed.hostname, seed.ip_address) is None:
+                graph.add_node(seed)
+                queue.append((seed, 0))
+
+        visited = 0
+        with concurrent.futures.ThreadPoolExecutor(self.max_sessions, thread_name_prefix='topology') as pool:
+            pending: Dict[concurrent.futures.Future, Tuple[Device, int]] = {}
+
+            while queue or pending:
+                while queue and len(pending) < self.max_sessions:
+                    device, depth = queue.popleft()
+                    pending[pool.submit(self._visit, device)] = (device, depth)
+
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    device, depth = pending.pop(future)
+                    visited += 1
+                    key = graph.node_key(device)
+                    graph.add_alias(key, device.hostname)
+
+                    for neighbor in future.result():
+                        neighbor_device = self._add_neighbor(graph, key, device, neighbor)
+                        if neighbor_device is not None and self._should_crawl(neighbor_device, depth + 1):
+                            queue.append((neighbor_device, depth + 1))
+
+                if progress_callback:
+                    progress_callback(visited, visited + len(queue) + len(pending))
+
+        self.logger.info(
+            f"Topology crawl visited {visited} device(s), found {len(graph.nodes)} node(s) "
+            f"and {len(graph.links)} link(s)"
+        )
+        return graph
+
+    def _add_neighbor(self, graph: TopologyGraph, key: str, reporter: Device, neighbor: Neighbor) -> Optional[Device]:
+        """
+        Add a neighbor and its link to the graph.
+
+        Returns:
+            The neighbor's Device if it is new to the graph, else None
+        """
+        new_device = None
+        neighbor_key = graph.resolve(neighbor.hostname, neighbor.ip_address)
+
+        if neighbor_key is None:
+            if not neighbor.ip_address and not neighbor.hostname:
+                return None
+            new_device = Device(
+                ip_address=neighbor.ip_address or '',
+                hostname=neighbor.hostname,
+                vendor=vendor_from_description(neighbor.platform),
+                status=DeviceStatus.UNKNOWN,
+                credential_name=reporter.credential_name
+            )
+            if neighbor.platform:
+                new_device.notes = neighbor.platform
+            neighbor_key = graph.add_node(new_device)
+        else:
+            graph.add_alias(neighbor_key, neighbor.hostname, neighbor.ip_address)
+
+        graph.add_link(key, neighbor_key, neighbor.local_interface, neighbor.remote_interface, neighbor.protocol)
+        return new_device
+
+    def _should_crawl(self, device: Device, depth: int) -> bool:
+        """True if a newly found device should be logged into"""
+        if not device.ip_address:
+            return False
+        if self.max_depth and depth > self.max_depth:
+            return False
+        return self.scope is None or device.ip_address in self.scope
+
+    def _visit(self, device: Device) -> List[Neighbor]:
+        """Log into one device and read its neighbor tables (runs in the pool)"""
+        opened = not self.connection_manager.is_connected(device)
+        if opened and not self.connection_manager.connect(device):
+            return []
+
+        try:
+            # Hold the session for the whole visit so the prompt read and
+            # neighbor commands do not interleave with other workflows
+            with self.connection_manager.checkout(device) as connection:
+                if connection is not None and not device.hostname:
+                    device.hostname = connection.find_prompt().rstrip('#>$ ').strip() or None
+
+                neighbors: List[Neighbor] = []
+                for command, parser in self.NEIGHBOR_COMMANDS:
+                    success, output = self.connection_manager.execute_command(device, command)
+                    if success:
+                        neighbors.extend(parser(output))
+                return neighbors
+
+        except Exception as e:
+            self.logger.error(f"Error reading neighbors of {device.ip_address}: {e}")
+            return []
+
+        finally:
+            if opened:
+                self.connection_manager.disconnect(device)
+
+
+class TopologyStore:
+    """
+    Crawled topologies kept in the application SQLite database, next to
+    the scan history.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS topologies (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at REAL NOT NULL,
+                    seeds TEXT NOT NULL,
+                    graph BLOB NOT NULL
+                )"""
+            )
+
+    def save(self, graph: TopologyGraph, seeds: Iterable[str] = (), now: Optional[float] = None) -> int:
+        """
+        Persist a topology.
+
+        Returns:
+            Topology id
+        """
+        blob = zlib.compress(json.dumps(graph.to_dict()).encode('utf-8'))
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO topologies (created_at, seeds, graph) VALUES (?, ?, ?)",
+                (time.time() if now is None else now, json.dumps(list(seeds)), blob)
+            )
+            return cursor.lastrowid
+
+    def load(self, topology_id: Optional[int] = None) -> Optional[TopologyGraph]:
+        """
+        Load a topology.
+
+        Args:
+            topology_id: Topology to load (None = most recent)
+
+        Returns:
+            TopologyGraph, or None if there is no such topology
+        """
+        with self._lock:
+            if topology_id is None:
+                row = self._conn.execute("SELECT graph FROM topologies ORDER BY id DESC LIMIT 1").fetchone()
+            else:
+                row = self._conn.execute("SELECT graph FROM topologies WHERE id = ?", (topology_id,)).fetchone()
+
+        if row is None:
+            return None
+        return TopologyGraph.from_dict(json.loads(zlib.decompress(row[0]).decode('utf-8')))
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
@@ -12,17 +12,25 @@ from datetime import datetime
 from models.device import Device
 from models.diagnostic_result import DiagnosticResult, Issue, CommandResult, Severity
 from engines.connection_manager import ConnectionManager
+from engines.oui_lookup import parse_neighbor_table
 
 
 class TroubleshootingEngine:
     """Handles device diagnostics and troubleshooting"""
     
-    def __init__(self, config: dict, connection_manager: ConnectionManager):
+    def __init__(
+        self,
+        config: dict,
+        connection_manager: ConnectionManager,
+        neighbor_table: Optional[Dict[str, str]] = None
+    ):
         self.logger = logging.getLogger(__name__)
         self.config = config
         self.connection_manager = connection_manager
         self.workflows = config.get('diagnostics', {}).get('workflows', {})
         self.thresholds = config.get('diagnostics', {}).get('thresholds', {})
+        # IP -> MAC entries learned from 'show arp' output
+        self.neighbor_table = neighbor_table if neighbor_table is not None else {}
     
     def run_workflow(self, device: Device, workflow_name: str) -> DiagnosticResult:
         """
@@ -70,6 +78,8 @@ class TroubleshootingEngine:
         commands = workflow.get('commands', [])
         for command in commands:
             cmd_start = time.time()
+            # Only whitelisted inventory and neighbor output is reused (see
+            # CommandCache); live state such as CPU and routes always runs
             success, output = self.connection_manager.execute_command(device, command)
             cmd_time = time.time() - cmd_start
             
@@ -258,6 +268,10 @@ class TroubleshootingEngine:
                 )
                 result.add_issue(issue)
         
+        if 'arp' in command.lower():
+            # Remember the device's ARP table for MAC vendor lookups
+            self.neighbor_table.update(parse_neighbor_table(output))
+        
         if 'ping' in command.lower():
             # Check ping success
             if 'success rate is 0' in output.lower() or '0 received' in output.lower():
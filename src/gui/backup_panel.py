@@ -12,6 +12,7 @@ from pathlib import Path
 
 from models.device import Device
 from models.backup_record import BackupRecord
+from utils.progress import ProgressChannel, ProgressSnapshot
 
 
 class BackupPanel(ctk.CTkFrame):
@@ -403,14 +404,13 @@ class BackupPanel(ctk.CTkFrame):
         """Perform backup operation"""
         
         total = len(devices)
+        progress = ProgressChannel(total=total)
+        progress.subscribe(lambda snapshot: self.after(0, lambda: self._show_backup_progress(snapshot)))
+        progress.start()
         
         for idx, device in enumerate(devices):
             try:
-                progress = (idx + 1) / total
-                self.after(0, lambda p=progress: self.backup_progress.set(p))
-                
-                status = f"Backing up {device.ip_address} ({idx+1}/{total})..."
-                self.after(0, lambda s=status: self._update_backup_status(s))
+                progress.set_message(f"Backing up {device.ip_address} ({idx+1}/{total})...")
                 
                 # Perform backup
                 record = self.backup_manager.backup_device(device, config_type)
@@ -423,12 +423,23 @@ class BackupPanel(ctk.CTkFrame):
                 self.after(0, lambda d=device, e=e: self._show_error(
                     f"Backup failed for {d.ip_address}: {str(e)}"
                 ))
+            
+            finally:
+                progress.advance()
+        
+        progress.close()
         
         # Update UI
         self.after(0, lambda: self._update_backup_status(f"✅ Backup completed for {total} device(s)"))
         self.after(0, lambda: self.backup_button.configure(state="normal", text="💾 Backup Selected Devices"))
         self.after(0, self._load_backup_history)
     
+    def _show_backup_progress(self, snapshot: ProgressSnapshot):
+        """Show a backup progress snapshot (UI thread)"""
+        self.backup_progress.set(snapshot.fraction)
+        if not snapshot.finished:
+            self._update_backup_status(snapshot.message)
+    
     def _load_backup_history(self):
         """Load backup history from disk"""
         
@@ -11,6 +11,7 @@ from datetime import datetime
 
 from models.device import Device
 from models.diagnostic_result import DiagnosticResult, Severity
+from utils.progress import ProgressChannel, ProgressSnapshot
 
 
 class DiagnosticsPanel(ctk.CTkFrame):
@@ -405,19 +406,36 @@ class DiagnosticsPanel(ctk.CTkFrame):
         
         self.after(0, lambda: self.run_button.configure(state="disabled"))
         
-        for idx, workflow in enumerate(workflows):
-            progress = (idx + 1) / len(workflows)
-            self.after(0, lambda p=progress: self.progress_bar.set(p))
-            
-            workflow_name = workflow.replace('_', ' ').title()
-            self._update_status(f"Running {workflow_name}...")
+        progress = ProgressChannel(total=len(workflows))
+        progress.subscribe(lambda snapshot: self.after(0, lambda: self._show_workflow_progress(snapshot)))
+        progress.start()
+        
+        try:
+            for workflow in workflows:
+                workflow_name = workflow.replace('_', ' ').title()
+                progress.set_message(f"Running {workflow_name}...")
+                
+                result = self.troubleshooting_engine.run_workflow(device, workflow)
+                self.diagnostic_results.append(result)
+                progress.advance()
             
-            result = self.troubleshooting_engine.run_workflow(device, workflow)
-            self.diagnostic_results.append(result)
+            progress.close()
+            self.after(0, lambda: self._update_status(f"Completed all workflows!"))
         
-        self.after(0, lambda: self._update_status(f"Completed all workflows!"))
-        self.after(0, lambda: self._update_summary())
-        self.after(0, lambda: self.run_button.configure(state="normal"))
+        except Exception as e:
+            self.logger.error(f"Error running workflows: {e}", exc_info=True)
+            self.after(0, lambda: self._show_error(f"Diagnostics failed: {str(e)}"))
+        
+        finally:
+            progress.close()
+            self.after(0, lambda: self._update_summary())
+            self.after(0, lambda: self.run_button.configure(state="normal"))
+    
+    def _show_workflow_progress(self, snapshot: ProgressSnapshot):
+        """Show a workflow progress snapshot (UI thread)"""
+        self.progress_bar.set(snapshot.fraction)
+        if not snapshot.finished:
+            self._update_status(snapshot.message)
     
     def _clear_results(self):
         """Clear all results"""
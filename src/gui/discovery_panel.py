@@ -5,11 +5,12 @@ Network device discovery interface
 
 import customtkinter as ctk
 import logging
-from typing import List, Callable
+from typing import List, Callable, Union
 import threading
 
 from models.device import Device, DeviceStatus
-from utils.validators import validate_subnet, validate_ip_range
+from utils.validators import validate_subnet, validate_ip_range, validate_targets
+from utils.progress import ProgressChannel, ProgressSnapshot
 
 
 class DiscoveryPanel(ctk.CTkFrame):
@@ -71,7 +72,7 @@ class DiscoveryPanel(ctk.CTkFrame):
         # Input field
         self.range_input = ctk.CTkEntry(
             input_frame,
-            placeholder_text="e.g., 192.168.1.0/24 or 192.168.1.1-192.168.1.50",
+            placeholder_text="e.g., 192.168.1.0/24, 192.168.1.1-192.168.1.50 or 10.0.0.0/8, !10.1.0.0/16",
             height=40,
             font=ctk.CTkFont(size=14)
         )
@@ -111,6 +112,18 @@ class DiscoveryPanel(ctk.CTkFrame):
         )
         auto_detect_button.grid(row=0, column=4, padx=10, pady=10)
         
+        # Incremental scan toggle (only probes addresses that are due)
+        self.incremental_var = ctk.BooleanVar(value=False)
+        incremental_checkbox = ctk.CTkCheckBox(
+            input_frame,
+            text="Incremental",
+            variable=self.incremental_var,
+            font=ctk.CTkFont(size=12)
+        )
+        incremental_checkbox.grid(row=1, column=3, padx=10, pady=(0, 10), sticky="w")
+        if not self.discovery_engine.reachability_cache:
+            incremental_checkbox.configure(state="disabled")
+        
         # Progress bar
         self.progress_bar = ctk.CTkProgressBar(input_frame)
         self.progress_bar.grid(row=1, column=0, columnspan=3, padx=10, pady=(0, 10), sticky="ew")
@@ -232,6 +245,24 @@ class DiscoveryPanel(ctk.CTkFrame):
         )
         export_btn.pack(side="left", padx=5, pady=10)
         
+        # Scan history diff button
+        changes_btn = ctk.CTkButton(
+            actions_frame,
+            text="📊 Scan Changes",
+            command=self._show_scan_changes,
+            width=150
+        )
+        changes_btn.pack(side="left", padx=5, pady=10)
+        
+        # CDP/LLDP topology crawl button
+        topology_btn = ctk.CTkButton(
+            actions_frame,
+            text="🕸 Crawl Topology",
+            command=self._on_topology_click,
+            width=150
+        )
+        topology_btn.pack(side="left", padx=5, pady=10)
+        
         # Connection status
         self.connection_status_label = ctk.CTkLabel(
             actions_frame,
@@ -258,47 +289,105 @@ class DiscoveryPanel(ctk.CTkFrame):
             self._update_status(f"Scanning single IP: {ip_obj}")
             is_subnet = True
         except ValueError:
-            # Not a single IP, validate as subnet or range
-            is_subnet, subnet_error = validate_subnet(network_range)
-            is_range, range_error = validate_ip_range(network_range)
-            
-            if not is_subnet and not is_range:
-                self._show_error(f"Invalid input: {subnet_error or range_error}")
-                return
+            if ',' in network_range or network_range.startswith('!'):
+                # Target list with exclusions, e.g. "10.0.0.0/8, !10.1.0.0/16"
+                is_valid, targets_error = validate_targets(network_range)
+                if not is_valid:
+                    self._show_error(f"Invalid input: {targets_error}")
+                    return
+                network_range = [entry.strip() for entry in network_range.split(',') if entry.strip()]
+                is_subnet = False
+            else:
+                # Not a single IP, validate as subnet or range
+                is_subnet, subnet_error = validate_subnet(network_range)
+                is_range, range_error = validate_ip_range(network_range)
+                
+                if not is_subnet and not is_range:
+                    self._show_error(f"Invalid input: {subnet_error or range_error}")
+                    return
         
         # Start scan in background thread
         self.scan_button.configure(state="disabled", text="⏳ Scanning...")
         self.progress_bar.set(0)
         
-        thread = threading.Thread(target=self._perform_scan, args=(network_range, is_subnet))
+        thread = threading.Thread(
+            target=self._perform_scan,
+            args=(network_range, is_subnet, self.incremental_var.get())
+        )
         thread.daemon = True
         thread.start()
     
-    def _perform_scan(self, network_range: str, is_subnet: bool):
+    def _perform_scan(self, network_range: Union[str, List[str]], is_subnet: bool, incremental: bool = False):
         """Perform network scan in background"""
         
+        # Per-host progress is coalesced into at most 10 UI updates a second
+        progress = ProgressChannel()
+        progress.subscribe(lambda snapshot: self.after(0, lambda: self._show_scan_progress(snapshot)))
+        progress.start()
+        
         try:
             self._update_status("Starting network scan...")
             
-            def progress_callback(current, total):
-                progress = current / total
-                self.after(0, lambda: self.progress_bar.set(progress))
-                self.after(0, lambda: self._update_status(f"Scanning... {current}/{total} hosts checked"))
+            # Subnets and ranges are both valid discovery targets; rows are
+            # added as devices answer instead of after the whole sweep
+            self.discovered_devices = []
+            self.after(0, self._clear_results_table)
             
-            if is_subnet:
-                devices = self.discovery_engine.discover_subnet(network_range, progress_callback)
-            else:
-                start_ip, end_ip = network_range.split('-')
-                devices = self.discovery_engine.discover_ip_range(
-                    start_ip.strip(),
-                    end_ip.strip(),
-                    progress_callback
-                )
+            # Large sweeps are checkpointed; an interrupted one is picked up
+            # where it stopped, starting from the devices it already found
+            job = self.discovery_engine.prepare_scan_job(network_range, resume=True)
+            resumed_ips = set()
+            if job and job.remaining < job.total:
+                self._update_status(f"Resuming scan job {job.job_id} ({job.remaining} hosts left)...")
+                for device in job.load_devices():
+                    resumed_ips.add(device.ip_address)
+                    self.discovered_devices.append(device)
+                    row_idx = len(self.discovered_devices)
+                    self.after(0, lambda d=device, r=row_idx: self._append_device_row(r, d))
             
-            self.discovered_devices = devices
+            for device in self.discovery_engine.iter_discover(
+                network_range, progress.update, incremental=incremental, job=job
+            ):
+                if device.ip_address in resumed_ips:
+                    continue  # Journaled just before the last checkpoint
+                self.discovered_devices.append(device)
+                row_idx = len(self.discovered_devices)
+                self.after(0, lambda d=device, r=row_idx: self._append_device_row(r, d))
             
-            # Update UI on main thread
-            self.after(0, self._update_results_table)
+            progress.close()
+            devices = self.discovered_devices
+            
+            # Cheap SNMP identification before anyone logs in over SSH
+            if devices and 'snmp' in self.discovery_engine.methods:
+                self.after(0, lambda: self._update_status(f"Identifying {len(devices)} device(s) via SNMP..."))
+                self.discovery_engine.fingerprint_devices(devices)
+                self.after(0, self._update_results_table)
+            
+            # SSH banners pick the Netmiko driver for the first login
+            if devices and 'ssh' in self.discovery_engine.methods:
+                self.after(0, lambda: self._update_status(f"Reading SSH banners from {len(devices)} device(s)..."))
+                self.discovery_engine.grab_ssh_banners(devices)
+                self.after(0, self._update_results_table)
+            
+            # PTR records name devices SNMP did not
+            if devices and self.discovery_engine.reverse_dns:
+                self.after(0, lambda: self._update_status(f"Resolving hostnames of {len(devices)} device(s)..."))
+                self.discovery_engine.resolve_hostnames(devices)
+                self.after(0, self._update_results_table)
+            
+            # MAC OUI lookup names the vendor of everything still unknown
+            if devices:
+                self.discovery_engine.identify_by_mac(devices)
+                self.after(0, self._update_results_table)
+            
+            # Keep the enriched results so later scans can be diffed against them
+            self.discovery_engine.record_scan(devices, network_range)
+            
+            # One row per physical device: fold loopback/SVI addresses into aliases
+            merged = self.discovery_engine.merge_multihomed(devices)
+            if len(merged) < len(devices):
+                self.discovered_devices = devices = merged
+                self.after(0, self._update_results_table)
             
             # More helpful status message
             if len(devices) == 0:
@@ -307,7 +396,15 @@ class DiscoveryPanel(ctk.CTkFrame):
                     "Check: 1) IP is correct 2) Device is powered on 3) Ping/ICMP is enabled 4) Network is reachable"
                 ))
             else:
-                self.after(0, lambda: self._update_status(f"✅ Scan complete! Found {len(devices)} device(s)"))
+                summary = f"✅ Scan complete! Found {len(devices)} device(s)"
+                timing = self.discovery_engine.get_scan_timing()
+                if timing:
+                    slowest = max(timing, key=lambda t: t['srtt_ms'])
+                    summary += f" (slowest subnet {slowest['subnet']}: {slowest['srtt_ms']:.1f} ms RTT)"
+                recovered = self.discovery_engine.last_scan_summary.get('recovered_on_retry', 0)
+                if recovered:
+                    summary += f", {recovered} only answered on retry"
+                self.after(0, lambda: self._update_status(summary))
             
             self.after(0, lambda: self.progress_bar.set(1.0))
             
@@ -316,15 +413,29 @@ class DiscoveryPanel(ctk.CTkFrame):
             self.after(0, lambda: self._show_error(f"Scan failed: {str(e)}"))
         
         finally:
+            progress.close()
             self.after(0, lambda: self.scan_button.configure(state="normal", text="🔍 Scan Network"))
     
-    def _update_results_table(self):
-        """Update results table with discovered devices"""
+    def _show_scan_progress(self, snapshot: ProgressSnapshot):
+        """Show a sweep progress snapshot (UI thread)"""
+        self.progress_bar.set(snapshot.fraction)
+        if not snapshot.finished:
+            self._update_status(f"Scanning... {snapshot.completed}/{snapshot.total} hosts checked")
+    
+    def _clear_results_table(self):
+        """Remove all device rows from the results table"""
         
         # Clear existing rows (except header)
         for widget in self.results_scrollable.winfo_children()[1:]:
             widget.destroy()
         
+        self.results_label_ref.configure(text="Discovered Devices (0)")
+    
+    def _update_results_table(self):
+        """Update results table with discovered devices"""
+        
+        self._clear_results_table()
+        
         # Update count
         self.results_label_ref.configure(text=f"Discovered Devices ({len(self.discovered_devices)})")
         
@@ -332,6 +443,11 @@ class DiscoveryPanel(ctk.CTkFrame):
         for idx, device in enumerate(self.discovered_devices):
             self._add_device_row(idx + 1, device)
     
+    def _append_device_row(self, row_idx: int, device: Device):
+        """Add a row for a device found while a scan is still running"""
+        self.results_label_ref.configure(text=f"Discovered Devices ({row_idx})")
+        self._add_device_row(row_idx, device)
+    
     def _add_device_row(self, row_idx: int, device: Device):
         """Add a device row to the table"""
         
@@ -446,21 +562,68 @@ class DiscoveryPanel(ctk.CTkFrame):
     def _connect_devices(self):
         """Connect to selected devices"""
         success_count = 0
+        finished = 0
         
+        devices = []
         for device in self.selected_devices:
             if not device.credential_name:
                 self.logger.warning(f"No credential assigned to {device.ip_address}")
                 continue
-            
-            self.after(0, lambda d=device: self._update_status(f"Connecting to {d.ip_address}..."))
-            
-            if self.connection_manager.connect(device):
+            devices.append(device)
+        
+        self.after(0, lambda: self._update_status(f"Connecting to {len(devices)} device(s)..."))
+        
+        # Sessions open in parallel; unreachable devices are retried with
+        # backoff without holding up the others
+        for device, connected in self.connection_manager.connect_many(devices):
+            finished += 1
+            if connected:
                 success_count += 1
-                self.after(0, lambda d=device: self._update_device_status(d, DeviceStatus.CONNECTED))
+            self.after(0, lambda d=device: self._update_device_status(d, d.status))
+            self.after(0, lambda n=finished: self._update_status(f"Connecting... {n}/{len(devices)} done"))
+            self.after(0, self._update_connection_count)
         
         self.after(0, lambda: self._update_status(f"Connected to {success_count}/{len(self.selected_devices)} device(s)"))
         self.after(0, self._update_connection_count)
     
+    def _on_topology_click(self):
+        """Handle crawl topology button click"""
+        seeds = [device for device in self.selected_devices if device.credential_name]
+        if not seeds:
+            self._show_error("Please select at least one device with credentials to start the crawl from")
+            return
+        
+        thread = threading.Thread(target=self._crawl_topology, args=(seeds,))
+        thread.daemon = True
+        thread.start()
+    
+    def _crawl_topology(self, seeds: List[Device]):
+        """Crawl CDP/LLDP neighbors from the seed devices and list new devices"""
+        self.after(0, lambda: self._update_status(f"Crawling topology from {len(seeds)} device(s)..."))
+        
+        def on_progress(visited: int, known: int):
+            self.after(0, lambda: self._update_status(f"Crawling topology: {visited}/{known} device(s) visited..."))
+        
+        graph = self.discovery_engine.discover_topology(seeds, self.connection_manager, on_progress)
+        if graph is None:
+            self.after(0, lambda: self._update_status("❌ Topology crawl failed, see the log for details"))
+            return
+        
+        known_ips = {device.ip_address for device in self.discovered_devices}
+        new_devices = [
+            device for device in graph.nodes.values()
+            if device.ip_address and device.ip_address not in known_ips
+        ]
+        for device in new_devices:
+            self.discovered_devices.append(device)
+            row_idx = len(self.discovered_devices)
+            self.after(0, lambda d=device, r=row_idx: self._append_device_row(r, d))
+        
+        self.after(0, lambda: self._update_status(
+            f"✅ Topology crawl complete! {len(graph.nodes)} device(s), {len(graph.links)} link(s), "
+            f"{len(new_devices)} new"
+        ))
+    
     def _on_disconnect_click(self):
         """Handle disconnect button click"""
         self.connection_manager.disconnect_all()
@@ -500,6 +663,11 @@ Device Type: {device.device_type.value}
 Model: {device.model or 'N/A'}
 OS Version: {device.os_version or 'N/A'}
 Status: {device.status.value}
+SSH Banner: {device.ssh_banner or 'N/A'}
+MAC Address: {device.mac_address or 'N/A'}
+Alias IPs: {', '.join(device.alias_ips) or 'None'}
+Open Ports: {', '.join(str(p) for p in device.open_ports) or 'N/A'}
+Response Time: {f'{device.response_time} ms' if device.response_time is not None else 'N/A'}
 Last Seen: {device.last_seen}
 Credential: {device.credential_name or 'Not assigned'}
         """
@@ -509,6 +677,73 @@ Credential: {device.credential_name or 'Not assigned'}
         text_box.insert("1.0", info_text)
         text_box.configure(state="disabled")
     
+    def _show_scan_changes(self):
+        """Show added, removed and changed hosts between two saved scans"""
+        scans = self.discovery_engine.list_scans()
+        if len(scans) < 2:
+            self._show_error("At least two saved scans are needed to compare")
+            return
+        
+        from datetime import datetime
+        
+        labels = {
+            f"#{scan['id']}  {datetime.fromtimestamp(scan['completed_at']).strftime('%Y-%m-%d %H:%M')}  "
+            f"{', '.join(scan['targets'])} ({scan['device_count']} devices)": scan['id']
+            for scan in scans
+        }
+        label_list = list(labels)
+        
+        dialog = ctk.CTkToplevel(self)
+        dialog.title("Scan Changes")
+        dialog.geometry("700x500")
+        
+        selector_frame = ctk.CTkFrame(dialog)
+        selector_frame.pack(fill="x", padx=10, pady=10)
+        
+        ctk.CTkLabel(selector_frame, text="From:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        old_menu = ctk.CTkOptionMenu(selector_frame, values=label_list, width=520)
+        old_menu.set(label_list[1])
+        old_menu.grid(row=0, column=1, padx=5, pady=5)
+        
+        ctk.CTkLabel(selector_frame, text="To:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        new_menu = ctk.CTkOptionMenu(selector_frame, values=label_list, width=520)
+        new_menu.set(label_list[0])
+        new_menu.grid(row=1, column=1, padx=5, pady=5)
+        
+        text_box = ctk.CTkTextbox(dialog, width=680, height=360)
+        text_box.pack(padx=10, pady=(0, 10), fill="both", expand=True)
+        
+        def compare():
+            diff = self.discovery_engine.diff_scans(labels[old_menu.get()], labels[new_menu.get()])
+            
+            lines = []
+            if diff is None:
+                lines.append("Comparison failed, see the log for details.")
+            elif not diff.has_changes():
+                lines.append("No changes.")
+            else:
+                lines.append(f"➕ New hosts ({len(diff.added)}):")
+                for host in diff.added:
+                    lines.append(f"   {host['ip_address']}  {host['hostname'] or ''}  {host['vendor'] or ''}")
+                lines.append(f"\n➖ Vanished hosts ({len(diff.removed)}):")
+                for host in diff.removed:
+                    lines.append(f"   {host['ip_address']}  {host['hostname'] or ''}  {host['vendor'] or ''}")
+                lines.append(f"\n✏️ Changed hosts ({len(diff.changed)}):")
+                for host in diff.changed:
+                    lines.append(f"   {host['ip_address']}")
+                    for name, (before, after) in host['changes'].items():
+                        lines.append(f"      {name}: {before} → {after}")
+            
+            text_box.configure(state="normal")
+            text_box.delete("1.0", "end")
+            text_box.insert("1.0", "\n".join(lines))
+            text_box.configure(state="disabled")
+        
+        ctk.CTkButton(selector_frame, text="Compare", command=compare, width=100).grid(
+            row=0, column=2, rowspan=2, padx=10, pady=5
+        )
+        compare()
+    
     def _export_to_csv(self):
         """Export discovered devices to CSV"""
         if not self.discovered_devices:
@@ -37,10 +37,14 @@ class MainWindow(ctk.CTk):
         self.logger.info("Initializing engines...")
         self.discovery_engine = DiscoveryEngine(config)
         self.connection_manager = ConnectionManager(config)
-        self.troubleshooting_engine = TroubleshootingEngine(config, self.connection_manager)
+        self.troubleshooting_engine = TroubleshootingEngine(
+            config, self.connection_manager, neighbor_table=self.discovery_engine.neighbor_table
+        )
         self.backup_manager = BackupManager(config, self.connection_manager)
         self.reporting_engine = ReportingEngine(config)
-        self.credential_manager = CredentialManager()
+        self.credential_manager = CredentialManager(
+            cache_ttl=config.get('security', {}).get('credential_cache_ttl', 300)
+        )
         
         # Device storage
         self.devices = []
@@ -277,6 +281,7 @@ class MainWindow(ctk.CTk):
         self.logger.info("Application closing...")
         
         # Disconnect all devices
+        self.connection_manager.stop_maintenance()
         self.connection_manager.disconnect_all()
         
         # Save any pending configuration
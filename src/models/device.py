@@ -51,6 +51,21 @@ class Device:
     ssh_port: int = 22
     connection_timeout: int = 10
     
+    # Discovery results
+    # Ports that accepted the sweep's TCP connect; only filled when the host
+    # was found by the 'tcp' method, not when ICMP answered first
+    open_ports: List[int] = field(default_factory=list)
+    response_time: Optional[float] = None  # milliseconds
+    ssh_banner: Optional[str] = None
+    netmiko_device_type: Optional[str] = None
+    mac_address: Optional[str] = None
+    
+    # Identity (for merging a device found under several addresses)
+    sys_name: Optional[str] = None
+    snmp_engine_id: Optional[str] = None
+    ssh_host_key: Optional[str] = None
+    alias_ips: List[str] = field(default_factory=list)
+    
     # Device information
     uptime: Optional[str] = None
     cpu_usage: Optional[float] = None
@@ -86,6 +101,15 @@ class Device:
             'notes': self.notes,
             'ssh_port': self.ssh_port,
             'connection_timeout': self.connection_timeout,
+            'open_ports': self.open_ports,
+            'response_time': self.response_time,
+            'ssh_banner': self.ssh_banner,
+            'netmiko_device_type': self.netmiko_device_type,
+            'mac_address': self.mac_address,
+            'sys_name': self.sys_name,
+            'snmp_engine_id': self.snmp_engine_id,
+            'ssh_host_key': self.ssh_host_key,
+            'alias_ips': self.alias_ips,
             'uptime': self.uptime,
             'cpu_usage': self.cpu_usage,
             'memory_usage': self.memory_usage,
@@ -5,10 +5,13 @@ Utility module initialization
 from .logger import setup_logger, get_logger
 from .config_manager import ConfigManager
 from .credential_manager import CredentialManager
+from .ip_ranges import IPRangeSet, parse_target, read_target_file, split_targets
+from .progress import ProgressChannel, ProgressSnapshot
 from .validators import (
     validate_ip_address,
     validate_subnet,
     validate_ip_range,
+    validate_targets,
     validate_port,
     validate_hostname,
     validate_credential_name,
@@ -20,9 +23,16 @@ __all__ = [
     'get_logger',
     'ConfigManager',
     'CredentialManager',
+    'IPRangeSet',
+    'parse_target',
+    'read_target_file',
+    'split_targets',
+    'ProgressChannel',
+    'ProgressSnapshot',
     'validate_ip_address',
     'validate_subnet',
     'validate_ip_range',
+    'validate_targets',
     'validate_port',
     'validate_hostname',
     'validate_credential_name',
@@ -6,21 +6,52 @@ Secure storage and retrieval of device credentials
 import keyring
 import logging
 import json
-from typing import Optional, Dict, List
-from cryptography.fernet import Fernet
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Optional, Dict, Iterable, List, Tuple
+from cryptography.fernet import Fernet, InvalidToken
 from pathlib import Path
 
 
+@dataclass(eq=False)
+class _CredentialCache:
+    """Keyring results shared by the managers of one credential store"""
+    # name -> (expiry, Fernet token of the credential JSON)
+    entries: Dict[str, Tuple[float, bytes]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # name -> [lock, number of lookups using it], for names being read
+    fetches: Dict[str, List[Any]] = field(default_factory=dict)
+    # Bumped on every invalidation (None counts invalidations of all names),
+    # so a keyring read that started before one is not cached afterwards
+    generations: Dict[Optional[str], int] = field(default_factory=dict)
+
+
+# (keyring service, metadata file) -> cache, alive while a manager uses it
+_caches: 'weakref.WeakValueDictionary[Tuple[str, str], _CredentialCache]' = weakref.WeakValueDictionary()
+_caches_lock = threading.Lock()
+
+
 class CredentialManager:
     """Manages secure storage of device credentials"""
     
     SERVICE_NAME = 'SNATT'
     CREDENTIALS_FILE = Path(__file__).parent.parent.parent / 'config' / 'credentials_meta.json'
     
-    def __init__(self):
+    def __init__(self, cache_ttl: float = 300):
         self.logger = logging.getLogger(__name__)
         self._encryption_key = self._get_or_create_key()
         self._cipher = Fernet(self._encryption_key)
+        self.cache_ttl = cache_ttl  # Seconds; 0 disables the cache
+        
+        # Managers of the same store share a cache, so saving or deleting
+        # through one invalidates what another has cached
+        store = (self.SERVICE_NAME, str(self.CREDENTIALS_FILE))
+        with _caches_lock:
+            self._cache = _caches.get(store)
+            if self._cache is None:
+                self._cache = _caches[store] = _CredentialCache()
     
     def _get_or_create_key(self) -> bytes:
         """Get or create encryption key for local encryption"""
@@ -75,17 +106,111 @@ class CredentialManager:
         except Exception as e:
             self.logger.error(f"Error saving credential: {e}")
             return False
+        
+        finally:
+            # Even a partial write changes what the keyring returns
+            self.invalidate(credential_name)
     
     def get_credential(self, credential_name: str) -> Optional[Dict[str, str]]:
         """
         Retrieve credential by name.
         
+        Results are cached for cache_ttl seconds, encrypted with the local
+        key, so connecting many devices that share a credential reads the
+        keyring once. Concurrent lookups of one uncached name share a
+        single keyring read.
+        
         Args:
             credential_name: Name of credential set
             
         Returns:
             Dict with 'username', 'password', 'enable_password' keys, or None if not found
         """
+        if not self.cache_ttl:
+            return self._read_keyring(credential_name)
+        
+        credential = self._get_cached(credential_name)
+        if credential is not None:
+            return credential
+        
+        cache = self._cache
+        with cache.lock:
+            fetch = cache.fetches.setdefault(credential_name, [threading.Lock(), 0])
+            fetch[1] += 1
+        
+        try:
+            with fetch[0]:
+                credential = self._get_cached(credential_name)
+                if credential is None:
+                    generation = self._generation(credential_name)
+                    credential = self._read_keyring(credential_name)
+                    if credential is not None:
+                        self._put_cached(credential_name, credential, generation)
+                return credential
+        finally:
+            # Keep a lock only while some lookup of the name is using it
+            with cache.lock:
+                fetch[1] -= 1
+                if not fetch[1]:
+                    del cache.fetches[credential_name]
+    
+    def prefetch(self, credential_names: Iterable[str]) -> int:
+        """
+        Load credentials into the cache ahead of a fleet operation.
+        
+        Args:
+            credential_names: Credential names (duplicates are read once)
+            
+        Returns:
+            Number of credentials found
+        """
+        return sum(
+            1 for name in dict.fromkeys(n for n in credential_names if n)
+            if self.get_credential(name) is not None
+        )
+    
+    def invalidate(self, credential_name: Optional[str] = None) -> None:
+        """
+        Drop cached credentials.
+        
+        Args:
+            credential_name: Credential to drop (None drops all)
+        """
+        cache = self._cache
+        with cache.lock:
+            cache.generations[credential_name] = cache.generations.get(credential_name, 0) + 1
+            if credential_name is None:
+                cache.entries.clear()
+            else:
+                cache.entries.pop(credential_name, None)
+    
+    def _generation(self, credential_name: str) -> Tuple[int, int]:
+        """Invalidation count affecting a credential"""
+        cache = self._cache
+        with cache.lock:
+            return cache.generations.get(None, 0), cache.generations.get(credential_name, 0)
+    
+    def _get_cached(self, credential_name: str) -> Optional[Dict[str, str]]:
+        """Unexpired cached credential, or None"""
+        entry = self._cache.entries.get(credential_name)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        try:
+            return json.loads(self._cipher.decrypt(entry[1]))
+        except InvalidToken:
+            return None  # Cached under another key
+    
+    def _put_cached(self, credential_name: str, credential: Dict[str, str], generation: Tuple[int, int]) -> None:
+        """Cache a credential, encrypted, unless it was invalidated since the read began"""
+        token = self._cipher.encrypt(json.dumps(credential).encode('utf-8'))
+        cache = self._cache
+        with cache.lock:
+            if (cache.generations.get(None, 0), cache.generations.get(credential_name, 0)) != generation:
+                return
+            cache.entries[credential_name] = (time.monotonic() + self.cache_ttl, token)
+    
+    def _read_keyring(self, credential_name: str) -> Optional[Dict[str, str]]:
+        """Read a credential from the system keyring"""
         try:
             username = keyring.get_password(self.SERVICE_NAME, f"{credential_name}_user")
             password = keyring.get_password(self.SERVICE_NAME, f"{credential_name}_pass")
@@ -131,6 +256,9 @@ class CredentialManager:
         except Exception as e:
             self.logger.error(f"Error deleting credential: {e}")
             return False
+        
+        finally:
+            self.invalidate(credential_name)
     
     def list_credentials(self) -> List[Dict[str, str]]:
         """
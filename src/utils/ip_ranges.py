@@ -0,0 +1,241 @@
+"""
+IP Ranges
+Parsing of scan targets and merged address interval sets
+"""
+
+import bisect
+import ipaddress
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+
+# (ip version, first address, last address), both ends inclusive
+AddressRange = Tuple[int, int, int]
+
+# Marks a target whose addresses are removed from the scan ('!10.1.0.0/16')
+EXCLUDE_PREFIX = '!'
+
+
+def parse_target(target: str, hosts_only: bool = True) -> AddressRange:
+    """
+    Parse a scan target into an inclusive address range.
+
+    CIDR targets cover the same addresses as ``network.hosts()``: the
+    network and broadcast addresses (IPv4) or the subnet-router anycast
+    address (IPv6) are skipped unless the prefix is /31, /32, /127 or /128.
+
+    Args:
+        target: CIDR subnet ('10.0.0.0/24'), range ('10.0.0.1-10.0.0.50')
+                or single address
+        hosts_only: Skip the network and broadcast addresses of CIDR
+                    targets; exclusions pass False to cover the whole block
+
+    Returns:
+        Tuple of (ip version, first address, last address)
+
+    Raises:
+        ValueError: If the target cannot be parsed
+    """
+    target = str(target).strip()
+
+    if '/' in target:
+        network = ipaddress.ip_network(target, strict=False)
+        first = int(network.network_address)
+        last = int(network.broadcast_address)
+
+        if hosts_only and network.prefixlen < network.max_prefixlen - 1:
+            first += 1
+            if network.version == 4:
+                last -= 1
+
+        return network.version, first, last
+
+    if '-' in target:
+        start_ip, end_ip = (ipaddress.ip_address(p.strip()) for p in target.split('-', 1))
+        if start_ip.version != end_ip.version:
+            raise ValueError(f"Mixed address families in range: {target}")
+        if end_ip < start_ip:
+            raise ValueError(f"Range start is after range end: {target}")
+        return start_ip.version, int(start_ip), int(end_ip)
+
+    address = ipaddress.ip_address(target)
+    return address.version, int(address), int(address)
+
+
+def split_targets(targets: Union[str, Iterable[str]]) -> Tuple[List[str], List[str]]:
+    """
+    Separate scan targets from exclusions.
+
+    Returns:
+        Tuple of (targets, exclusions), exclusions without their '!' prefix
+    """
+    if isinstance(targets, str):
+        targets = [targets]
+
+    includes, excludes = [], []
+    for target in targets:
+        target = str(target).strip()
+        if target.startswith(EXCLUDE_PREFIX):
+            excludes.append(target[len(EXCLUDE_PREFIX):].strip())
+        elif target:
+            includes.append(target)
+    return includes, excludes
+
+
+def read_target_file(path: Union[str, Path]) -> List[str]:
+    """
+    Read targets from a text file.
+
+    Targets are separated by newlines, commas or whitespace; anything
+    after a '#' is a comment.
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    targets = []
+    for line in Path(path).read_text().splitlines():
+        targets.extend(line.split('#', 1)[0].replace(',', ' ').split())
+    return targets
+
+
+class IPRangeSet:
+    """
+    Set of IP addresses stored as merged, sorted inclusive intervals.
+
+    Overlapping and adjacent ranges collapse into one interval, so each
+    address is enumerated once no matter how many targets cover it.
+    Membership tests are O(log n) in the number of intervals, and
+    exclusions are subtracted as whole intervals, so enumeration skips an
+    excluded block without visiting its addresses.
+    """
+
+    def __init__(self, ranges: Iterable[AddressRange] = ()):
+        self._ranges: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        self._dirty = False
+
+        for version, first, last in ranges:
+            self.add(version, first, last)
+
+    @classmethod
+    def from_targets(cls, targets: Union[str, Iterable[str]]) -> 'IPRangeSet':
+        """
+        Build a set from one target or a list of targets.
+
+        Targets prefixed with '!' are exclusions: their addresses are
+        removed from the set, whatever order they appear in. An excluded
+        CIDR block covers its network and broadcast addresses too.
+
+        Raises:
+            ValueError: If a target cannot be parsed
+        """
+        includes, excludes = split_targets(targets)
+        range_set = cls(parse_target(t) for t in includes)
+        if excludes:
+            range_set = range_set.difference(cls(parse_target(t, hosts_only=False) for t in excludes))
+        return range_set
+
+    def add(self, version: int, first: int, last: int) -> None:
+        """Add an inclusive address range"""
+        if last < first:
+            return
+
+        ranges = self._ranges[version]
+        # Ascending adds (the common case) extend the last interval in place
+        if ranges and ranges[-1][0] <= first <= ranges[-1][1] + 1:
+            if last > ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], last)
+            return
+
+        if ranges and first < ranges[-1][0]:
+            self._dirty = True
+        ranges.append((first, last))
+
+    def _normalize(self) -> None:
+        """Sort and merge overlapping or adjacent intervals"""
+        if not self._dirty:
+            return
+
+        for version, ranges in self._ranges.items():
+            ranges.sort()
+            merged: List[Tuple[int, int]] = []
+            for first, last in ranges:
+                if merged and first <= merged[-1][1] + 1:
+                    if last > merged[-1][1]:
+                        merged[-1] = (merged[-1][0], last)
+                else:
+                    merged.append((first, last))
+            self._ranges[version] = merged
+
+        self._dirty = False
+
+    def difference(self, other: 'IPRangeSet') -> 'IPRangeSet':
+        """
+        Addresses in this set but not in other.
+
+        Both interval lists are sorted, so one merge-style pass over them
+        is enough: O(n + m) in the number of intervals, independent of how
+        many addresses they span.
+        """
+        self._normalize()
+        other._normalize()
+        result = IPRangeSet()
+
+        for version in (4, 6):
+            removed = other._ranges[version]
+            idx = 0
+            for first, last in self._ranges[version]:
+                # Skip exclusions that end before this interval
+                while idx < len(removed) and removed[idx][1] < first:
+                    idx += 1
+
+                scan = idx
+                while first <= last and scan < len(removed) and removed[scan][0] <= last:
+                    cut_first, cut_last = removed[scan]
+                    if cut_first > first:
+                        result._ranges[version].append((first, cut_first - 1))
+                    first = max(first, cut_last + 1)
+                    scan += 1
+
+                if first <= last:
+                    result._ranges[version].append((first, last))
+
+        return result
+
+    def __sub__(self, other: 'IPRangeSet') -> 'IPRangeSet':
+        return self.difference(other)
+
+    def ranges(self) -> List[AddressRange]:
+        """Merged intervals as (version, first, last), IPv4 first"""
+        self._normalize()
+        return [
+            (version, first, last)
+            for version in (4, 6)
+            for first, last in self._ranges[version]
+        ]
+
+    @property
+    def num_addresses(self) -> int:
+        """Total number of distinct addresses"""
+        return sum(last - first + 1 for _, first, last in self.ranges())
+
+    def __contains__(self, ip: Union[str, ipaddress.IPv4Address, ipaddress.IPv6Address]) -> bool:
+        address = ipaddress.ip_address(ip)
+        self._normalize()
+
+        ranges = self._ranges[address.version]
+        value = int(address)
+        idx = bisect.bisect_right(ranges, (value, float('inf'))) - 1
+        return idx >= 0 and ranges[idx][0] <= value <= ranges[idx][1]
+
+    def __iter__(self) -> Iterator[str]:
+        """Lazily enumerate every address as a string, in ascending order"""
+        for version, first, last in self.ranges():
+            address_class = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+            for value in range(first, last + 1):
+                yield str(address_class(value))
+
+    def __bool__(self) -> bool:
+        return any(self._ranges.values())
+
+    def __repr__(self) -> str:
+        return f"IPRangeSet(intervals={len(self.ranges())}, addresses={self.num_addresses})"
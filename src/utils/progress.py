@@ -0,0 +1,147 @@
+"""
+Progress
+Coalesced, rate-limited progress reporting for long-running operations
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """Point-in-time view of an operation's progress"""
+    completed: int
+    total: int
+    message: str = ''
+    finished: bool = False
+
+    @property
+    def fraction(self) -> float:
+        """Completed share between 0 and 1"""
+        if self.total <= 0:
+            return 1.0 if self.finished else 0.0
+        return min(1.0, self.completed / self.total)
+
+
+class ProgressChannel:
+    """
+    Collects progress from worker threads and publishes it at a bounded rate.
+
+    Producers call advance() or update() as often as they like; these only
+    touch plain attributes and never take a lock or wake a subscriber.
+    A ticker thread publishes a snapshot to every subscriber at most
+    rate_hz times per second, and only when something changed, so a
+    65k-host sweep costs the GUI ten updates a second instead of one per
+    host. close() always publishes the final state.
+
+    Usage:
+        with ProgressChannel(total=len(devices)) as progress:
+            progress.subscribe(on_progress)
+            for device in devices:
+                ...
+                progress.advance()
+    """
+
+    def __init__(self, total: int = 0, rate_hz: float = 10.0, message: str = ''):
+        self.logger = logging.getLogger(__name__)
+        self.interval = 1.0 / rate_hz
+        self._total = total
+        self._completed = 0
+        self._message = message
+        # One counter per producer thread: each thread only writes its own
+        # slot, so concurrent advance() calls never race
+        self._slots: Dict[int, int] = {}
+        self._subscribers: List[Callable[[ProgressSnapshot], None]] = []
+        self._last_published = None
+        self._stop = threading.Event()
+        self._ticker: Optional[threading.Thread] = None
+        self._closed = False
+
+    def __enter__(self) -> 'ProgressChannel':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def subscribe(self, callback: Callable[[ProgressSnapshot], None]) -> Callable[[], None]:
+        """
+        Register a subscriber.
+
+        Callbacks run on the ticker thread (or the thread calling close())
+        and must hand GUI work to the UI thread themselves.
+
+        Returns:
+            Function that removes the subscription
+        """
+        self._subscribers = self._subscribers + [callback]
+
+        def unsubscribe() -> None:
+            self._subscribers = [s for s in self._subscribers if s is not callback]
+
+        return unsubscribe
+
+    def advance(self, count: int = 1) -> None:
+        """Add to the completed count"""
+        thread_id = threading.get_ident()
+        self._slots[thread_id] = self._slots.get(thread_id, 0) + count
+
+    def update(self, completed: int, total: Optional[int] = None) -> None:
+        """
+        Set absolute progress; usable directly as a progress_callback.
+
+        Args:
+            completed: Units completed (added to any advance() counts)
+            total: New total, if it changed
+        """
+        self._completed = completed
+        if total is not None:
+            self._total = total
+
+    def set_total(self, total: int) -> None:
+        """Change the total"""
+        self._total = total
+
+    def set_message(self, message: str) -> None:
+        """Change the status message"""
+        self._message = message
+
+    def snapshot(self, finished: bool = False) -> ProgressSnapshot:
+        """Current progress"""
+        advanced = sum(list(self._slots.values()))
+        return ProgressSnapshot(self._completed + advanced, self._total, self._message, finished)
+
+    def start(self) -> None:
+        """Start publishing"""
+        if self._ticker is None:
+            self._ticker = threading.Thread(target=self._run, name='progress-ticker', daemon=True)
+            self._ticker.start()
+
+    def close(self) -> None:
+        """Stop publishing and deliver the final snapshot"""
+        if self._closed:
+            return
+        self._closed = True
+
+        self._stop.set()
+        if self._ticker is not None and self._ticker is not threading.current_thread():
+            self._ticker.join()
+        self._publish(self.snapshot(finished=True))
+
+    def _run(self) -> None:
+        """Ticker loop"""
+        while not self._stop.wait(self.interval):
+            snapshot = self.snapshot()
+            if snapshot != self._last_published:
+                self._publish(snapshot)
+
+    def _publish(self, snapshot: ProgressSnapshot) -> None:
+        """Deliver a snapshot to every subscriber"""
+        self._last_published = snapshot
+        for callback in self._subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                self.logger.error(f"Error in progress subscriber: {e}")
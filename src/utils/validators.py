@@ -79,6 +79,35 @@ def validate_ip_range(ip_range: str) -> Tuple[bool, Optional[str]]:
         return False, f"Invalid IP range: {str(e)}"
 
 
+def validate_targets(targets: str) -> Tuple[bool, Optional[str]]:
+    """
+    Validate a comma-separated target list with optional exclusions
+    (e.g., '10.0.0.0/8, !10.1.0.0/16, !10.2.0.1-10.2.0.9').
+    
+    Args:
+        targets: Target list string
+        
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    entries = [entry.strip() for entry in targets.split(',') if entry.strip()]
+    if not any(not entry.startswith('!') for entry in entries):
+        return False, "At least one subnet, range or IP address to scan is required"
+    
+    for entry in entries:
+        target = entry.lstrip('!').strip()
+        if '/' in target:
+            valid, error = validate_subnet(target)
+        elif '-' in target:
+            valid, error = validate_ip_range(target)
+        else:
+            valid, error = validate_ip_address(target)
+        if not valid:
+            return False, f"{entry}: {error}"
+    
+    return True, None
+
+
 def validate_port(port: str) -> Tuple[bool, Optional[str]]:
     """
     Validate port number.
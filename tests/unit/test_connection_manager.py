@@ -0,0 +1,572 @@
+"""
+Unit tests for the connection manager and its session pool
+"""
+
+import threading
+import time
+
+import pytest
+from cryptography.fernet import Fernet
+from netmiko import NetmikoAuthenticationException, NetmikoTimeoutException
+from engines.command_cache import CommandCache
+from engines.connection_manager import ConnectionManager
+from engines.connection_pool import ConnectionPool
+from engines.timer_wheel import TimerWheel
+from models.device import Device, DeviceStatus
+from utils.credential_manager import CredentialManager
+
+
+class FakeTransport:
+    """Paramiko transport state"""
+
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+
+class FakeChannel:
+    """Paramiko channel"""
+
+    def __init__(self):
+        self.closed = False
+        self.transport = FakeTransport()
+
+    def get_transport(self):
+        return self.transport
+
+
+class FakeConnection:
+    """Netmiko stand-in that detects interleaved commands"""
+
+    opened = 0
+    failures = {}  # host -> exceptions raised by the next connects
+
+    def __init__(self, **params):
+        self.host = params['host']
+        if FakeConnection.failures.get(self.host):
+            raise FakeConnection.failures[self.host].pop(0)
+        self.busy = False
+        self.interleaved = False
+        self.closed = False
+        self.commands = []
+        self.probes = 0
+        self.remote_conn = FakeChannel()
+        FakeConnection.opened += 1
+
+    def is_alive(self):
+        self.probes += 1
+        return self.remote_conn.transport.active
+
+    def send_command(self, command, read_timeout=None, expect_string=None):
+        if not self.remote_conn.transport.active:
+            raise OSError('Socket is closed')
+        self.commands.append(command)
+        if self.busy:
+            self.interleaved = True
+        self.busy = True
+        time.sleep(0.001)
+        self.busy = False
+        return f"{self.host}: {command}"
+
+    def disconnect(self):
+        self.closed = True
+
+
+@pytest.fixture
+def manager(sample_config, monkeypatch):
+    """Connection manager opening fake sessions"""
+    monkeypatch.setattr(CredentialManager, '_get_or_create_key', lambda self: Fernet.generate_key())
+    monkeypatch.setattr(
+        CredentialManager, 'get_credential',
+        lambda self, name: {'username': 'admin', 'password': 'secret', 'enable_password': None}
+    )
+    monkeypatch.setattr('engines.connection_manager.ConnectHandler', FakeConnection)
+    FakeConnection.opened = 0
+    FakeConnection.failures = {}
+    return ConnectionManager(sample_config)
+
+
+class TestConnectionPool:
+    """Test slot accounting, eviction and per-device locking"""
+
+    def test_idle_session_evicted_when_full(self):
+        """Test the least recently used idle session makes room for a new one"""
+        evicted = []
+        pool = ConnectionPool(
+            max_connections=2, on_evict=lambda ip, conn, device: evicted.append(ip), evict_idle=True
+        )
+        for ip in ('10.0.0.1', '10.0.0.2'):
+            assert pool.reserve()
+            pool.add(ip, object())
+        with pool.checkout('10.0.0.1'):
+            pass
+
+        assert pool.reserve(timeout=0)
+        pool.add('10.0.0.3', object())
+
+        assert evicted == ['10.0.0.2']
+        assert pool.ips() == ['10.0.0.1', '10.0.0.3']
+        assert pool.stats()['evicted'] == 1
+
+    def test_full_pool_queues_without_eviction(self):
+        """Test idle sessions are kept and reservations wait unless eviction is enabled"""
+        evicted = []
+        pool = ConnectionPool(max_connections=1, on_evict=lambda ip, conn, device: evicted.append(ip))
+        assert pool.reserve()
+        pool.add('10.0.0.1', object())
+
+        assert not pool.reserve(timeout=0.05)
+        threading.Timer(0.05, pool.remove, args=('10.0.0.1',)).start()
+        assert pool.reserve(timeout=5)
+
+        assert evicted == []
+        assert pool.stats()['evicted'] == 0
+
+    def test_waits_for_busy_sessions(self):
+        """Test a reservation waits while every session is checked out, even with eviction"""
+        pool = ConnectionPool(max_connections=1, evict_idle=True)
+        assert pool.reserve()
+        pool.add('10.0.0.1', object())
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with pool.checkout('10.0.0.1'):
+                held.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait()
+
+        assert not pool.reserve(timeout=0.05)
+        threading.Timer(0.05, release.set).start()
+        assert pool.reserve(timeout=5)
+        thread.join()
+
+        stats = pool.stats()
+        assert stats['wait_timeouts'] == 1
+        assert stats['waits'] == 2
+
+    def test_fair_queueing(self):
+        """Test waiting reservations are granted in arrival order"""
+        pool = ConnectionPool(max_connections=1)
+        assert pool.reserve()
+        granted = []
+
+        def wait(index):
+            pool.reserve()
+            granted.append(index)
+            pool.release_reservation()
+
+        threads = []
+        for index in range(5):
+            threads.append(threading.Thread(target=wait, args=(index,)))
+            threads[-1].start()
+            while pool.stats()['waiting'] < index + 1:
+                time.sleep(0.001)
+
+        pool.release_reservation()
+        for thread in threads:
+            thread.join()
+
+        assert granted == [0, 1, 2, 3, 4]
+
+
+class TestConnectionManager:
+    """Test pooled sessions under concurrency"""
+
+    def test_concurrent_connects_open_one_session(self, manager):
+        """Test many threads connecting one device open a single session"""
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        threads = [threading.Thread(target=manager.connect, args=(device,)) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert FakeConnection.opened == 1
+        assert manager.get_active_connections_count() == 1
+        assert device.status == DeviceStatus.CONNECTED
+
+    def test_many_workers_stay_within_cap(self, manager):
+        """Test hundreds of workers never exceed the cap or interleave on a channel"""
+        manager.pool.max_connections = 8
+        manager.pool.evict_idle = True
+        devices = [Device(ip_address=f'10.0.0.{i}', credential_name='lab') for i in range(1, 21)]
+        sessions = []
+        errors = []
+
+        def work(index):
+            device = devices[index % len(devices)]
+            for _ in range(5):
+                if manager.connect(device):
+                    success, output = manager.execute_command(device, 'show clock')
+                    if success and not output.startswith(device.ip_address):
+                        errors.append(output)
+                if manager.get_active_connections_count() > 8:
+                    errors.append(manager.get_active_connections_count())
+                sessions.extend(manager.connections.values())
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(200)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = manager.get_pool_stats()
+        assert not errors
+        assert stats['peak_open'] <= 8
+        assert stats['reserved'] == 0
+        assert not any(session.interleaved for session in sessions)
+
+        manager.disconnect_all()
+        assert manager.get_active_connections_count() == 0
+
+    def test_connect_many_backoff(self, manager):
+        """Test transient failures are retried with backoff while others finish first"""
+        manager.retry_delay = 0.05
+        FakeConnection.failures = {
+            '10.0.0.2': [NetmikoTimeoutException('timed out'), NetmikoTimeoutException('timed out')],
+            '10.0.0.3': [NetmikoAuthenticationException('bad password')],
+            '10.0.0.4': [NetmikoTimeoutException('timed out')] * 3,
+        }
+        devices = [Device(ip_address=f'10.0.0.{i}', credential_name='lab') for i in range(1, 6)]
+        devices.append(Device(ip_address='10.0.0.6'))
+
+        started = time.monotonic()
+        results = [(device.ip_address, connected) for device, connected in manager.connect_many(devices)]
+        elapsed = time.monotonic() - started
+
+        assert sorted(results) == [
+            ('10.0.0.1', True), ('10.0.0.2', True), ('10.0.0.3', False),
+            ('10.0.0.4', False), ('10.0.0.5', True), ('10.0.0.6', False),
+        ]
+        # Devices that connect at once are reported before those backing off
+        assert {ip for ip, _ in results[:4]} == {'10.0.0.1', '10.0.0.3', '10.0.0.5', '10.0.0.6'}
+        assert FakeConnection.failures['10.0.0.4'] == []
+        assert devices[3].status == DeviceStatus.UNREACHABLE
+        # Two backoffs of at least 0.025s and 0.05s
+        assert 0.075 <= elapsed < 2
+
+    def test_connect_many_larger_than_pool(self, manager):
+        """Test a batch larger than the pool waits for slots instead of failing"""
+        manager.pool.max_connections = 2
+        manager.pool_timeout = 0.3
+        devices = [Device(ip_address=f'10.0.0.{i}', credential_name='lab') for i in range(1, 7)]
+        results = []
+
+        # Each device is worked on, then disconnected to free its slot
+        for device, connected in manager.connect_many(devices):
+            results.append(connected)
+            time.sleep(0.2)
+            manager.disconnect(device)
+
+        assert results == [True] * 6
+        assert manager.pool.stats()['peak_open'] == 2
+
+    def test_connect_many_gives_up_on_full_pool(self, manager):
+        """Test due devices fail once no slot frees for pool_timeout"""
+        manager.pool.max_connections = 1
+        manager.pool_timeout = 0.1
+        devices = [Device(ip_address=f'10.0.0.{i}', credential_name='lab') for i in range(1, 4)]
+
+        results = [(device.ip_address, connected) for device, connected in manager.connect_many(devices)]
+
+        assert results == [('10.0.0.1', True), ('10.0.0.2', False), ('10.0.0.3', False)]
+
+    def test_backoff_bounds(self, manager):
+        """Test backoff doubles per attempt, with jitter, up to the maximum"""
+        manager.retry_delay, manager.retry_max_delay = 2, 30
+
+        for attempt, full in ((1, 2), (2, 4), (3, 8), (6, 30)):
+            delays = [manager._backoff_delay(attempt) for _ in range(50)]
+            assert all(full / 2 <= delay <= full for delay in delays)
+            assert len(set(delays)) > 1
+
+    def test_health_checks_are_local(self, manager):
+        """Test commands cost no extra round trips until a session sits idle"""
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        manager.connect(device)
+        connection = manager.connections['10.0.0.1']
+
+        for _ in range(3):
+            assert manager.execute_command(device, 'show clock')[0]
+        assert connection.commands == ['show clock'] * 3
+        assert connection.probes == 0
+
+        manager.pool.session('10.0.0.1').last_io -= manager.health_probe_idle
+        with manager.checkout(device) as checked_out:
+            assert checked_out is connection
+        assert connection.probes == 1
+        with manager.checkout(device) as checked_out:
+            assert checked_out is connection
+        assert connection.probes == 1
+
+    def test_dead_transport_dropped(self, manager):
+        """Test a closed transport drops the session without probing the device"""
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        manager.connect(device)
+        connection = manager.connections['10.0.0.1']
+
+        connection.remote_conn.transport.active = False
+
+        assert manager.execute_command(device, 'show clock') == (False, 'No active connection')
+        assert not manager.is_connected(device)
+        assert connection.closed
+        assert connection.probes == 0
+        assert device.status == DeviceStatus.DISCONNECTED
+        assert manager.get_pool_stats()['dead_sessions'] == 1
+
+    def test_full_pool_waits_for_disconnect(self, manager):
+        """Test a connect to a full pool waits in line instead of closing open sessions"""
+        manager.pool.max_connections = 1
+        first, second = (Device(ip_address=f'10.0.0.{i}', credential_name='lab') for i in (1, 2))
+        assert manager.connect(first)
+
+        threading.Timer(0.05, manager.disconnect, args=(first,)).start()
+        assert manager.connect(second)
+        assert manager.connections.keys() == {'10.0.0.2'}
+
+        manager.pool_timeout = 0.05
+        assert not manager.connect(first)
+        assert manager.is_connected(second)
+
+    def test_checkout_holds_device(self, manager):
+        """Test a checked out session is not used by other workflows until checked in"""
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        manager.connect(device)
+        results = []
+
+        with manager.checkout(device) as connection:
+            connection.send_command('terminal length 0')
+            worker = threading.Thread(target=lambda: results.append(manager.execute_command(device, 'show clock')))
+            worker.start()
+            worker.join(timeout=0.05)
+            assert worker.is_alive()
+            assert manager.execute_command(device, 'show users')[0]
+        worker.join()
+
+        assert connection.commands == ['terminal length 0', 'show users', 'show clock']
+        assert not connection.interleaved
+        with pytest.deprecated_call():
+            assert manager.get_connection(device) is connection
+
+    def test_failed_command_keeps_live_session(self, manager):
+        """Test a command error on a healthy transport keeps the session"""
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        manager.connect(device)
+        connection = manager.connections['10.0.0.1']
+        connection.send_command = lambda *args, **kwargs: (_ for _ in ()).throw(OSError('read timed out'))
+
+        assert not manager.execute_command(device, 'show tech-support')[0]
+        assert manager.is_connected(device)
+
+
+class TestTimerWheel:
+    """Test the hashed timing wheel"""
+
+    def test_expiry_order_and_rounds(self):
+        """Test timers fire in order, including those beyond one revolution"""
+        wheel = TimerWheel(tick=1.0, slots=8)
+        wheel.schedule('late', 20)
+        wheel.schedule('b', 3.5)
+        wheel.schedule('a', 2.5)
+        wheel.schedule('cancelled', 4)
+        assert wheel.cancel('cancelled')
+
+        assert wheel.advance(2) == []
+        assert wheel.advance(5) == ['a', 'b']
+        assert wheel.advance(12) == []
+        assert wheel.advance(19.5) == ['late']
+        assert len(wheel) == 0
+
+    def test_reschedule_moves_timer(self):
+        """Test scheduling a key again replaces its timer"""
+        wheel = TimerWheel(tick=1.0, slots=8)
+        wheel.schedule('session', 3)
+        wheel.schedule('session', 30)
+
+        assert wheel.advance(10) == []
+        assert wheel.advance(100) == ['session']
+
+
+class TestSessionMaintenance:
+    """Test idle reaping and keepalives"""
+
+    def test_idle_sessions_reaped(self, manager):
+        """Test sessions idle past session_timeout are closed, busy ones kept"""
+        manager.stop_maintenance()
+        manager.session_idle_ttl = 100
+        idle = Device(ip_address='10.0.0.1', credential_name='lab')
+        busy = Device(ip_address='10.0.0.2', credential_name='lab')
+        manager.connect(idle)
+        manager.connect(busy)
+        start = time.monotonic()
+
+        assert manager.run_maintenance(start + 50)['reaped'] == 0
+        with manager.pool.checkout('10.0.0.2'):
+            assert manager.run_maintenance(start + 102)['reaped'] == 1
+        manager.pool.session('10.0.0.2').last_used = start + 102
+
+        assert not manager.is_connected(idle)
+        assert idle.status == DeviceStatus.DISCONNECTED
+        assert manager.is_connected(busy)
+        # Used until start + 102, so reaped a session timeout later
+        assert manager.run_maintenance(start + 150)['reaped'] == 0
+        assert manager.run_maintenance(start + 210)['reaped'] == 1
+        assert manager.get_pool_stats()['reaped'] == 2
+
+    def test_keepalives(self, manager):
+        """Test silent sessions get keepalives and active ones do not"""
+        manager.stop_maintenance()
+        manager.session_idle_ttl, manager.session_keepalive = 1000, 100
+        quiet = Device(ip_address='10.0.0.1', credential_name='lab')
+        chatty = Device(ip_address='10.0.0.2', credential_name='lab')
+        manager.connect(quiet)
+        manager.connect(chatty)
+        start = time.monotonic()
+
+        manager.pool.session('10.0.0.2').last_io = start + 90
+        assert manager.run_maintenance(start + 101)['keepalives'] == 1
+        assert manager.connections['10.0.0.1'].probes == 1
+        assert manager.connections['10.0.0.2'].probes == 0
+        assert manager.run_maintenance(start + 195)['keepalives'] == 1
+        assert manager.connections['10.0.0.2'].probes == 1
+
+        # Due to be reaped before the next keepalive: left alone
+        assert manager.run_maintenance(start + 950)['keepalives'] == 0
+        assert manager.get_pool_stats()['keepalives'] == 2
+
+    def test_dead_session_found_by_keepalive(self, manager):
+        """Test a failed keepalive drops the session"""
+        manager.stop_maintenance()
+        manager.session_keepalive = 10
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        manager.connect(device)
+        manager.connections['10.0.0.1'].remote_conn.transport.active = False
+
+        manager.run_maintenance(time.monotonic() + 11)
+
+        assert not manager.is_connected(device)
+        assert manager.get_pool_stats()['keepalive_failures'] == 1
+
+    def test_maintenance_thread_exits_when_idle(self, manager):
+        """Test the maintenance thread stops once no session has timers"""
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        manager.connect(device)
+        assert manager._maintenance_thread is not None
+
+        manager.disconnect(device)
+        manager._maintenance_thread.join(timeout=5)
+
+        assert manager._maintenance_thread is None
+
+
+class TestCommandCache:
+    """Test caching of read-only command output"""
+
+    def test_ttl_whitelist(self):
+        """Test only whitelisted commands are cached, longest prefix first"""
+        cache = CommandCache(ttls={'show ip': 10, 'show ip route': 30})
+
+        assert cache.ttl('show  ip   route vrf mgmt') == 30
+        assert cache.ttl('SHOW IP arp') == 10
+        assert cache.ttl('show ipv6 route') == 0
+        assert cache.ttl('show running-config') == 0
+        assert not cache.put('10.0.0.1', 'configure terminal', 'ok')
+        assert cache.get('10.0.0.1', 'configure terminal') is None
+        assert cache.stats()['misses'] == 0
+
+    def test_expiry_and_normalization(self):
+        """Test entries are shared across spacing and expire after their TTL"""
+        cache = CommandCache(ttls={'show version': 60})
+        assert cache.put('10.0.0.1', 'show version', 'IOS', now=0)
+
+        assert cache.get('10.0.0.1', ' show   version ', now=59) == 'IOS'
+        assert cache.get('10.0.0.2', 'show version', now=59) is None
+        assert cache.get('10.0.0.1', 'show version', now=60) is None
+
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 0)
+
+    def test_byte_bound_lru(self):
+        """Test the least recently used output is evicted to stay in budget"""
+        cache = CommandCache(max_bytes=10, ttls={'show': 60})
+        cache.put('10.0.0.1', 'show a', 'aaaa', now=0)
+        cache.put('10.0.0.1', 'show b', 'bbbb', now=0)
+        cache.get('10.0.0.1', 'show a', now=1)
+        cache.put('10.0.0.1', 'show c', 'cccc', now=1)
+
+        assert cache.get('10.0.0.1', 'show b', now=2) is None
+        assert cache.get('10.0.0.1', 'show a', now=2) == 'aaaa'
+        assert not cache.put('10.0.0.1', 'show d', 'x' * 11)
+        assert cache.stats()['bytes'] == 8
+        assert cache.stats()['evictions'] == 1
+
+    def test_manager_reuses_output(self, manager):
+        """Test repeated show commands reach the device once unless bypassed"""
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        manager.connect(device)
+        connection = manager.connections['10.0.0.1']
+
+        results = [manager.execute_command(device, 'show version') for _ in range(3)]
+        assert manager.execute_command(device, 'show version', use_cache=False)[0]
+
+        assert results == [(True, '10.0.0.1: show version')] * 3
+        assert connection.commands == ['show version'] * 2
+        assert manager.get_command_cache_stats()['hits'] == 2
+
+    def test_workflows_share_cached_output(self, manager):
+        """Test a second workflow reuses whitelisted output but reruns live state"""
+        from engines.discovery_engine import DiscoveryEngine
+        from engines.troubleshooting_engine import TroubleshootingEngine
+
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        manager.connect(device)
+        connection = manager.connections['10.0.0.1']
+        manager.config['diagnostics']['workflows']['interface_health'] = {
+            'commands': ['show ip interface brief', 'show interface status']
+        }
+        engine = TroubleshootingEngine(manager.config, manager)
+
+        engine.run_workflow(device, 'interface_health')
+        DiscoveryEngine(manager.config).identify_device(device, manager)
+        engine.run_workflow(device, 'interface_health')
+        DiscoveryEngine(manager.config).identify_device(device, manager)
+
+        assert connection.commands.count('show ip interface brief') == 1
+        assert connection.commands.count('show version') == 1
+        assert connection.commands.count('show interface status') == 2
+        assert manager.get_command_cache_stats()['hits'] == 2
+
+    def test_state_change_invalidates(self, manager):
+        """Test a configuration command drops the device's cached output"""
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        manager.connect(device)
+        connection = manager.connections['10.0.0.1']
+
+        manager.execute_command(device, 'show ip interface brief')
+        manager.execute_command(device, 'ping 10.0.0.2')
+        manager.execute_command(device, 'show ip interface brief')
+        manager.execute_command(device, 'clear arp-cache')
+        manager.execute_command(device, 'show ip interface brief')
+        manager.execute_command(device, 'terminal length 0')
+        manager.execute_command(device, 'show ip interface brief')
+
+        assert connection.commands.count('show ip interface brief') == 3
+
+    def test_live_state_not_cached_by_default(self, manager):
+        """Test counters, CPU, memory and routes always come from the device"""
+        device = Device(ip_address='10.0.0.1', credential_name='lab')
+        manager.connect(device)
+        connection = manager.connections['10.0.0.1']
+        commands = ['show processes cpu', 'show memory statistics', 'show interfaces', 'show ip route']
+
+        for _ in range(2):
+            for command in commands:
+                manager.execute_command(device, command)
+
+        assert connection.commands == commands * 2
@@ -0,0 +1,150 @@
+"""
+Unit tests for the credential manager's keyring cache
+"""
+
+import threading
+
+import pytest
+from cryptography.fernet import Fernet
+from utils.credential_manager import CredentialManager
+
+
+class FakeKeyring:
+    """In-memory keyring counting reads"""
+
+    def __init__(self):
+        self.passwords = {}
+        self.reads = 0
+
+    def get_password(self, service, name):
+        self.reads += 1
+        return self.passwords.get((service, name))
+
+    def set_password(self, service, name, value):
+        self.passwords[(service, name)] = value
+
+    def delete_password(self, service, name):
+        del self.passwords[(service, name)]
+
+
+@pytest.fixture
+def keyring(monkeypatch, tmp_path):
+    """Fake keyring behind credential managers sharing one key"""
+    fake = FakeKeyring()
+    key = Fernet.generate_key()
+    for name in ('get_password', 'set_password', 'delete_password'):
+        monkeypatch.setattr(f'utils.credential_manager.keyring.{name}', getattr(fake, name))
+    monkeypatch.setattr(CredentialManager, '_get_or_create_key', lambda self: key)
+    monkeypatch.setattr(CredentialManager, 'CREDENTIALS_FILE', tmp_path / 'credentials_meta.json')
+    return fake
+
+
+class TestCredentialCache:
+    """Test caching, invalidation and prefetch"""
+
+    def test_repeated_lookups_read_keyring_once(self, keyring):
+        """Test one keyring read serves many concurrent lookups"""
+        manager = CredentialManager()
+        manager.save_credential('lab', 'admin', 'secret', 'enable')
+        keyring.reads = 0
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(manager.get_credential('lab'))) for _ in range(100)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert keyring.reads == 3
+        assert results == [{'username': 'admin', 'password': 'secret', 'enable_password': 'enable'}] * 100
+
+    def test_cached_values_encrypted(self, keyring):
+        """Test passwords are not held in the cache in plain text"""
+        manager = CredentialManager()
+        manager.save_credential('lab', 'admin', 'secret')
+        manager.get_credential('lab')
+
+        _, token = manager._cache.entries['lab']
+        assert b'secret' not in token
+
+    def test_save_and_delete_invalidate_other_managers(self, keyring):
+        """Test changes through one manager are seen by another at once"""
+        settings, connections = CredentialManager(), CredentialManager()
+        settings.save_credential('lab', 'admin', 'old')
+        assert connections.get_credential('lab')['password'] == 'old'
+
+        settings.save_credential('lab', 'admin', 'new')
+        assert connections.get_credential('lab')['password'] == 'new'
+
+        settings.delete_credential('lab')
+        assert connections.get_credential('lab') is None
+
+    def test_ttl_expiry(self, keyring):
+        """Test entries are re-read after the TTL and not cached with TTL 0"""
+        manager = CredentialManager(cache_ttl=0)
+        manager.save_credential('lab', 'admin', 'secret')
+        keyring.reads = 0
+        manager.get_credential('lab')
+        manager.get_credential('lab')
+        assert keyring.reads == 6
+
+        manager = CredentialManager(cache_ttl=60)
+        manager.get_credential('lab')
+        expiry, token = manager._cache.entries['lab']
+        manager._cache.entries['lab'] = (expiry - 61, token)
+        keyring.reads = 0
+        manager.get_credential('lab')
+        assert keyring.reads == 3
+
+    def test_prefetch(self, keyring):
+        """Test prefetch reads each distinct credential once"""
+        manager = CredentialManager()
+        manager.save_credential('core', 'admin', 'a')
+        manager.save_credential('access', 'admin', 'b')
+        keyring.reads = 0
+
+        assert manager.prefetch(['core', 'access', 'core', None, 'missing']) == 2
+        reads = keyring.reads
+        for name in ['core', 'access'] * 500:
+            manager.get_credential(name)
+
+        assert keyring.reads == reads
+
+    def test_inflight_read_not_cached_after_rotation(self, keyring, monkeypatch):
+        """Test a keyring read racing a save does not cache the old password"""
+        manager = CredentialManager()
+        manager.save_credential('lab', 'admin', 'old')
+        reading, rotated = threading.Event(), threading.Event()
+        read = keyring.get_password
+
+        def slow_read(service, name):
+            value = read(service, name)
+            if name == 'lab_enable' and not rotated.is_set():
+                reading.set()
+                rotated.wait(5)
+            return value
+
+        monkeypatch.setattr('utils.credential_manager.keyring.get_password', slow_read)
+        results = []
+        reader = threading.Thread(target=lambda: results.append(manager.get_credential('lab')))
+        reader.start()
+        reading.wait(5)
+        CredentialManager().save_credential('lab', 'admin', 'new')
+        rotated.set()
+        reader.join()
+
+        assert results[0]['password'] == 'old'
+        assert manager.get_credential('lab')['password'] == 'new'
+
+    def test_state_scoped_to_store(self, keyring, monkeypatch, tmp_path):
+        """Test managers of another store share no cache and no lock is kept"""
+        manager = CredentialManager()
+        manager.save_credential('lab', 'admin', 'secret')
+        for name in ('lab', 'missing', 'lab'):
+            manager.get_credential(name)
+        assert manager._cache.fetches == {}
+
+        monkeypatch.setattr(CredentialManager, 'CREDENTIALS_FILE', tmp_path / 'other' / 'credentials_meta.json')
+        other = CredentialManager()
+        assert other._cache is not manager._cache
+        assert other._cache.entries == {}
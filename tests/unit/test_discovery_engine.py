@@ -0,0 +1,334 @@
+"""
+Unit tests for Discovery Engine
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from engines.discovery_engine import DiscoveryEngine
+from engines.icmp_prober import IcmpProber
+from engines.rate_limiter import ProbeRateLimiter
+from engines.tcp_prober import TcpProber
+from models.device import Device, DeviceStatus
+
+
+@pytest.fixture
+def subprocess_engine(sample_config, monkeypatch):
+    """Discovery engine forced onto the ping subprocess fallback"""
+    def deny():
+        raise PermissionError("denied")
+    
+    monkeypatch.setattr(IcmpProber, 'open_socket', staticmethod(deny))
+    
+    engine = DiscoveryEngine(sample_config)
+    reachable = {'10.0.0.1', '10.0.0.5'}
+    monkeypatch.setattr(engine, '_ping_host', lambda ip: ip in reachable)
+    return engine
+
+
+class TestDiscoveryEngine:
+    """Test discovery sweeps"""
+    
+    def test_subnet_fallback(self, subprocess_engine):
+        """Test subnet sweep through the subprocess fallback"""
+        progress = []
+        devices = subprocess_engine.discover_subnet(
+            '10.0.0.0/29',
+            lambda current, total: progress.append((current, total))
+        )
+        
+        assert sorted(d.ip_address for d in devices) == ['10.0.0.1', '10.0.0.5']
+        assert all(d.status == DeviceStatus.REACHABLE for d in devices)
+        assert progress[-1] == (6, 6)
+    
+    def test_ip_range_fallback(self, subprocess_engine):
+        """Test IP range sweep through the subprocess fallback"""
+        devices = subprocess_engine.discover_ip_range('10.0.0.2', '10.0.0.5')
+        
+        assert [d.ip_address for d in devices] == ['10.0.0.5']
+    
+    def test_tcp_method(self, sample_config):
+        """Test TCP connect discovery records open ports and RTT"""
+        import socket
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(4)
+        port = server.getsockname()[1]
+        
+        try:
+            sample_config['discovery'].update({'methods': ['tcp'], 'tcp_ports': [port]})
+            engine = DiscoveryEngine(sample_config)
+            
+            devices = engine.discover_ip_range('127.0.0.1', '127.0.0.1')
+        finally:
+            server.close()
+        
+        assert len(devices) == 1
+        assert devices[0].open_ports == [port]
+        assert devices[0].response_time is not None
+    
+    def test_first_answer_wins(self, subprocess_engine, monkeypatch):
+        """Test an ICMP answer does not wait for TCP connects to time out"""
+        async def filtered(self, ip, timeout=1.0):
+            await asyncio.sleep(timeout)
+            return {}, None
+        
+        monkeypatch.setattr(TcpProber, 'probe', filtered)
+        subprocess_engine.methods = ['icmp', 'tcp']
+        subprocess_engine.ping_timeout = 5
+        
+        started = time.monotonic()
+        devices = subprocess_engine.discover_ip_range('10.0.0.1', '10.0.0.1')
+        
+        assert [d.ip_address for d in devices] == ['10.0.0.1']
+        assert time.monotonic() - started < 2
+        # Ports are not waited for once ICMP has answered
+        assert devices[0].open_ports == []
+    
+    def test_ssh_method_sends_no_sweep_connects(self, subprocess_engine):
+        """Test TCP connects are only part of the sweep with the 'tcp' method"""
+        subprocess_engine.methods = ['icmp', 'snmp', 'ssh']
+        assert subprocess_engine._open_tcp_prober() is None
+    
+    def test_iter_discover_streams(self, subprocess_engine):
+        """Test iter_discover yields devices across mixed targets"""
+        devices = list(subprocess_engine.iter_discover(['10.0.0.0/30', '10.0.0.4-10.0.0.6']))
+        
+        assert sorted(d.ip_address for d in devices) == ['10.0.0.1', '10.0.0.5']
+    
+    def test_iter_discover_early_close(self, subprocess_engine):
+        """Test closing the generator early stops the sweep"""
+        stream = subprocess_engine.iter_discover('10.0.0.0/16')
+        first = next(stream)
+        stream.close()
+        
+        assert first.ip_address in ('10.0.0.1', '10.0.0.5')
+    
+    def test_discover_many_dedup(self, subprocess_engine, monkeypatch):
+        """Test overlapping targets are probed once with per-target progress"""
+        probed = []
+        monkeypatch.setattr(subprocess_engine, '_ping_host', lambda ip: probed.append(ip) or ip == '10.0.0.5')
+        
+        per_target = {}
+        devices = subprocess_engine.discover_many(
+            ['10.0.0.0/29', '10.0.0.4-10.0.0.9', '10.0.0.5'],
+            target_progress_callback=lambda t, done, total: per_target.__setitem__(t, (done, total))
+        )
+        
+        assert [d.ip_address for d in devices] == ['10.0.0.5']
+        assert sorted(probed) == sorted(set(probed))
+        assert len(probed) == 9
+        assert per_target == {
+            '10.0.0.0/29': (6, 6),
+            '10.0.0.4-10.0.0.9': (6, 6),
+            '10.0.0.5': (1, 1)
+        }
+    
+    def test_target_tracker_segments(self):
+        """Test per-target totals and attribution match a brute-force count"""
+        from engines.discovery_engine import _TargetTracker
+        from utils.ip_ranges import IPRangeSet
+        
+        targets = ['10.0.0.0/28', '10.0.0.4-10.0.0.20', '10.0.0.8', '10.0.0.30-10.0.0.40', '2001:db8::/126']
+        excludes = ['10.0.0.6', '10.0.0.10-10.0.0.32', '2001:db8::2']
+        tracker = _TargetTracker(targets, excludes)
+        excluded = IPRangeSet.from_targets(excludes)
+        
+        expected = [(IPRangeSet.from_targets(target) - excluded).num_addresses for target in targets]
+        assert tracker.totals == expected
+        
+        for ip in IPRangeSet.from_targets(targets + ['!' + e for e in excludes]):
+            owners = [idx for idx, target in enumerate(targets) if ip in IPRangeSet.from_targets(target)]
+            assert tracker.record(ip, False) == owners
+        assert tracker.completed == expected
+        assert tracker.record('10.0.0.99', False) == []
+    
+    def test_configured_exclusions(self, subprocess_engine, monkeypatch, tmp_path):
+        """Test exclusions from config, file and '!' targets are never probed"""
+        exclude_file = tmp_path / 'exclude.txt'
+        exclude_file.write_text("10.0.0.4/30  # carve-out\n")
+        subprocess_engine.exclude = ['10.0.0.1']
+        subprocess_engine.exclude_file = str(exclude_file)
+        
+        probed = []
+        monkeypatch.setattr(subprocess_engine, '_ping_host', lambda ip: probed.append(ip) or ip == '10.0.0.5')
+        
+        per_target = {}
+        devices = subprocess_engine.discover_many(
+            ['10.0.0.0/28', '!10.0.0.14'],
+            target_progress_callback=lambda t, done, total: per_target.__setitem__(t, (done, total))
+        )
+        
+        assert devices == []
+        assert sorted(probed, key=lambda ip: int(ip.split('.')[-1])) == [
+            '10.0.0.2', '10.0.0.3', '10.0.0.8', '10.0.0.9', '10.0.0.10', '10.0.0.11', '10.0.0.12', '10.0.0.13'
+        ]
+        assert per_target == {'10.0.0.0/28': (8, 8)}
+    
+    def test_missing_exclude_file(self, subprocess_engine):
+        """Test a scan is refused when its exclusions cannot be read"""
+        subprocess_engine.exclude_file = '/nonexistent/exclude.txt'
+        
+        with pytest.raises(ValueError):
+            list(subprocess_engine.iter_discover('10.0.0.0/29'))
+    
+    def test_incremental_sweep(self, subprocess_engine, monkeypatch, tmp_path):
+        """Test incremental sweeps probe known devices and skip dead space"""
+        subprocess_engine.reachability_cache = True
+        subprocess_engine.database_path = str(tmp_path / 'snatt.db')
+        
+        probed = []
+        monkeypatch.setattr(subprocess_engine, '_ping_host', lambda ip: probed.append(ip) or ip == '10.0.0.5')
+        
+        # First incremental sweep is a full one, since none has completed yet
+        devices = subprocess_engine.discover_subnet('10.0.0.0/29', incremental=True)
+        assert [d.ip_address for d in devices] == ['10.0.0.5']
+        assert len(probed) == 6
+        
+        probed.clear()
+        devices = subprocess_engine.discover_subnet('10.0.0.0/29', incremental=True)
+        assert [d.ip_address for d in devices] == ['10.0.0.5']
+        assert probed == ['10.0.0.5']
+    
+    def test_late_answer_accepted(self, subprocess_engine, monkeypatch):
+        """Test answers after the adaptive timeout but within the bound count"""
+        subprocess_engine.rtt_estimator.min_timeout = 0.01
+        subprocess_engine.rtt_estimator.observe('10.0.0.1', 0.001)
+        
+        def slow_ping(ip):
+            time.sleep(0.2)
+            return ip == '10.0.0.5'
+        
+        monkeypatch.setattr(subprocess_engine, '_ping_host', slow_ping)
+        
+        devices = subprocess_engine.discover_ip_range('10.0.0.4', '10.0.0.6')
+        
+        assert [d.ip_address for d in devices] == ['10.0.0.5']
+        timing = subprocess_engine.get_scan_timing()
+        assert timing[0]['subnet'] == '10.0.0.0/24'
+        assert timing[0]['samples'] == 2
+    
+    def test_dead_hosts_free_window_at_timeout(self, subprocess_engine, monkeypatch):
+        """Test silent probes give up their window slot at the adaptive timeout"""
+        subprocess_engine.max_in_flight = 2
+        subprocess_engine.ping_timeout = 1
+        subprocess_engine.rtt_estimator.min_timeout = 0.02
+        subprocess_engine.rtt_estimator.observe('10.0.0.1', 0.001)
+        started = {}
+        
+        async def dead_host(ip, icmp_prober, tcp_prober, timeout):
+            started[ip] = time.monotonic()
+            await asyncio.sleep(timeout)
+            return None
+        
+        monkeypatch.setattr(subprocess_engine, '_probe_host', dead_host)
+        
+        start = time.monotonic()
+        assert subprocess_engine.discover_ip_range('10.0.0.1', '10.0.0.8') == []
+        
+        # Holding slots until ping_timeout would delay the eighth probe by
+        # three full seconds; at the learned timeout it starts almost at once
+        assert len(started) == 8
+        assert max(started.values()) - start < 0.5
+    
+    def test_lingering_probes_capped(self, subprocess_engine, monkeypatch):
+        """Test late answers are accepted only within the lingering share"""
+        subprocess_engine.max_in_flight = 16
+        subprocess_engine.rtt_estimator.min_timeout = 0.01
+        subprocess_engine.rtt_estimator.observe('10.0.0.1', 0.001)
+        
+        async def slow_host(ip, icmp_prober, tcp_prober, timeout):
+            await asyncio.sleep(0.2)
+            return Device(ip_address=ip, status=DeviceStatus.REACHABLE)
+        
+        monkeypatch.setattr(subprocess_engine, '_probe_host', slow_host)
+        
+        # Every host answers late, but only 16 // 8 probes may keep listening
+        devices = subprocess_engine.discover_ip_range('10.0.0.1', '10.0.0.8')
+        
+        assert len(devices) == 2
+        assert subprocess_engine.last_scan_summary['late_answers'] == 2
+    
+    def test_throttled_subnet_leaves_window_free(self, subprocess_engine, monkeypatch):
+        """Test addresses waiting for their subnet's rate limit do not hold window slots"""
+        subprocess_engine.max_in_flight = 2
+        subprocess_engine.rate_limiter = ProbeRateLimiter(subnet_rate=20, burst=1)
+        probed = []
+        
+        async def probe(ip, icmp_prober, tcp_prober, timeout):
+            probed.append(ip)
+            return None
+        
+        monkeypatch.setattr(subprocess_engine, '_probe_host', probe)
+        
+        subprocess_engine.discover_many(['10.0.0.1-10.0.0.3', '10.0.1.1-10.0.1.3'])
+        
+        # The second subnet is probed while the first waits for its slots
+        assert probed[:2] == ['10.0.0.1', '10.0.1.1']
+        assert sorted(probed) == [f'10.0.{s}.{h}' for s in (0, 1) for h in (1, 2, 3)]
+    
+    def test_retry_non_responders(self, subprocess_engine, monkeypatch):
+        """Test only silent addresses are retried and loss is reported"""
+        subprocess_engine.probe_retries = 1
+        probed = []
+        
+        def flaky_ping(ip):
+            probed.append(ip)
+            # 10.0.0.3 drops its first probe
+            return ip == '10.0.0.1' or (ip == '10.0.0.3' and probed.count(ip) > 1)
+        
+        monkeypatch.setattr(subprocess_engine, '_ping_host', flaky_ping)
+        outcomes = []
+        
+        devices = list(subprocess_engine.iter_discover(
+            '10.0.0.1-10.0.0.4',
+            completion_hook=lambda ip, device: outcomes.append((ip, device is not None))
+        ))
+        
+        assert sorted(d.ip_address for d in devices) == ['10.0.0.1', '10.0.0.3']
+        assert sorted(probed) == ['10.0.0.1', '10.0.0.2', '10.0.0.2', '10.0.0.3', '10.0.0.3', '10.0.0.4', '10.0.0.4']
+        assert sorted(outcomes) == [('10.0.0.1', True), ('10.0.0.2', False), ('10.0.0.3', True), ('10.0.0.4', False)]
+        
+        summary = subprocess_engine.last_scan_summary
+        assert summary['probes_sent'] == 7
+        assert summary['retried'] == 3
+        assert summary['recovered_on_retry'] == 1
+        assert summary['first_probe_loss'] == 0.5
+    
+    def test_resume_scan(self, subprocess_engine, monkeypatch, tmp_path):
+        """Test an interrupted checkpointed scan resumes where it stopped"""
+        subprocess_engine.checkpoint_directory = str(tmp_path)
+        job = subprocess_engine.create_scan_job('10.0.0.0/29')
+        
+        # Interrupted after the first three addresses
+        job.record('10.0.0.1', Device(ip_address='10.0.0.1', status=DeviceStatus.REACHABLE))
+        job.record('10.0.0.2', None)
+        job.record('10.0.0.3', None)
+        job.close()
+        
+        assert subprocess_engine.find_scan_job('10.0.0.0/29') == job.job_id
+        
+        probed = []
+        monkeypatch.setattr(subprocess_engine, '_ping_host', lambda ip: probed.append(ip) or ip in ('10.0.0.1', '10.0.0.5'))
+        devices = subprocess_engine.resume_scan(job.job_id)
+        
+        assert sorted(d.ip_address for d in devices) == ['10.0.0.1', '10.0.0.5']
+        assert sorted(probed) == ['10.0.0.4', '10.0.0.5', '10.0.0.6']
+        assert subprocess_engine.find_scan_job('10.0.0.0/29') is None
+    
+    def test_checkpoint_opt_in(self, subprocess_engine, tmp_path):
+        """Test sweeps only checkpoint when asked, and clean up when finished"""
+        subprocess_engine.checkpoint_directory = str(tmp_path / 'scans')
+        subprocess_engine.checkpoint_min_addresses = 1
+        
+        subprocess_engine.discover_subnet('10.0.0.0/29')
+        assert not (tmp_path / 'scans').exists()
+        
+        devices = subprocess_engine.discover_subnet('10.0.0.0/29', checkpoint=True)
+        assert sorted(d.ip_address for d in devices) == ['10.0.0.1', '10.0.0.5']
+        assert subprocess_engine.last_job_id is not None
+        assert list((tmp_path / 'scans').iterdir()) == []
+        
+        assert subprocess_engine.prepare_scan_job('2001:db8::/64') is None
@@ -0,0 +1,129 @@
+"""
+Unit tests for fingerprint tables
+"""
+
+import asyncio
+import pytest
+from engines.fingerprints import fingerprint_ssh_banner, vendor_from_object_id
+from engines.ssh_banner import SshBannerGrabber
+
+
+class TestFingerprints:
+    """Test vendor identification tables"""
+    
+    def test_ssh_banners(self):
+        """Test known SSH identification strings"""
+        assert fingerprint_ssh_banner('SSH-2.0-Cisco-1.25') == ('Cisco', 'cisco_ios')
+        assert fingerprint_ssh_banner('SSH-2.0-ROSSSH') == ('MikroTik', 'mikrotik_routeros')
+        assert fingerprint_ssh_banner('SSH-1.99-Comware-7.1.064') == ('HP', 'hp_comware')
+        assert fingerprint_ssh_banner('SSH-2.0-ArubaOS') == ('HP', 'aruba_os')
+        assert fingerprint_ssh_banner('SSH-2.0-OpenSSH_8.9p1') is None
+        assert fingerprint_ssh_banner(None) is None
+    
+    def test_enterprise_oids(self):
+        """Test sysObjectID enterprise mapping"""
+        assert vendor_from_object_id('1.3.6.1.4.1.2636.1.1.1.2.25') == 'Juniper'
+        assert vendor_from_object_id('1.3.6.1.4.1.99999.1') is None
+        assert vendor_from_object_id('1.3.6.1.2.1.1') is None
+    
+    def test_vendor_names_consistent(self):
+        """Test every table names an Aruba device the same way"""
+        from engines.fingerprints import vendor_from_description
+        from engines.oui_lookup import organization_vendor
+        
+        assert vendor_from_object_id('1.3.6.1.4.1.14823.1.1.32') == 'HP'
+        assert vendor_from_description('ArubaOS (MODEL: Aruba7010), Version 8.6.0.4') == 'HP'
+        assert organization_vendor('Aruba, a Hewlett Packard Enterprise Company') == 'HP'
+        assert fingerprint_ssh_banner('SSH-2.0-ArubaOS')[0] == 'HP'
+    
+    def test_grab_banner(self):
+        """Test reading a banner from a local server"""
+        async def run():
+            async def handle(reader, writer):
+                writer.write(b'Welcome\r\nSSH-2.0-Cisco-1.25\r\n')
+                await writer.drain()
+                writer.close()
+            
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                async with SshBannerGrabber() as grabber:
+                    return await grabber.grab('127.0.0.1', port, timeout=2.0)
+        
+        assert asyncio.run(run()) == 'SSH-2.0-Cisco-1.25'
+    
+    def test_read_host_key(self):
+        """Test the host key is read by key exchange without logging in"""
+        import socket
+        import threading
+        import paramiko
+        from engines.ssh_banner import host_key_fingerprint
+        
+        server_key = paramiko.RSAKey.generate(1024)
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        port = listener.getsockname()[1]
+        
+        def serve():
+            client, _ = listener.accept()
+            transport = paramiko.Transport(client)
+            transport.add_server_key(server_key)
+            try:
+                transport.start_server(server=paramiko.ServerInterface())
+                transport.accept(2)
+            except (paramiko.SSHException, EOFError):
+                pass
+            finally:
+                transport.close()
+        
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        
+        async def run():
+            async with SshBannerGrabber() as grabber:
+                return await grabber.host_key('127.0.0.1', port, timeout=5.0)
+        
+        try:
+            assert asyncio.run(run()) == host_key_fingerprint(server_key)
+        finally:
+            thread.join(timeout=5)
+            listener.close()
+    
+    def test_parse_show_version_cisco(self):
+        """Test Cisco 'show version' parsing and memoization"""
+        from engines.fingerprints import parse_show_version
+        output = (
+            "Cisco IOS Software, C2960 Software (C2960-LANBASEK9-M), Version 15.0(2)SE11\n"
+            "SW1 uptime is 2 weeks, 3 days, 4 hours, 5 minutes\n"
+            "cisco WS-C2960-24TT-L (PowerPC405) processor (revision B0) with 65536K bytes of memory.\n"
+        )
+        
+        info = parse_show_version(output)
+        
+        assert info['vendor'] == 'Cisco'
+        assert info['model'] == 'WS-C2960-24TT-L'
+        assert info['hostname'] == 'SW1'
+        assert info['uptime'].startswith('SW1 uptime is')
+        assert parse_show_version(output) is info
+    
+    def test_identify_device_single_show_version(self, sample_config):
+        """Test identification issues 'show version' once"""
+        from engines.discovery_engine import DiscoveryEngine
+        from models.device import Device
+        
+        class FakeConnectionManager:
+            def __init__(self):
+                self.commands = []
+            
+            def execute_command(self, device, command, timeout=None, use_cache=True):
+                self.commands.append(command)
+                if command == 'show version':
+                    return True, "Hostname: mx1\nModel: mx480\nJunos: 15.1R7.9\nJUNOS Software Release"
+                return True, ""
+        
+        manager = FakeConnectionManager()
+        device = DiscoveryEngine(sample_config).identify_device(Device(ip_address='10.0.0.1'), manager)
+        
+        assert manager.commands == ['show version']
+        assert (device.vendor, device.model, device.os_version, device.hostname) == ('Juniper', 'mx480', '15.1R7.9', 'mx1')
@@ -0,0 +1,46 @@
+"""
+Unit tests for ICMP prober
+"""
+
+import asyncio
+import struct
+import pytest
+from engines.icmp_prober import IcmpProber, icmp_checksum, build_echo_request, ICMP_ECHO_REQUEST
+
+
+def _ping(ip, timeout=1.0):
+    async def run():
+        async with IcmpProber() as prober:
+            return await prober.ping(ip, timeout)
+    return asyncio.run(run())
+
+
+class TestIcmpProber:
+    """Test ICMP packet handling and probing"""
+    
+    def test_checksum_verifies(self):
+        """Test that a packet with its checksum sums to zero"""
+        packet = build_echo_request(0x1234, 7)
+        
+        assert icmp_checksum(packet) == 0
+    
+    def test_echo_request_fields(self):
+        """Test echo request header layout"""
+        packet = build_echo_request(0xBEEF, 42, payload=b'abc')
+        icmp_type, code, _, ident, sequence = struct.unpack_from('!BBHHH', packet)
+        
+        assert icmp_type == ICMP_ECHO_REQUEST
+        assert code == 0
+        assert ident == 0xBEEF
+        assert sequence == 42
+        assert packet.endswith(b'abc')
+    
+    def test_ping_loopback(self):
+        """Test probing the loopback address"""
+        try:
+            rtt = _ping('127.0.0.1')
+        except PermissionError:
+            pytest.skip("ICMP sockets not permitted")
+        
+        assert rtt is not None
+        assert rtt >= 0
@@ -0,0 +1,96 @@
+"""
+Unit tests for multi-homed device merging
+"""
+
+from engines.fingerprints import fingerprint_snmp
+from engines.identity import identity_keys, merge_devices
+from engines.snmp_prober import ENT_PHYSICAL_SERIAL, SNMP_ENGINE_ID, SYS_NAME
+from models.device import Device, DeviceStatus
+
+
+class TestMergeDevices:
+    """Test clustering by strong identifiers"""
+
+    def test_merge_by_engine_id(self):
+        """Test addresses of one SNMP agent become one device with aliases"""
+        devices = [
+            Device(ip_address='10.0.0.1', snmp_engine_id='800000090300aabbcc', open_ports=[22]),
+            Device(ip_address='10.0.1.1', snmp_engine_id='800000090300aabbcc', hostname='core1', open_ports=[161]),
+            Device(ip_address='10.0.2.1'),
+            Device(ip_address='192.168.0.1', snmp_engine_id='800000090300aabbcc'),
+        ]
+
+        merged = merge_devices(devices)
+
+        assert [d.ip_address for d in merged] == ['10.0.0.1', '10.0.2.1']
+        core = merged[0]
+        assert core.alias_ips == ['10.0.1.1', '192.168.0.1']
+        assert core.hostname == 'core1'
+        assert core.open_ports == [22, 161]
+
+    def test_transitive_identifiers(self):
+        """Test devices linked through different identifiers form one cluster"""
+        devices = [
+            Device(ip_address='10.0.0.1', serial_number='FTX1234', sys_name='edge1'),
+            Device(ip_address='10.0.0.2', serial_number='ftx1234', ssh_host_key='SHA256:abc'),
+            Device(ip_address='10.0.0.3', ssh_host_key='SHA256:abc'),
+        ]
+
+        merged = merge_devices(devices)
+
+        assert len(merged) == 1
+        assert merged[0].alias_ips == ['10.0.0.2', '10.0.0.3']
+        assert merged[0].ssh_host_key == 'SHA256:abc'
+
+    def test_conflicting_serials_not_merged(self):
+        """Test a shared host key does not merge devices with different serials"""
+        devices = [
+            Device(ip_address='10.0.0.1', serial_number='FTX1', ssh_host_key='SHA256:cloned'),
+            Device(ip_address='10.0.0.2', serial_number='FTX2', ssh_host_key='SHA256:cloned'),
+        ]
+
+        assert len(merge_devices(devices)) == 2
+
+    def test_sys_name_alone_not_merged(self):
+        """Test devices sharing only a sysName stay apart"""
+        devices = [
+            Device(ip_address='10.0.0.1', sys_name='branch-rtr'),
+            Device(ip_address='10.0.0.2', sys_name='branch-rtr', snmp_engine_id='8000000903001111'),
+        ]
+
+        assert identity_keys(devices[0]) == {}
+        assert len(merge_devices(devices)) == 2
+
+    def test_generic_names_ignored(self):
+        """Test factory-default names and placeholder serials do not merge devices"""
+        devices = [
+            Device(ip_address='10.0.0.1', sys_name='Router', serial_number='N/A'),
+            Device(ip_address='10.0.0.2', sys_name='router', serial_number='n/a'),
+        ]
+
+        assert identity_keys(devices[0]) == {}
+        assert len(merge_devices(devices)) == 2
+
+    def test_canonical_prefers_connected(self):
+        """Test the connected address becomes the canonical device"""
+        devices = [
+            Device(ip_address='10.0.0.1', serial_number='FTX1'),
+            Device(ip_address='10.0.0.9', serial_number='FTX1', status=DeviceStatus.CONNECTED),
+        ]
+
+        merged = merge_devices(devices)
+
+        assert merged[0].ip_address == '10.0.0.9'
+        assert merged[0].alias_ips == ['10.0.0.1']
+
+    def test_snmp_engine_id_fingerprint(self):
+        """Test a binary snmpEngineID is reported as hex alongside sysName and the serial"""
+        attributes = fingerprint_snmp({
+            SYS_NAME: 'core1',
+            SNMP_ENGINE_ID: b'\x80\x00\x00\x09\x03\x00\xaa',
+            ENT_PHYSICAL_SERIAL: ' FOC1234X0AB ',
+        })
+
+        assert attributes['snmp_engine_id'] == '800000090300aa'
+        assert attributes['sys_name'] == 'core1'
+        assert attributes['serial_number'] == 'FOC1234X0AB'
@@ -0,0 +1,82 @@
+"""
+Unit tests for IP range parsing and interval sets
+"""
+
+import ipaddress
+import pytest
+from utils.ip_ranges import IPRangeSet, parse_target, read_target_file
+
+
+class TestIPRanges:
+    """Test target parsing and IPRangeSet"""
+    
+    def test_cidr_matches_hosts(self):
+        """Test CIDR targets enumerate exactly network.hosts()"""
+        for cidr in ['10.0.0.0/24', '10.0.0.0/31', '10.0.0.1/32', 'fd00::/120']:
+            expected = [str(ip) for ip in ipaddress.ip_network(cidr).hosts()]
+            assert list(IPRangeSet.from_targets(cidr)) == expected
+    
+    def test_parse_invalid(self):
+        """Test malformed and reversed targets are rejected"""
+        with pytest.raises(ValueError):
+            parse_target('10.0.0.9-10.0.0.1')
+        with pytest.raises(ValueError):
+            parse_target('not-an-ip')
+        with pytest.raises(ValueError):
+            parse_target('10.0.0.1-fd00::1')
+    
+    def test_merge_overlapping_and_adjacent(self):
+        """Test overlapping and adjacent ranges collapse"""
+        range_set = IPRangeSet.from_targets([
+            '10.0.0.1-10.0.0.10',
+            '10.0.0.5-10.0.0.20',
+            '10.0.0.21',
+            '10.0.1.0/24'
+        ])
+        
+        assert len(range_set.ranges()) == 2
+        assert range_set.num_addresses == 21 + 254
+    
+    def test_contains(self):
+        """Test membership checks"""
+        range_set = IPRangeSet.from_targets(['10.0.0.0/24', '192.168.1.10-192.168.1.20'])
+        
+        assert '10.0.0.77' in range_set
+        assert '192.168.1.15' in range_set
+        assert '192.168.1.21' not in range_set
+        assert '10.0.0.0' not in range_set
+        assert 'fd00::1' not in range_set
+    
+    def test_exclusions(self):
+        """Test '!' targets carve whole blocks out, in any order"""
+        range_set = IPRangeSet.from_targets([
+            '!10.1.0.0/16',
+            '10.0.0.0/8',
+            '!10.2.0.1-10.2.0.9',
+            '!10.255.255.254'
+        ])
+        
+        assert range_set.ranges() == [
+            (4, int(ipaddress.ip_address('10.0.0.1')), int(ipaddress.ip_address('10.0.255.255'))),
+            (4, int(ipaddress.ip_address('10.2.0.0')), int(ipaddress.ip_address('10.2.0.0'))),
+            (4, int(ipaddress.ip_address('10.2.0.10')), int(ipaddress.ip_address('10.255.255.253'))),
+        ]
+        assert '10.1.0.0' not in range_set
+        assert range_set.num_addresses == 2 ** 24 - 2 - 2 ** 16 - 9 - 1
+    
+    def test_difference_matches_set_difference(self):
+        """Test interval subtraction agrees with per-address set difference"""
+        include = IPRangeSet.from_targets(['10.0.0.0/26', '10.0.0.100-10.0.0.140', 'fd00::/122'])
+        exclude = IPRangeSet.from_targets(['10.0.0.8/30', '10.0.0.60-10.0.0.110', '10.0.0.140', 'fd00::10-fd00::20'])
+        
+        assert list(include - exclude) == sorted(
+            set(include) - set(exclude),
+            key=lambda ip: (ipaddress.ip_address(ip).version, ipaddress.ip_address(ip))
+        )
+    
+    def test_read_target_file(self, tmp_path):
+        """Test target files allow comments, commas and blank lines"""
+        path = tmp_path / 'exclude.txt'
+        path.write_text("# lab\n10.1.0.0/16  # whole lab\n\n10.2.0.1, 10.2.0.2\n")
+        
+        assert read_target_file(path) == ['10.1.0.0/16', '10.2.0.1', '10.2.0.2']
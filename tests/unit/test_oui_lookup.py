@@ -0,0 +1,116 @@
+"""
+Unit tests for MAC OUI vendor lookup
+"""
+
+import pytest
+from engines.discovery_engine import DiscoveryEngine
+from engines.oui_lookup import OuiDatabase, build_oui_trie, normalize_mac, parse_neighbor_table
+from models.device import Device
+
+
+REGISTRY_CSV = """Registry,Assignment,Organization Name,Organization Address
+MA-L,00000C,"Cisco Systems, Inc",170 West Tasman Drive San Jose CA US 95134
+MA-L,2CC260,Juniper Networks,1133 Innovation Way Sunnyvale CA US 94089
+MA-L,70B3D5,IEEE Registration Authority,445 Hoes Lane Piscataway NJ US 08554
+MA-L,4C5E0C,Routerboard.com,Mikrotikls SIA Riga LV
+"""
+
+REGISTRY_MAS = """Registry,Assignment,Organization Name,Organization Address
+MA-S,70B3D5123,Example Sensors Ltd,1 Example Road
+"""
+
+
+@pytest.fixture
+def oui(tmp_path):
+    """Trie compiled from a small sample registry"""
+    (tmp_path / 'oui.csv').write_text(REGISTRY_CSV)
+    (tmp_path / 'oui36.csv').write_text(REGISTRY_MAS)
+    build_oui_trie([tmp_path / 'oui.csv', tmp_path / 'oui36.csv'], tmp_path / 'oui.trie')
+    database = OuiDatabase(tmp_path / 'oui.trie')
+    yield database
+    database.close()
+
+
+class TestOuiLookup:
+    """Test MAC parsing and vendor lookup"""
+
+    def test_normalize_mac(self):
+        """Test colon, dash and Cisco dotted notations normalize alike"""
+        assert normalize_mac('00:00:0C:07:AC:01') == '00:00:0c:07:ac:01'
+        assert normalize_mac('00-00-0c-07-ac-01') == '00:00:0c:07:ac:01'
+        assert normalize_mac('0000.0c07.ac01') == '00:00:0c:07:ac:01'
+        assert normalize_mac('not a mac') is None
+
+    def test_parse_neighbor_tables(self):
+        """Test Linux, Windows and Cisco table formats, skipping incomplete entries"""
+        proc_arp = (
+            "IP address       HW type     Flags       HW address            Mask     Device\n"
+            "10.0.0.1         0x1         0x2         00:00:0c:07:ac:01     *        eth0\n"
+            "10.0.0.9         0x1         0x0         00:00:00:00:00:00     *        eth0\n"
+        )
+        ip_neigh = (
+            "10.0.0.2 dev eth0 lladdr 2c:c2:60:11:22:33 REACHABLE\n"
+            "10.0.0.3 dev eth0  FAILED\n"
+            "fe80::1 dev eth0 lladdr 4c:5e:0c:aa:bb:cc router STALE\n"
+        )
+        arp_a = "  10.0.0.4           70-b3-d5-12-34-56     dynamic\n  10.0.0.255  ff-ff-ff-ff-ff-ff  static\n"
+        show_arp = (
+            "Protocol  Address          Age (min)  Hardware Addr   Type   Interface\n"
+            "Internet  10.0.0.5                 4   0000.0c07.ac05  ARPA   GigabitEthernet0/0\n"
+        )
+
+        entries = parse_neighbor_table(proc_arp + ip_neigh + arp_a + show_arp)
+
+        assert entries == {
+            '10.0.0.1': '00:00:0c:07:ac:01',
+            '10.0.0.2': '2c:c2:60:11:22:33',
+            'fe80::1': '4c:5e:0c:aa:bb:cc',
+            '10.0.0.4': '70:b3:d5:12:34:56',
+            '10.0.0.5': '00:00:0c:07:ac:05',
+        }
+
+    def test_lookup(self, oui):
+        """Test vendors are normalized and unknown OUIs return None"""
+        assert oui.lookup('00:00:0c:07:ac:01') == 'Cisco'
+        assert oui.lookup('2cc2.6011.2233') == 'Juniper'
+        assert oui.lookup('4c-5e-0c-aa-bb-cc') == 'MikroTik'
+        assert oui.lookup('00:11:22:33:44:55') is None
+
+    def test_longest_prefix_wins(self, oui):
+        """Test an MA-S block overrides the MA-L block it belongs to"""
+        assert oui.lookup('70:b3:d5:12:34:56') == 'Example Sensors Ltd'
+        assert oui.lookup('70:b3:d5:99:34:56') == 'IEEE Registration Authority'
+
+    def test_locally_administered_not_looked_up(self, oui):
+        """Test randomized (locally administered) MACs get no vendor"""
+        assert oui.lookup('02:00:0c:07:ac:01') is None
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test a file that is not a trie is refused"""
+        path = tmp_path / 'bogus.trie'
+        path.write_bytes(b'\x00' * 64)
+
+        with pytest.raises(ValueError):
+            OuiDatabase(path)
+
+    def test_engine_identify_by_mac(self, tmp_path, monkeypatch):
+        """Test the engine compiles the registry and fills only unknown vendors"""
+        (tmp_path / 'oui.csv').write_text(REGISTRY_CSV)
+        engine = DiscoveryEngine({'discovery': {
+            'oui_registry': str(tmp_path / 'oui.csv'),
+            'oui_database': str(tmp_path / 'oui.trie'),
+        }})
+        monkeypatch.setattr('engines.discovery_engine.read_local_neighbors', lambda: {'10.0.0.1': '00:00:0c:07:ac:01'})
+        engine.neighbor_table['10.0.0.2'] = '2c:c2:60:11:22:33'
+        devices = [
+            Device(ip_address='10.0.0.1'),
+            Device(ip_address='10.0.0.2', vendor='HP'),
+            Device(ip_address='10.0.0.3'),
+        ]
+
+        engine.identify_by_mac(devices)
+
+        assert (tmp_path / 'oui.trie').exists()
+        assert [d.vendor for d in devices] == ['Cisco', 'HP', None]
+        assert devices[1].mac_address == '2c:c2:60:11:22:33'
+        assert devices[2].mac_address is None
@@ -0,0 +1,86 @@
+"""
+Unit tests for the progress channel
+"""
+
+import threading
+import time
+
+from utils.progress import ProgressChannel, ProgressSnapshot
+
+
+class TestProgressChannel:
+    """Test coalesced progress publishing"""
+    
+    def test_coalesces_updates(self):
+        """Test thousands of updates produce only a few snapshots"""
+        received = []
+        
+        with ProgressChannel(total=100000, rate_hz=20) as progress:
+            progress.subscribe(received.append)
+            for completed in range(1, 100001):
+                progress.update(completed)
+        
+        assert len(received) < 10
+        assert received[-1] == ProgressSnapshot(100000, 100000, '', True)
+    
+    def test_rate_bounded(self):
+        """Test snapshots are published at most rate_hz times per second"""
+        received = []
+        
+        with ProgressChannel(total=1000, rate_hz=10) as progress:
+            progress.subscribe(received.append)
+            deadline = time.monotonic() + 0.55
+            while time.monotonic() < deadline:
+                progress.advance()
+                time.sleep(0.001)
+        
+        assert 3 <= len(received) <= 7
+    
+    def test_concurrent_advance(self):
+        """Test advance() from many threads loses no counts"""
+        progress = ProgressChannel(total=80000)
+        
+        def work():
+            for _ in range(10000):
+                progress.advance()
+        
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert progress.snapshot().completed == 80000
+    
+    def test_unchanged_not_republished(self):
+        """Test an idle channel publishes nothing until closed"""
+        received = []
+        progress = ProgressChannel(total=5, rate_hz=50)
+        progress.subscribe(received.append)
+        progress.start()
+        time.sleep(0.1)
+        
+        assert len(received) == 1
+        progress.close()
+        assert received[-1].finished
+    
+    def test_unsubscribe_and_message(self):
+        """Test unsubscribed callbacks stop receiving and messages are carried"""
+        kept, dropped = [], []
+        progress = ProgressChannel(total=2)
+        progress.subscribe(kept.append)
+        unsubscribe = progress.subscribe(dropped.append)
+        unsubscribe()
+        
+        progress.set_message('Backing up 10.0.0.1...')
+        progress.advance(2)
+        progress.close()
+        
+        assert dropped == []
+        assert kept[-1].message == 'Backing up 10.0.0.1...'
+        assert kept[-1].fraction == 1.0
+    
+    def test_fraction_without_total(self):
+        """Test fraction handles an unknown total"""
+        assert ProgressSnapshot(5, 0).fraction == 0.0
+        assert ProgressSnapshot(5, 0, finished=True).fraction == 1.0
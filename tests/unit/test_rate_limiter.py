@@ -0,0 +1,115 @@
+"""
+Unit tests for the probe rate limiter
+"""
+
+import asyncio
+
+from engines.rate_limiter import ProbeRateLimiter, TokenBucket
+
+
+class FakeClock:
+    """Manual clock; sleep records the delay and optionally advances time"""
+    
+    def __init__(self, now: float = 0.0, advance: bool = False):
+        self.now = now
+        self.advance = advance
+        self.sleeps = []
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        if self.advance:
+            self.now += delay
+
+
+class TestTokenBucket:
+    """Test token bucket scheduling"""
+    
+    def test_burst_then_rate(self):
+        """Test a full bucket allows a burst, then one token per interval"""
+        bucket = TokenBucket(rate=10, burst=3)
+        
+        delays = [bucket.reserve(now=100.0) for _ in range(6)]
+        
+        assert delays[:3] == [0.0, 0.0, 0.0]
+        assert [round(d, 6) for d in delays[3:]] == [0.1, 0.2, 0.3]
+    
+    def test_refills_when_idle(self):
+        """Test an idle bucket refills up to the burst size"""
+        bucket = TokenBucket(rate=10, burst=2)
+        for _ in range(4):
+            bucket.reserve(now=0.0)
+        
+        assert not bucket.idle(0.2)
+        assert bucket.idle(0.5)
+        assert bucket.reserve(now=10.0) == 0.0
+        assert bucket.reserve(now=10.0) == 0.0
+        assert bucket.reserve(now=10.0) > 0
+
+
+class TestProbeRateLimiter:
+    """Test per-subnet and global pacing"""
+    
+    def test_disabled(self):
+        """Test the limiter is a no-op without configured rates"""
+        assert not ProbeRateLimiter().enabled
+        assert ProbeRateLimiter(subnet_rate=5).enabled
+    
+    def test_global_rate(self):
+        """Test throughput across subnets stays at the global rate"""
+        clock = FakeClock()
+        limiter = ProbeRateLimiter(global_rate=200, burst=1, clock=clock, sleep=clock.sleep)
+        
+        async def run():
+            for i in range(41):
+                await limiter.acquire(f"10.{i}.0.1")
+        
+        asyncio.run(run())
+        assert [round(d, 6) for d in clock.sleeps] == [round(0.005 * n, 6) for n in range(1, 41)]
+    
+    def test_subnet_rate(self):
+        """Test a busy subnet is throttled without slowing other subnets"""
+        clock = FakeClock()
+        limiter = ProbeRateLimiter(subnet_rate=50, burst=1, clock=clock, sleep=clock.sleep)
+        
+        async def delay(ip):
+            clock.sleeps.clear()
+            await limiter.acquire(ip)
+            return sum(clock.sleeps)
+        
+        async def run():
+            busy = [await delay(f"10.0.0.{i}") for i in range(1, 11)]
+            return busy, await delay("10.0.1.1")
+        
+        busy, other = asyncio.run(run())
+        assert [round(d, 6) for d in busy] == [round(0.02 * n, 6) for n in range(10)]
+        assert other == 0
+    
+    def test_subnet_before_global(self):
+        """Test the global slot is reserved only after the subnet wait"""
+        clock = FakeClock(advance=True)
+        limiter = ProbeRateLimiter(global_rate=100, subnet_rate=10, burst=1, clock=clock, sleep=clock.sleep)
+        
+        async def run():
+            await limiter.acquire("10.0.0.1")
+            await limiter.acquire("10.0.0.2")
+            await limiter.acquire("10.0.1.1")
+        
+        asyncio.run(run())
+        # The second probe waits 0.1s for its subnet, then takes the global
+        # slot at 0.1; the third probe's subnet is free, so it waits only
+        # one global interval behind the second
+        assert [round(d, 6) for d in clock.sleeps] == [0.1, 0.01]
+        assert round(clock.now, 6) == 0.11
+    
+    def test_reserve_subnet(self):
+        """Test subnet slots can be reserved without waiting"""
+        limiter = ProbeRateLimiter(subnet_rate=10, burst=1)
+        
+        delays = [limiter.reserve_subnet('10.0.0.1', now=5.0) for _ in range(3)]
+        
+        assert [round(d, 6) for d in delays] == [0.0, 0.1, 0.2]
+        assert limiter.reserve_subnet('10.0.1.1', now=5.0) == 0
+        assert ProbeRateLimiter(global_rate=10).reserve_subnet('10.0.0.1') == 0
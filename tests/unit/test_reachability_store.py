@@ -0,0 +1,73 @@
+"""
+Unit tests for the reachability store
+"""
+
+import pytest
+from engines.reachability_store import ReachabilityStore
+from utils.ip_ranges import IPRangeSet
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Store backed by a temporary database"""
+    store = ReachabilityStore(str(tmp_path / 'snatt.db'), base_backoff=100, max_backoff=1000)
+    yield store
+    store.close()
+
+
+class TestReachabilityStore:
+    """Test reachability history and backoff"""
+    
+    def test_only_seen_addresses_stored(self, store):
+        """Test misses of never-seen addresses are not stored"""
+        store.record('10.0.0.1', True, now=10)
+        store.record('10.0.0.2', False, now=10)
+        
+        records = store.lookup(IPRangeSet.from_targets('10.0.0.0/24'))
+        
+        assert list(records) == ['10.0.0.1']
+        assert records['10.0.0.1'].last_seen == 10
+        assert records['10.0.0.1'].misses == 0
+    
+    def test_lookup_limited_to_range(self, store):
+        """Test lookup returns only addresses inside the range set"""
+        for ip in ('10.0.0.1', '10.0.0.200', '10.0.1.1', '2001:db8::1'):
+            store.record(ip, True, now=1)
+        
+        records = store.lookup(IPRangeSet.from_targets(['10.0.0.0/25', '2001:db8::/64']))
+        
+        assert sorted(records) == ['10.0.0.1', '2001:db8::1']
+    
+    def test_exponential_backoff(self, store):
+        """Test consecutive misses double the re-probe delay up to the cap"""
+        store.record('10.0.0.1', True, now=0)
+        range_set = IPRangeSet.from_targets('10.0.0.1')
+        
+        delays = []
+        for probe_time in (0, 1, 2, 3, 4, 5):
+            store.record('10.0.0.1', False, now=probe_time)
+            record = store.lookup(range_set)['10.0.0.1']
+            delays.append(store.next_probe_due(record) - probe_time)
+        
+        assert delays == [100, 200, 400, 800, 1000, 1000]
+        
+        store.record('10.0.0.1', True, now=50)
+        record = store.lookup(range_set)['10.0.0.1']
+        assert record.misses == 0
+        assert record.last_seen == 50
+    
+    def test_full_sweep_persisted(self, tmp_path):
+        """Test full sweep times survive reopening the database"""
+        path = str(tmp_path / 'snatt.db')
+        scope = ReachabilityStore.scope_of(IPRangeSet.from_targets('10.0.0.0/24'))
+        
+        store = ReachabilityStore(path)
+        assert store.last_full_sweep(scope) == 0
+        store.mark_full_sweep(scope, now=1234)
+        store.record('10.0.0.9', True, now=1234)
+        store.close()
+        
+        store = ReachabilityStore(path)
+        assert store.last_full_sweep(scope) == 1234
+        assert '10.0.0.9' in store.lookup(IPRangeSet.from_targets('10.0.0.0/24'))
+        store.close()
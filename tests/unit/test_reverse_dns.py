@@ -0,0 +1,178 @@
+"""
+Unit tests for asynchronous reverse DNS
+"""
+
+import asyncio
+import functools
+import struct
+import threading
+
+import pytest
+from engines.discovery_engine import DiscoveryEngine
+from engines.reverse_dns import MISSING, DnsCache, ReverseResolver, decode_ptr_response, encode_ptr_query
+from models.device import Device
+
+
+PTR_RECORDS = {
+    '1.0.0.10.in-addr.arpa': 'core-rtr-01.example.net',
+    '2.0.0.10.in-addr.arpa': 'dist-sw-01.example.net',
+}
+
+
+def encode_name(name):
+    """Uncompressed DNS name"""
+    return b''.join(bytes([len(label)]) + label.encode() for label in name.split('.')) + b'\x00'
+
+
+class _StubNameserver(asyncio.DatagramProtocol):
+    """Answers PTR queries from a fixed table, NXDOMAIN with an SOA otherwise"""
+
+    def __init__(self):
+        self.queries = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.queries += 1
+        query_id = struct.unpack_from('>H', data)[0]
+        question = data[12:]
+        labels, offset = [], 0
+        while question[offset]:
+            labels.append(question[offset + 1:offset + 1 + question[offset]].decode())
+            offset += question[offset] + 1
+        question = question[:offset + 5]
+        name = PTR_RECORDS.get('.'.join(labels))
+
+        if name:
+            rdata = encode_name(name)
+            answer = b'\xc0\x0c' + struct.pack('>HHIH', 12, 1, 3600, len(rdata)) + rdata
+            header = struct.pack('>HHHHHH', query_id, 0x8180, 1, 1, 0, 0)
+            self.transport.sendto(header + question + answer, addr)
+        else:
+            rdata = encode_name('ns.example.net') + encode_name('hostmaster.example.net') + \
+                struct.pack('>IIIII', 1, 3600, 600, 86400, 120)
+            authority = encode_name('10.in-addr.arpa') + struct.pack('>HHIH', 6, 1, 900, len(rdata)) + rdata
+            header = struct.pack('>HHHHHH', query_id, 0x8183, 1, 0, 1, 0)
+            self.transport.sendto(header + question + authority, addr)
+
+
+@pytest.fixture(params=['127.0.0.1'])
+def nameserver(request):
+    """Local stub nameserver running on its own loop"""
+    loop = asyncio.new_event_loop()
+    transport, protocol = loop.run_until_complete(loop.create_datagram_endpoint(
+        _StubNameserver, local_addr=(request.param, 0)
+    ))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    yield transport.get_extra_info('sockname')[1], protocol
+
+    loop.call_soon_threadsafe(transport.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+class TestDnsCodec:
+    """Test DNS message encoding and decoding"""
+
+    def test_query_question(self):
+        """Test a PTR query carries the reverse name"""
+        query = encode_ptr_query(0x1234, '10.0.0.1')
+
+        assert struct.unpack_from('>HHH', query) == (0x1234, 0x0100, 1)
+        assert encode_name('1.0.0.10.in-addr.arpa') in query
+
+    def test_decode_garbage(self):
+        """Test malformed datagrams are rejected"""
+        with pytest.raises(ValueError):
+            decode_ptr_response(b'\x12\x34\x81\x80\x00\x01\x00\x01')
+
+
+class TestDnsCache:
+    """Test TTL caching"""
+
+    def test_expiry_and_negative_entries(self):
+        """Test entries expire after their TTL and negative answers are cached"""
+        cache = DnsCache(min_ttl=10, max_ttl=100)
+        cache.put('10.0.0.1', 'a.example.net', 3600, now=0)
+        cache.put('10.0.0.9', None, 1, now=0)
+
+        assert cache.get('10.0.0.1', now=50) == 'a.example.net'
+        assert cache.get('10.0.0.1', now=101) is MISSING  # Clamped to max_ttl
+        assert cache.get('10.0.0.9', now=5) is None  # Clamped up to min_ttl
+        assert cache.get('10.0.0.9', now=11) is MISSING
+
+    def test_bounded(self):
+        """Test the oldest entries are evicted when the cache is full"""
+        cache = DnsCache(max_entries=2)
+        for index in range(3):
+            cache.put(f'10.0.0.{index}', 'x', 3600, now=0)
+
+        assert len(cache) == 2
+        assert cache.get('10.0.0.0', now=1) is MISSING
+
+
+class TestReverseResolver:
+    """Test PTR lookups against a stub nameserver"""
+
+    def test_resolve_many(self, nameserver):
+        """Test names resolve, missing records give None, and rescans hit the cache"""
+        port, server = nameserver
+        cache = DnsCache()
+
+        async def run():
+            async with ReverseResolver(['127.0.0.1'], port=port, timeout=1, cache=cache) as resolver:
+                first = await resolver.resolve_many(['10.0.0.1', '10.0.0.2', '10.0.0.3'])
+                second = await resolver.resolve_many(['10.0.0.1', '10.0.0.2', '10.0.0.3'])
+                return first, second
+
+        first, second = asyncio.run(run())
+
+        assert first == {
+            '10.0.0.1': 'core-rtr-01.example.net',
+            '10.0.0.2': 'dist-sw-01.example.net',
+            '10.0.0.3': None,
+        }
+        assert second == first
+        assert server.queries == 3
+
+    @pytest.mark.parametrize('nameserver', ['::1'], indirect=True)
+    def test_non_canonical_server(self, nameserver):
+        """Test replies match a nameserver written in a non-canonical form"""
+        port, server = nameserver
+
+        async def run():
+            async with ReverseResolver(['0:0:0:0:0:0:0:0001'], port=port, timeout=1, retries=0) as resolver:
+                return await resolver.resolve('10.0.0.1')
+
+        assert asyncio.run(run()) == 'core-rtr-01.example.net'
+        assert ReverseResolver(['2001:DB8:0::35', '192.0.2.53']).nameservers == ['2001:db8::35', '192.0.2.53']
+
+    def test_concurrency_cap(self, nameserver):
+        """Test many lookups complete under a small outstanding-query cap"""
+        port, server = nameserver
+
+        async def run():
+            async with ReverseResolver(['127.0.0.1'], port=port, timeout=1, max_concurrency=4) as resolver:
+                return await resolver.resolve_many(f'10.0.1.{i}' for i in range(1, 201))
+
+        names = asyncio.run(run())
+
+        assert len(names) == 200
+        assert server.queries == 200
+
+    def test_engine_keeps_better_hostnames(self, nameserver, monkeypatch):
+        """Test only devices without a hostname are named"""
+        port, server = nameserver
+        monkeypatch.setattr('engines.discovery_engine.ReverseResolver', functools.partial(ReverseResolver, port=port))
+        engine = DiscoveryEngine({'discovery': {'dns_servers': ['127.0.0.1'], 'dns_timeout': 1}})
+        devices = [Device(ip_address='10.0.0.1'), Device(ip_address='10.0.0.2', hostname='dist1')]
+
+        engine.resolve_hostnames(devices)
+
+        assert devices[0].hostname == 'core-rtr-01.example.net'
+        assert devices[1].hostname == 'dist1'
+        assert server.queries == 1
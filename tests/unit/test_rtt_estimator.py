@@ -0,0 +1,77 @@
+"""
+Unit tests for the RTT estimator
+"""
+
+import pytest
+from engines.rtt_estimator import RttEstimator
+
+
+class TestRttEstimator:
+    """Test per-subnet round-trip estimation"""
+    
+    def test_initial_timeout(self):
+        """Test subnets without samples use the initial timeout"""
+        estimator = RttEstimator(initial_timeout=1.0, max_timeout=3.0)
+        
+        assert estimator.timeout('10.0.0.1') == 1.0
+        assert estimator.snapshot() == []
+    
+    def test_first_sample(self):
+        """Test the first sample sets SRTT=R and RTTVAR=R/2"""
+        estimator = RttEstimator(min_timeout=0.001, max_timeout=3.0)
+        estimator.observe('10.0.0.1', 0.1)
+        
+        # RTO = R + 4 * R/2
+        assert estimator.timeout('10.0.0.200') == pytest.approx(0.3)
+        assert estimator.snapshot() == [{
+            'subnet': '10.0.0.0/24',
+            'samples': 1,
+            'srtt_ms': 100.0,
+            'rttvar_ms': 50.0,
+            'timeout_ms': 300.0
+        }]
+    
+    def test_smoothing(self):
+        """Test later samples are folded in with alpha=1/8 and beta=1/4"""
+        estimator = RttEstimator(min_timeout=0.001, max_timeout=10.0)
+        estimator.observe('10.0.0.1', 0.1)
+        estimator.observe('10.0.0.2', 0.2)
+        
+        rttvar = 0.75 * 0.05 + 0.25 * 0.1
+        srtt = 0.875 * 0.1 + 0.125 * 0.2
+        assert estimator.timeout('10.0.0.3') == pytest.approx(srtt + 4 * rttvar)
+    
+    def test_subnets_independent(self):
+        """Test a slow subnet does not raise the timeout of a fast one"""
+        estimator = RttEstimator(min_timeout=0.01, max_timeout=5.0)
+        for _ in range(20):
+            estimator.observe('10.0.0.1', 0.001)
+            estimator.observe('10.9.0.1', 0.8)
+        
+        assert estimator.timeout('10.0.0.50') == pytest.approx(0.01)
+        assert estimator.timeout('10.9.0.50') > 0.8
+    
+    def test_unmeasured_subnet_uses_global(self):
+        """Test unmeasured subnets fall back to the sweep-wide estimate"""
+        estimator = RttEstimator(initial_timeout=2.0, min_timeout=0.001, max_timeout=5.0)
+        estimator.observe('10.0.0.1', 0.1)
+        
+        assert estimator.timeout('192.168.5.1') == pytest.approx(0.3)
+    
+    def test_clamped(self):
+        """Test timeouts stay within the configured bounds"""
+        estimator = RttEstimator(min_timeout=0.05, max_timeout=1.0)
+        estimator.observe('10.0.0.1', 0.0001)
+        estimator.observe('10.1.0.1', 2.0)
+        
+        assert estimator.timeout('10.0.0.1') == 0.05
+        assert estimator.timeout('10.1.0.1') == 1.0
+    
+    def test_ipv6_prefix(self):
+        """Test IPv6 samples are grouped by /64"""
+        estimator = RttEstimator()
+        estimator.observe('2001:db8::1', 0.01)
+        estimator.observe('2001:db8::ffff', 0.01)
+        
+        assert [row['subnet'] for row in estimator.snapshot()] == ['2001:db8::/64']
+        assert estimator.snapshot()[0]['samples'] == 2
@@ -0,0 +1,74 @@
+"""
+Unit tests for scan checkpoints
+"""
+
+import pytest
+from engines.scan_checkpoint import ScanCheckpoint
+from models.device import Device, DeviceStatus
+
+
+class TestScanCheckpoint:
+    """Test progress bitmap and device journal"""
+    
+    def test_create_and_list(self, tmp_path):
+        """Test new jobs are listed with their targets"""
+        job = ScanCheckpoint.create(tmp_path, ['10.0.0.0/29', '10.0.1.1'])
+        
+        assert job.total == 7
+        assert job.remaining == 7
+        assert [meta['job_id'] for meta in ScanCheckpoint.list_jobs(tmp_path)] == [job.job_id]
+        assert ScanCheckpoint.list_jobs(tmp_path)[0]['targets'] == ['10.0.0.0/29', '10.0.1.1']
+    
+    def test_resume_skips_done(self, tmp_path):
+        """Test a reloaded job only yields addresses without an outcome"""
+        job = ScanCheckpoint.create(tmp_path, ['10.0.0.0/29', '10.0.1.1'])
+        job.record('10.0.0.2', None)
+        job.record('10.0.1.1', Device(ip_address='10.0.1.1', status=DeviceStatus.REACHABLE))
+        job.close()
+        
+        resumed = ScanCheckpoint.load(tmp_path, job.job_id)
+        
+        assert resumed.remaining == 5
+        assert list(resumed.pending_addresses()) == ['10.0.0.1', '10.0.0.3', '10.0.0.4', '10.0.0.5', '10.0.0.6']
+        assert [d.ip_address for d in resumed.load_devices()] == ['10.0.1.1']
+    
+    def test_skips_finished_bytes(self, tmp_path):
+        """Test whole finished bitmap bytes are skipped correctly"""
+        job = ScanCheckpoint.create(tmp_path, '10.0.0.0/24')
+        for last_octet in range(1, 250):
+            job.record(f'10.0.0.{last_octet}', None)
+        
+        assert list(job.pending_addresses()) == [f'10.0.0.{n}' for n in range(250, 255)]
+    
+    def test_journal_survives_without_save(self, tmp_path):
+        """Test found devices are journaled even if the bitmap was not saved"""
+        job = ScanCheckpoint.create(tmp_path, '10.0.0.0/30', interval=3600)
+        job.record('10.0.0.1', Device(ip_address='10.0.0.1', hostname='r1'))
+        
+        # Simulate a crash: no close(), bitmap still from creation
+        resumed = ScanCheckpoint.load(tmp_path, job.job_id)
+        
+        assert resumed.remaining == 2
+        assert resumed.load_devices()[0].hostname == 'r1'
+    
+    def test_foreign_address_rejected(self, tmp_path):
+        """Test outcomes for addresses outside the job are rejected"""
+        job = ScanCheckpoint.create(tmp_path, '10.0.0.0/30')
+        
+        with pytest.raises(ValueError):
+            job.record('10.0.0.9', None)
+    
+    def test_oversized_target_refused(self, tmp_path):
+        """Test target sets too large for a bitmap are refused before allocating it"""
+        with pytest.raises(ValueError):
+            ScanCheckpoint.create(tmp_path, ['2001:db8::/64'])
+        
+        assert ScanCheckpoint.list_jobs(tmp_path) == []
+    
+    def test_delete(self, tmp_path):
+        """Test a deleted job leaves no files behind"""
+        job = ScanCheckpoint.create(tmp_path, ['10.0.0.0/30'])
+        job.record('10.0.0.1', Device(ip_address='10.0.0.1', status=DeviceStatus.REACHABLE))
+        job.delete()
+        
+        assert list(tmp_path.iterdir()) == []
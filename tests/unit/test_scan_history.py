@@ -0,0 +1,82 @@
+"""
+Unit tests for scan history and diffs
+"""
+
+import pytest
+from engines.scan_history import ScanHistory, diff_records, device_attributes
+from models.device import Device, DeviceType
+
+
+@pytest.fixture
+def history(tmp_path):
+    """History backed by a temporary database"""
+    history = ScanHistory(str(tmp_path / 'snatt.db'))
+    yield history
+    history.close()
+
+
+class TestScanHistory:
+    """Test scan storage and diffing"""
+    
+    def test_round_trip_sorted(self, history):
+        """Test stored scans load back sorted by address, IPv4 first"""
+        scan_id = history.save_scan([
+            Device(ip_address='10.0.0.20', hostname='b'),
+            Device(ip_address='2001:db8::1'),
+            Device(ip_address='10.0.0.3', hostname='a', open_ports=[443, 22]),
+        ], ['10.0.0.0/24'])
+        
+        records = history.load_records(scan_id)
+        
+        assert [key for key, _ in records] == [(4, 0x0A000003), (4, 0x0A000014), (6, 0x20010DB8 << 96 | 1)]
+        assert records[0][1] == device_attributes(Device(ip_address='10.0.0.3', hostname='a', open_ports=[22, 443]))
+    
+    def test_diff(self, history):
+        """Test added, removed and changed hosts are reported"""
+        old = history.save_scan([
+            Device(ip_address='10.0.0.1', hostname='r1', vendor='Cisco'),
+            Device(ip_address='10.0.0.2', hostname='r2'),
+            Device(ip_address='10.0.0.3', hostname='r3'),
+        ], '10.0.0.0/24')
+        new = history.save_scan([
+            Device(ip_address='10.0.0.1', hostname='r1', vendor='Cisco', os_version='17.3'),
+            Device(ip_address='10.0.0.3', hostname='r3'),
+            Device(ip_address='10.0.0.4', hostname='sw1', device_type=DeviceType.SWITCH),
+        ], '10.0.0.0/24')
+        
+        diff = history.diff(old, new)
+        
+        assert [h['ip_address'] for h in diff.added] == ['10.0.0.4']
+        assert diff.added[0]['device_type'] == DeviceType.SWITCH.value
+        assert [h['ip_address'] for h in diff.removed] == ['10.0.0.2']
+        assert diff.changed == [{'ip_address': '10.0.0.1', 'changes': {'os_version': (None, '17.3')}}]
+        assert diff.has_changes()
+    
+    def test_identical_scans(self, history):
+        """Test identical scans have no changes"""
+        devices = [Device(ip_address='10.0.0.1', open_ports=[22])]
+        
+        assert not history.diff(history.save_scan(devices), history.save_scan(devices)).has_changes()
+    
+    def test_list_and_retention(self, tmp_path):
+        """Test scans are listed newest first and old ones are pruned"""
+        history = ScanHistory(str(tmp_path / 'snatt.db'), keep=2)
+        ids = [history.save_scan([], ['10.0.0.0/24'], now=n) for n in range(3)]
+        
+        scans = history.list_scans()
+        
+        assert [scan['id'] for scan in scans] == [ids[2], ids[1]]
+        assert scans[0]['targets'] == ['10.0.0.0/24']
+        with pytest.raises(KeyError):
+            history.load_records(ids[0])
+        history.close()
+    
+    def test_diff_records_tails(self):
+        """Test hosts beyond the end of the other scan are classified"""
+        old = [((4, 1), ('a',)), ((4, 2), ('b',))]
+        new = [((4, 3), ('c',)), ((4, 4), ('d',))]
+        
+        diff = diff_records(old, new)
+        
+        assert [h['ip_address'] for h in diff.removed] == ['0.0.0.1', '0.0.0.2']
+        assert [h['ip_address'] for h in diff.added] == ['0.0.0.3', '0.0.0.4']
@@ -0,0 +1,109 @@
+"""
+Unit tests for sharded discovery
+"""
+
+import socket
+
+import pytest
+
+from engines.discovery_engine import DiscoveryEngine
+from engines.sharded_discovery import iter_sharded, merge_summaries, shard_ranges
+from utils.ip_ranges import IPRangeSet
+
+
+class TestShardRanges:
+    """Test address space sharding"""
+    
+    def test_covers_every_address_once(self):
+        """Test shards partition the address set"""
+        range_set = IPRangeSet.from_targets(['10.0.0.0/22', '10.0.9.5-10.0.9.20', '2001:db8::/120'])
+        shards = shard_ranges(range_set, 3)
+        
+        addresses = [ip for shard in shards for ip in IPRangeSet(shard)]
+        assert len(addresses) == range_set.num_addresses
+        assert set(addresses) == set(range_set)
+    
+    def test_blocks_aligned_and_interleaved(self):
+        """Test /24 blocks stay whole and are dealt round-robin"""
+        shards = shard_ranges(IPRangeSet.from_targets('10.0.0.0/22'), 2)
+        
+        first_blocks = [shard[0][1] & 0xFF for shard in shards]
+        assert first_blocks == [1, 0]
+        assert all((last + 1) % 256 == 0 or last & 0xFF == 254 for shard in shards for _, _, last in shard)
+        assert sum(1 for _ in IPRangeSet(shards[0])) == 255 + 256
+    
+    def test_small_set_drops_empty_shards(self):
+        """Test more shards than blocks yields only non-empty shards"""
+        assert len(shard_ranges(IPRangeSet.from_targets('10.0.0.1'), 8)) == 1
+    
+    def test_merge_summaries(self):
+        """Test worker summaries are summed and ratios recomputed"""
+        merged = merge_summaries([
+            {'probes_sent': 100, 'responders': 4, 'recovered_on_retry': 1, 'duration': 2.0},
+            {'probes_sent': 300, 'responders': 4, 'recovered_on_retry': 1, 'duration': 4.0},
+        ])
+        
+        assert merged['probes_sent'] == 400
+        assert merged['duration'] == 4.0
+        assert merged['probe_rate'] == 100.0
+        assert merged['first_probe_loss'] == 0.25
+
+
+class TestShardedDiscovery:
+    """Test sweeps across worker processes"""
+    
+    def test_discover_sharded(self, sample_config):
+        """Test worker processes find every listening loopback address"""
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(16)
+        port = server.getsockname()[1]
+        
+        sample_config['discovery'].update({'methods': ['tcp'], 'tcp_ports': [port]})
+        engine = DiscoveryEngine(sample_config)
+        progress = []
+        
+        try:
+            devices = engine.discover_sharded(
+                '127.0.0.1-127.0.0.12',
+                lambda completed, total: progress.append((completed, total)),
+                workers=3
+            )
+        finally:
+            server.close()
+        
+        # Other loopback addresses refuse the connection, which still proves liveness
+        assert sorted(int(d.ip_address.split('.')[-1]) for d in devices) == list(range(1, 13))
+        assert next(d for d in devices if d.ip_address == '127.0.0.1').open_ports == [port]
+        assert progress[-1] == (12, 12)
+        assert engine.last_scan_summary['responders'] == 12
+        assert engine.last_scan_summary['failed_shards'] == 0
+    
+    def test_progress_counts_addresses_once(self, sample_config):
+        """Test retried addresses do not push progress past the total"""
+        sample_config['discovery'].update({
+            'methods': ['tcp'], 'tcp_ports': [9], 'ping_timeout': 0.2,
+            'adaptive_timeouts': False, 'probe_retries': 2
+        })
+        progress = []
+        
+        # TEST-NET-1 is not routed, so silent addresses go through every retry
+        DiscoveryEngine(sample_config).discover_sharded(
+            '192.0.2.1-192.0.2.4',
+            lambda completed, total: progress.append((completed, total)),
+            workers=2
+        )
+        
+        assert progress[-1] == (4, 4)
+        assert all(completed <= total for completed, total in progress)
+    
+    def test_failed_worker_flagged(self, sample_config):
+        """Test a worker that fails is reported in the summary"""
+        sample_config['discovery'].update({'methods': ['tcp'], 'rtt_max_timeout': 'invalid'})
+        sweep = iter_sharded(sample_config, IPRangeSet.from_targets('127.0.0.1-127.0.0.4'), 2, block_size=2)
+        
+        with pytest.raises(StopIteration) as stop:
+            next(sweep)
+        
+        assert stop.value.value['failed_shards'] == 2
+        assert stop.value.value['unscanned_addresses'] == 4
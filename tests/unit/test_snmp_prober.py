@@ -0,0 +1,167 @@
+"""
+Unit tests for SNMP prober and SNMP fingerprinting
+"""
+
+import asyncio
+import threading
+import pytest
+from engines.snmp_prober import (
+    SnmpProber,
+    ObjectIdentifier,
+    TimeTicks,
+    encode_message,
+    decode_message,
+    PDU_GET_REQUEST,
+    PDU_GET_RESPONSE,
+    SYSTEM_OIDS,
+    SYS_DESCR,
+    SYS_OBJECT_ID,
+    SYS_UPTIME,
+    SYS_NAME
+)
+from engines.fingerprints import fingerprint_snmp
+
+
+CISCO_SYSTEM = {
+    SYS_DESCR: "Cisco IOS Software, C2960 Software (C2960-LANBASEK9-M), Version 15.0(2)SE11, RELEASE SOFTWARE (fc3)",
+    SYS_OBJECT_ID: ObjectIdentifier('1.3.6.1.4.1.9.1.1208'),
+    SYS_UPTIME: TimeTicks(9000000),
+    SYS_NAME: 'access-sw-01',
+}
+
+
+class _Responder(asyncio.DatagramProtocol):
+    """Minimal SNMP agent answering GETs from a fixed table"""
+    
+    def __init__(self, table, community='public'):
+        self.table = table
+        self.community = community
+    
+    def connection_made(self, transport):
+        self.transport = transport
+    
+    def datagram_received(self, data, addr):
+        request = decode_message(data)
+        if request['community'] != self.community:
+            return
+        varbinds = [(oid, self.table.get(oid)) for oid, _ in request['varbinds']]
+        response = encode_message(request['version'], request['community'], PDU_GET_RESPONSE,
+                                  request['request_id'], varbinds)
+        self.transport.sendto(response, addr)
+
+
+@pytest.fixture
+def snmp_agent():
+    """Local UDP SNMP responder running on its own loop"""
+    loop = asyncio.new_event_loop()
+    transport, _ = loop.run_until_complete(loop.create_datagram_endpoint(
+        lambda: _Responder(CISCO_SYSTEM), local_addr=('127.0.0.1', 0)
+    ))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    
+    yield transport.get_extra_info('sockname')[1]
+    
+    loop.call_soon_threadsafe(transport.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+class TestSnmpCodec:
+    """Test BER encoding round trips"""
+    
+    def test_round_trip(self):
+        """Test a message decodes to what was encoded"""
+        varbinds = [
+            (SYS_DESCR, 'text'),
+            (SYS_OBJECT_ID, ObjectIdentifier('1.3.6.1.4.1.2636.1.1.1.2.25')),
+            (SYS_UPTIME, TimeTicks(12345)),
+            ('1.3.6.1.2.1.2.1.0', -5),
+            (SYS_NAME, None),
+        ]
+        message = decode_message(encode_message(1, 'secret', PDU_GET_REQUEST, 70000, varbinds))
+        
+        assert message['community'] == 'secret'
+        assert message['request_id'] == 70000
+        assert message['varbinds'] == varbinds
+    
+    def test_decode_garbage(self):
+        """Test malformed datagrams are rejected"""
+        with pytest.raises(ValueError):
+            decode_message(b'\x30\x10\x02')
+
+
+class TestSnmpFingerprint:
+    """Test SNMP GETs and fingerprinting"""
+    
+    def test_get_from_responder(self, snmp_agent):
+        """Test fetching the system group from a local agent"""
+        async def run():
+            async with SnmpProber(port=snmp_agent) as prober:
+                return await prober.get('127.0.0.1', SYSTEM_OIDS, timeout=1.0)
+        
+        values = asyncio.run(run())
+        
+        assert values[SYS_NAME] == 'access-sw-01'
+        assert values[SYS_OBJECT_ID] == '1.3.6.1.4.1.9.1.1208'
+    
+    def test_ipv6_reply_matched_by_address_value(self):
+        """Test replies match however the agent's IPv6 address is written"""
+        async def run():
+            async with SnmpProber() as prober:
+                answers = []
+                for requested, source in (
+                    ('2001:db8:0:0:0:0:0:1', ('2001:db8::1', 161, 0, 0)),
+                    ('fe80::1%eth0', ('fe80::1', 161, 0, 2)),
+                    ('2001:db8::1', ('2001:db8::2', 161, 0, 0)),
+                ):
+                    request = asyncio.ensure_future(prober.get(requested, [SYS_NAME], timeout=0.2))
+                    while not prober._pending:
+                        await asyncio.sleep(0)
+                    request_id = next(iter(prober._pending))
+                    prober._on_datagram(
+                        encode_message(1, 'public', PDU_GET_RESPONSE, request_id, [(SYS_NAME, 'core1')]), source
+                    )
+                    answers.append(await request)
+                return answers
+        
+        try:
+            answers = asyncio.run(run())
+        except OSError:
+            pytest.skip("IPv6 unavailable")
+        
+        assert answers == [{SYS_NAME: 'core1'}, {SYS_NAME: 'core1'}, None]
+    
+    def test_wrong_community_times_out(self, snmp_agent):
+        """Test an agent that ignores the request yields None"""
+        async def run():
+            async with SnmpProber(community='wrong', port=snmp_agent, retries=0) as prober:
+                return await prober.get('127.0.0.1', SYSTEM_OIDS, timeout=0.2)
+        
+        assert asyncio.run(run()) is None
+    
+    def test_fingerprint_cisco(self):
+        """Test attribute extraction from the system group"""
+        attributes = fingerprint_snmp(CISCO_SYSTEM)
+        
+        assert attributes['vendor'] == 'Cisco'
+        assert attributes['model'] == 'C2960'
+        assert attributes['os_version'] == '15.0(2)SE11'
+        assert attributes['hostname'] == 'access-sw-01'
+        assert attributes['uptime'] == '1 days, 01:00:00'
+    
+    def test_engine_fingerprint_devices(self, sample_config, snmp_agent):
+        """Test the discovery engine fills devices from SNMP"""
+        from engines.discovery_engine import DiscoveryEngine
+        from models.device import Device
+        
+        sample_config['network']['snmp_port'] = snmp_agent
+        engine = DiscoveryEngine(sample_config)
+        devices = [Device(ip_address='127.0.0.1'), Device(ip_address='127.0.0.1', hostname='kept')]
+        
+        engine.fingerprint_devices(devices)
+        
+        assert devices[0].vendor == 'Cisco'
+        assert devices[0].hostname == 'access-sw-01'
+        assert devices[1].hostname == 'kept'
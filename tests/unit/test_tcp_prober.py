@@ -0,0 +1,61 @@
+"""
+Unit tests for TCP prober
+"""
+
+import asyncio
+import socket
+import pytest
+from engines.tcp_prober import TcpProber
+
+
+@pytest.fixture
+def listener():
+    """Listening TCP socket on loopback"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(16)
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+def _closed_port():
+    """A loopback port with nothing listening"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestTcpProber:
+    """Test TCP connect probing"""
+    
+    def test_open_and_refused_ports(self, listener):
+        """Test open ports are recorded and refusals count as answers"""
+        closed = _closed_port()
+        
+        async def run():
+            async with TcpProber([listener, closed]) as prober:
+                return await prober.probe('127.0.0.1', timeout=1.0)
+        
+        open_ports, rtt = asyncio.run(run())
+        
+        assert list(open_ports) == [listener]
+        assert rtt is not None
+    
+    def test_connect_states(self, listener):
+        """Test per-port connect states"""
+        closed = _closed_port()
+        
+        async def run():
+            async with TcpProber([]) as prober:
+                return (
+                    await prober.connect('127.0.0.1', listener),
+                    await prober.connect('127.0.0.1', closed)
+                )
+        
+        (open_state, open_rtt), (closed_state, _) = asyncio.run(run())
+        
+        assert open_state == 'open'
+        assert open_rtt >= 0
+        assert closed_state == 'refused'
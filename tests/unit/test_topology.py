@@ -0,0 +1,255 @@
+"""
+Unit tests for CDP/LLDP topology discovery
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from engines.topology import (
+    TopologyCrawler, TopologyGraph, TopologyStore, parse_cdp_neighbors, parse_lldp_neighbors
+)
+from models.device import Device
+from utils.ip_ranges import IPRangeSet
+
+
+def cdp_entry(hostname, ip, local, remote, platform='cisco WS-C3750X-48P'):
+    """One 'show cdp neighbors detail' entry"""
+    return (
+        "-------------------------\n"
+        f"Device ID: {hostname}\n"
+        "Entry address(es): \n"
+        f"  IP address: {ip}\n"
+        f"Platform: {platform},  Capabilities: Switch IGMP \n"
+        f"Interface: {local},  Port ID (outgoing port): {remote}\n"
+        "Holdtime : 145 sec\n"
+    )
+
+
+LLDP_OUTPUT = """------------------------------------------------
+Local Intf: Gi1/0/2
+Chassis id: 2cc2.6011.2233
+Port id: ge-0/0/1
+Port Description: uplink
+System Name: ex1.example.com
+
+System Description:
+Juniper Networks, Inc. ex2300-24t Ethernet Switch, kernel JUNOS 18.4R2
+
+Time remaining: 98 seconds
+System Capabilities: B,R
+Enabled Capabilities: B,R
+Management Addresses:
+    IP: 10.0.0.7
+Auto Negotiation - supported, enabled
+
+Total entries displayed: 1
+"""
+
+
+class FakeSession:
+    """Checked out session answering the prompt"""
+
+    def __init__(self, prompt):
+        self.prompt = prompt
+
+    def find_prompt(self):
+        return self.prompt
+
+
+class FakeConnectionManager:
+    """Answers neighbor commands from a canned table per device"""
+
+    def __init__(self, tables, delay=0.0):
+        self.tables = tables
+        self.delay = delay
+        self.connections = {}
+        self.visits = []
+        self.held = set()
+        self.unheld_commands = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def is_connected(self, device):
+        return device.ip_address in self.connections
+
+    def connect(self, device):
+        with self._lock:
+            self.visits.append(device.ip_address)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.connections[device.ip_address] = object()
+        return device.ip_address in self.tables
+
+    @contextmanager
+    def checkout(self, device):
+        self.held.add(device.ip_address)
+        try:
+            yield FakeSession(f"{device.ip_address.replace('.', '-')}#")
+        finally:
+            self.held.discard(device.ip_address)
+
+    def execute_command(self, device, command):
+        if device.ip_address not in self.held:
+            self.unheld_commands.append(command)
+        time.sleep(self.delay)
+        cdp, lldp = self.tables[device.ip_address]
+        return True, cdp if 'cdp' in command else lldp
+
+    def disconnect(self, device):
+        self.connections.pop(device.ip_address, None)
+        with self._lock:
+            self.active -= 1
+        return True
+
+
+class TestParsers:
+    """Test neighbor table parsing"""
+
+    def test_parse_cdp(self):
+        """Test CDP detail entries give hostname, address, interfaces and platform"""
+        output = cdp_entry('sw2.example.com', '10.0.0.2', 'GigabitEthernet1/0/1', 'GigabitEthernet0/1') + \
+            cdp_entry('N9K(FDO1234)', '10.0.0.3', 'Ethernet1/1', 'Ethernet1/49', 'N9K-C93180YC-EX')
+
+        neighbors = parse_cdp_neighbors(output)
+
+        assert [n.hostname for n in neighbors] == ['sw2.example.com', 'N9K']
+        assert neighbors[0].ip_address == '10.0.0.2'
+        assert neighbors[0].local_interface == 'GigabitEthernet1/0/1'
+        assert neighbors[0].remote_interface == 'GigabitEthernet0/1'
+        assert neighbors[0].platform == 'cisco WS-C3750X-48P'
+
+    def test_parse_lldp(self):
+        """Test LLDP detail entries give management address and system description"""
+        neighbors = parse_lldp_neighbors(LLDP_OUTPUT)
+
+        assert len(neighbors) == 1
+        neighbor = neighbors[0]
+        assert (neighbor.hostname, neighbor.ip_address) == ('ex1.example.com', '10.0.0.7')
+        assert (neighbor.local_interface, neighbor.remote_interface) == ('Gi1/0/2', 'ge-0/0/1')
+        assert neighbor.platform.startswith('Juniper Networks')
+
+    def test_parse_disabled_protocol(self):
+        """Test an error message parses to no neighbors"""
+        assert parse_lldp_neighbors("% LLDP is not enabled") == []
+        assert parse_cdp_neighbors("% CDP is not enabled") == []
+
+
+class TestTopologyGraph:
+    """Test graph bookkeeping"""
+
+    def test_link_from_both_ends_kept_once(self):
+        """Test a link reported by both ends and both protocols is stored once"""
+        graph = TopologyGraph()
+        a = graph.add_node(Device(ip_address='10.0.0.1', hostname='a'))
+        b = graph.add_node(Device(ip_address='10.0.0.2', hostname='b'))
+
+        assert graph.add_link(a, b, 'GigabitEthernet1/0/1', 'Gi0/1', 'cdp')
+        assert not graph.add_link(b, a, 'GigabitEthernet0/1', 'Gi1/0/1', 'cdp')
+        assert not graph.add_link(a, b, 'Gi1/0/1', 'GigabitEthernet0/1', 'lldp')
+
+        assert len(graph.links) == 1
+        assert graph.neighbors(a) == [b]
+        assert graph.neighbors(b) == [a]
+
+    def test_round_trip(self):
+        """Test graphs survive to_dict/from_dict"""
+        graph = TopologyGraph()
+        a = graph.add_node(Device(ip_address='10.0.0.1', hostname='a'))
+        b = graph.add_node(Device(ip_address='10.0.0.2', hostname='b'))
+        graph.add_link(a, b, 'Gi1/0/1', 'Gi0/1', 'cdp')
+
+        restored = TopologyGraph.from_dict(graph.to_dict())
+
+        assert set(restored.nodes) == {a, b}
+        assert restored.links[0].source_interface == 'Gi1/0/1'
+
+
+class TestTopologyCrawler:
+    """Test breadth-first neighbor crawling"""
+
+    def campus(self):
+        """Core with two distribution switches that also see each other, and an access switch"""
+        return {
+            '10.0.0.1': (
+                cdp_entry('dist1', '10.0.1.1', 'Gi1/0/1', 'Gi0/1') + cdp_entry('dist2', '10.0.2.1', 'Gi1/0/2', 'Gi0/1'),
+                ''
+            ),
+            '10.0.1.1': (
+                cdp_entry('core.example.com', '10.0.0.1', 'Gi0/1', 'Gi1/0/1')
+                + cdp_entry('dist2', '10.0.2.1', 'Gi0/2', 'Gi0/2')
+                + cdp_entry('access1', '10.0.3.1', 'Gi0/3', 'Gi0/1'),
+                ''
+            ),
+            '10.0.2.1': (
+                # Reports the core under another interface address
+                cdp_entry('core', '10.9.9.9', 'Gi0/1', 'Gi1/0/2') + cdp_entry('dist1', '10.0.1.1', 'Gi0/2', 'Gi0/2'),
+                ''
+            ),
+            '10.0.3.1': (cdp_entry('dist1', '10.0.1.1', 'Gi0/1', 'Gi0/3'), ''),
+        }
+
+    def test_each_device_visited_once(self):
+        """Test the crawl reaches every device once and dedupes links"""
+        manager = FakeConnectionManager(self.campus())
+        seed = Device(ip_address='10.0.0.1', hostname='core', credential_name='lab')
+
+        graph = TopologyCrawler(manager, max_sessions=4).crawl([seed])
+
+        assert sorted(manager.visits) == ['10.0.0.1', '10.0.1.1', '10.0.2.1', '10.0.3.1']
+        assert set(graph.nodes) == {'10.0.0.1', '10.0.1.1', '10.0.2.1', '10.0.3.1'}
+        assert len(graph.links) == 4
+        assert graph.nodes['10.0.3.1'].credential_name == 'lab'
+        assert graph.nodes['10.0.3.1'].vendor == 'Cisco'
+
+    def test_visit_holds_device(self):
+        """Test the prompt and neighbor tables are read within one checkout"""
+        manager = FakeConnectionManager(self.campus())
+        seed = Device(ip_address='10.0.0.1', credential_name='lab')
+
+        TopologyCrawler(manager, max_sessions=4).crawl([seed])
+
+        assert seed.hostname == '10-0-0-1'
+        assert manager.unheld_commands == []
+
+    def test_sessions_bounded(self):
+        """Test no more than max_sessions devices are logged into at once"""
+        tables = {'10.0.0.1': (''.join(
+            cdp_entry(f'sw{i}', f'10.0.1.{i}', f'Gi1/0/{i}', 'Gi0/1') for i in range(1, 13)
+        ), '')}
+        tables.update({f'10.0.1.{i}': ('', '') for i in range(1, 13)})
+        manager = FakeConnectionManager(tables, delay=0.02)
+
+        TopologyCrawler(manager, max_sessions=3).crawl([Device(ip_address='10.0.0.1', credential_name='lab')])
+
+        assert len(manager.visits) == 13
+        assert manager.max_active <= 3
+
+    def test_depth_and_scope(self):
+        """Test depth and scope limits stop the crawl but keep the neighbors in the graph"""
+        seed = Device(ip_address='10.0.0.1', hostname='core', credential_name='lab')
+
+        manager = FakeConnectionManager(self.campus())
+        graph = TopologyCrawler(manager, max_depth=1).crawl([seed])
+        assert '10.0.3.1' in graph.nodes
+        assert '10.0.3.1' not in manager.visits
+
+        manager = FakeConnectionManager(self.campus())
+        TopologyCrawler(manager, scope=IPRangeSet.from_targets(['10.0.0.0/23'])).crawl([seed])
+        assert sorted(manager.visits) == ['10.0.0.1', '10.0.1.1']
+
+    def test_store_round_trip(self, tmp_path):
+        """Test crawled topologies are saved and the newest is loaded"""
+        manager = FakeConnectionManager(self.campus())
+        graph = TopologyCrawler(manager).crawl([Device(ip_address='10.0.0.1', hostname='core', credential_name='lab')])
+        store = TopologyStore(str(tmp_path / 'snatt.db'))
+
+        store.save(TopologyGraph(), ['10.0.0.254'])
+        store.save(graph, ['10.0.0.1'])
+        loaded = store.load()
+        store.close()
+
+        assert set(loaded.nodes) == set(graph.nodes)
+        assert len(loaded.links) == len(graph.links)
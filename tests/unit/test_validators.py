@@ -10,7 +10,8 @@ from utils.validators import (
     validate_port,
     validate_hostname,
     validate_credential_name,
-    validate_timeout
+    validate_timeout,
+    validate_targets
 )
 
 
@@ -133,3 +134,14 @@ class TestValidators:
         
         valid, error = validate_timeout("not-a-number")
         assert valid is False
+    
+    def test_validate_targets(self):
+        """Test target lists with exclusions"""
+        valid, error = validate_targets("10.0.0.0/8, !10.1.0.0/16, !10.2.0.1-10.2.0.9")
+        assert valid is True
+        
+        valid, error = validate_targets("!10.1.0.0/16")
+        assert valid is False
+        
+        valid, error = validate_targets("10.0.0.0/8, !10.1.0.300")
+        assert valid is False